@@ -241,6 +241,21 @@ def _display_sql_queries():
       return response
 
 
+def _enable_request_timing():
+  """Time requests for response headers or benchmark stats if enabled."""
+  if (getattr(settings, "REQUEST_TIMING", False) or
+          getattr(settings, "BENCHMARK_STATS", False)):
+    from ggrc.utils import request_timing
+    request_timing.init_app(app)
+
+
+def _enable_request_profiling():
+  """Allow admins to profile requests with X-GGRC-Profile header."""
+  if getattr(settings, "PROFILE_REQUESTS", False):
+    from ggrc.utils import profiler
+    profiler.init_app(app)
+
+
 setup_error_handlers(app)
 init_models(app)
 configure_flask_login(app)
@@ -257,3 +272,5 @@ notifications.register_notification_listeners()
 _enable_debug_toolbar()
 _enable_jasmine()
 _display_sql_queries()
+_enable_request_timing()
+_enable_request_profiling()
@@ -76,6 +76,20 @@ def publish(obj, inclusions=(), inclusion_filter=None):
   return obj
 
 
+def publish_fields(obj, fields, inclusions=(), inclusion_filter=None):
+  """Translate ``obj`` into a JSON dict with only the requested fields.
+
+  Only published attributes listed in ``fields`` are translated, so
+  relationships and association proxies that were not requested are never
+  loaded.
+  """
+  ret = {key: value for key, value in publish_base_properties(obj).items()
+         if key in fields}
+  ret.update(get_json_builder(obj).publish_fields(
+      obj, fields, inclusions, inclusion_filter))
+  return ret
+
+
 def update(obj, json_obj):
   """Translate the state represented by ``json_obj`` into update actions
   performed upon the model object ``obj``. After performing the update ``obj``
@@ -517,7 +531,19 @@ def publish_representation(resource):
 
 
 class Builder(AttributeInfo):
-  """JSON Dictionary builder for ggrc.models.* objects and their mixins."""
+  """JSON Dictionary builder for ggrc.models.* objects and their mixins.
+
+  Publishing of attributes is compiled into a list of functions once per
+  model class, published attributes and their inclusions, see
+  ``_compile_attr``. At most ``MAX_COMPILED_PUBLISHERS`` compiled lists are
+  kept per builder.
+  """
+
+  MAX_COMPILED_PUBLISHERS = 256
+
+  def __init__(self, tgt_class):
+    super(Builder, self).__init__(tgt_class)
+    self._compiled_publishers = {}
 
   def generate_link_object_for(
           self, obj, inclusions, include, inclusion_filter):
@@ -536,10 +562,22 @@ class Builder(AttributeInfo):
         attr_name, remaining_path = path[0], path[1:]
       else:
         attr_name, remaining_path = path, ()
-      result[attr_name] = self.publish_attr(
-          obj, attr_name, remaining_path, include, inclusion_filter)
+      publisher = self._get_link_publisher(
+          obj.__class__, attr_name, remaining_path, include)
+      result[attr_name] = publisher(obj, inclusion_filter)
     return result
 
+  def _get_link_publisher(self, cls, attr_name, inclusions, include):
+    """Get the compiled publisher of an attribute included in a link."""
+    key = (cls, attr_name, inclusions, include)
+    publisher = self._compiled_publishers.get(key)
+    if publisher is None:
+      publisher = self._compile_attr(cls, attr_name, inclusions, include)
+      if len(self._compiled_publishers) >= self.MAX_COMPILED_PUBLISHERS:
+        self._compiled_publishers.clear()
+      self._compiled_publishers[key] = publisher
+    return publisher
+
   def publish_link_collection(
           self, join_objects, inclusions, include, inclusion_filter):
     """The ``attr_name`` attribute is a collection of object references;
@@ -611,84 +649,144 @@ class Builder(AttributeInfo):
                   target_type, getattr(o, target_name))
               for o in join_objects]
 
-  def publish_relationship(
-          self, obj, attr_name, class_attr, inclusions, include,
-          inclusion_filter):
-    uselist = class_attr.property.uselist
-    if uselist:
-      join_objects = getattr(obj, attr_name)
-      return self.publish_link_collection(
-          join_objects, inclusions, include, inclusion_filter)
-    elif include or class_attr.property.backref:
-      return self.publish_link(
-          obj, attr_name, inclusions, include, inclusion_filter)
-    else:
-      if class_attr.property.mapper.class_.__mapper__.polymorphic_on \
-              is not None:
-        target = getattr(obj, attr_name)
-        target_type = target.__class__.__name__
-      else:
-        target_type = class_attr.property.mapper.class_.__name__
-      target_name = list(class_attr.property.local_columns)[0].key
+  def _compile_relationship(self, attr_name, class_attr, inclusions,
+                            include):
+    """Compile publishing of a single relationship."""
+    prop = class_attr.property
+    if prop.uselist:
+      def publish_collection(obj, inclusion_filter):
+        return self.publish_link_collection(
+            getattr(obj, attr_name), inclusions, include, inclusion_filter)
+      return publish_collection
+    if include or prop.backref:
+      def publish_link(obj, inclusion_filter):
+        return self.publish_link(
+            obj, attr_name, inclusions, include, inclusion_filter)
+      return publish_link
+    target_name = list(prop.local_columns)[0].key
+    if prop.mapper.class_.__mapper__.polymorphic_on is not None:
+      def publish_polymorphic_stub(obj, _):
+        target_type = getattr(obj, attr_name).__class__.__name__
+        attr_value = getattr(obj, target_name)
+        if attr_value is not None:
+          return LazyStubRepresentation(target_type, attr_value)
+        return None
+      return publish_polymorphic_stub
+    target_type = prop.mapper.class_.__name__
+
+    def publish_stub(obj, _):
       attr_value = getattr(obj, target_name)
       if attr_value is not None:
         return LazyStubRepresentation(target_type, attr_value)
-      else:
-        return None
+      return None
+    return publish_stub
 
-  def publish_attr(
-          self, obj, attr_name, inclusions, include, inclusion_filter):
-    class_attr = getattr(obj.__class__, attr_name)
-    result = None
-
-    if attr_name in getattr(obj.__class__, "_custom_publish", {}):
-      # The attribute has a custom publish logic
-      result = obj.__class__._custom_publish[attr_name](obj)
-    elif isinstance(class_attr, AssociationProxy):
-      if getattr(class_attr, 'publish_raw', False):
+  def _compile_association_proxy(self, attr_name, class_attr, inclusions,
+                                 include):
+    """Compile ``publish_association_proxy`` for a single proxy."""
+    if getattr(class_attr, 'publish_raw', False):
+      def publish_raw(obj, _):
         published_attr = getattr(obj, attr_name)
         if hasattr(published_attr, "copy"):
-          result = published_attr.copy()
-        else:
-          result = published_attr
-      else:
-        result = self.publish_association_proxy(
-            obj, attr_name, class_attr, inclusions, include, inclusion_filter)
-    elif isinstance(class_attr, InstrumentedAttribute) and \
-            isinstance(class_attr.property, RelationshipProperty):
-      result = self.publish_relationship(
+          return published_attr.copy()
+        return published_attr
+      return publish_raw
+
+    def publish_association_proxy(obj, inclusion_filter):
+      return self.publish_association_proxy(
           obj, attr_name, class_attr, inclusions, include, inclusion_filter)
-    elif class_attr.__class__.__name__ == 'property':
-      if not inclusions or include:
-        if getattr(obj, '{0}_id'.format(attr_name)):
-          result = LazyStubRepresentation(
-              getattr(obj, '{0}_type'.format(attr_name)),
-              getattr(obj, '{0}_id'.format(attr_name)))
-      else:
-        result = self.publish_link(
-            obj, attr_name, inclusions, include, inclusion_filter)
-    else:
-      result = getattr(obj, attr_name)
+    return publish_association_proxy
+
+  def _compile_property(self, attr_name, inclusions, include):
+    """Compile publishing of a polymorphic python property."""
+    if not inclusions or include:
+      type_attr = '{0}_type'.format(attr_name)
+      id_attr = '{0}_id'.format(attr_name)
+
+      def publish_property_stub(obj, _):
+        if getattr(obj, id_attr):
+          return LazyStubRepresentation(
+              getattr(obj, type_attr), getattr(obj, id_attr))
+        return None
+      return publish_property_stub
 
-    return result
+    def publish_property_link(obj, inclusion_filter):
+      return self.publish_link(
+          obj, attr_name, inclusions, include, inclusion_filter)
+    return publish_property_link
 
-  def _publish_attrs_for(
-          self, obj, attrs, json_obj, inclusions=None, inclusion_filter=None):
-    if inclusions is None:
-      inclusions = []
-    for attr in attrs:
-      if hasattr(attr, '__call__'):
-        attr_name = attr.attr_name
-      else:
-        attr_name = attr
+  def _compile_attr(self, cls, attr_name, inclusions, include):
+    """Compile publishing of a single attribute of ``cls``.
+
+    The attribute kind only depends on the class, so the dispatch is done once
+    and the returned function only reads the values of an object.
+
+    Returns:
+      function with ``obj`` and ``inclusion_filter`` arguments returning the
+      the published value of the attribute.
+    """
+    class_attr = getattr(cls, attr_name)
+
+    if attr_name in getattr(cls, "_custom_publish", {}):
+      custom_publish = cls._custom_publish[attr_name]
+      return lambda obj, _: custom_publish(obj)
+    if isinstance(class_attr, AssociationProxy):
+      return self._compile_association_proxy(
+          attr_name, class_attr, inclusions, include)
+    if isinstance(class_attr, InstrumentedAttribute) and \
+            isinstance(class_attr.property, RelationshipProperty):
+      return self._compile_relationship(
+          attr_name, class_attr, inclusions, include)
+    if class_attr.__class__.__name__ == 'property':
+      return self._compile_property(attr_name, inclusions, include)
+    return lambda obj, _: getattr(obj, attr_name)
+
+  def _compile_attrs(self, cls, attr_names, local_inclusions):
+    """Compile publishing of attributes with their inclusions.
+
+    Returns:
+      list of (attr_name, publish function) pairs.
+    """
+    return [
+        (attr_name, self._compile_attr(
+            cls, attr_name, local_inclusion[1:], len(local_inclusion) > 0))
+        for attr_name, local_inclusion in zip(attr_names, local_inclusions)
+    ]
+
+  @staticmethod
+  def _get_local_inclusions(attr_names, inclusions):
+    """Get the inclusion of every attribute or an empty tuple."""
+    local_inclusions = []
+    for attr_name in attr_names:
       local_inclusion = ()
       for inclusion in inclusions:
         if inclusion[0] == attr_name:
           local_inclusion = inclusion
           break
-      json_obj[attr_name] = self.publish_attr(
-          obj, attr_name, local_inclusion[1:], len(local_inclusion) > 0,
-          inclusion_filter)
+      local_inclusions.append(local_inclusion)
+    return tuple(local_inclusions)
+
+  def _get_publishers(self, cls, attrs, inclusions):
+    """Get compiled publishers of attrs cached per class and inclusions.
+
+    Only the names of the published attributes and their inclusions are in the
+    cache key, so unknown fields and inclusions requested by clients do not
+    create new entries.
+    """
+    attr_names = tuple(getattr(attr, 'attr_name', attr) for attr in attrs)
+    local_inclusions = self._get_local_inclusions(attr_names, inclusions)
+    key = (cls, attr_names, local_inclusions)
+    publishers = self._compiled_publishers.get(key)
+    if publishers is None:
+      publishers = self._compile_attrs(cls, attr_names, local_inclusions)
+      if len(self._compiled_publishers) >= self.MAX_COMPILED_PUBLISHERS:
+        self._compiled_publishers.clear()
+      self._compiled_publishers[key] = publishers
+    return publishers
+
+  def _get_inclusions(self, extra_inclusions):
+    inclusions = tuple((attr,) for attr in self._include_links)
+    return tuple(set(inclusions).union(set(extra_inclusions)))
 
   def publish_attrs(self, obj, json_obj, extra_inclusions, inclusion_filter):
     """Translate the state represented by ``obj`` into the JSON dictionary
@@ -706,10 +804,21 @@ class Builder(AttributeInfo):
       [('directives'),('cycles')]
       [('directives', ('audit_frequency','organization')),('cycles')]
     """
-    inclusions = tuple((attr,) for attr in self._include_links)
-    inclusions = tuple(set(inclusions).union(set(extra_inclusions)))
-    return self._publish_attrs_for(
-        obj, self._publish_attrs, json_obj, inclusions, inclusion_filter)
+    inclusions = self._get_inclusions(extra_inclusions)
+    publishers = self._get_publishers(
+        obj.__class__, self._publish_attrs, inclusions)
+    for attr_name, publisher in publishers:
+      json_obj[attr_name] = publisher(obj, inclusion_filter)
+
+  def publish_fields(self, obj, fields, extra_inclusions, inclusion_filter):
+    """Translate only the published attributes listed in ``fields``."""
+    fields = frozenset(fields)
+    attrs = [attr for attr in self._publish_attrs
+             if getattr(attr, 'attr_name', attr) in fields]
+    inclusions = self._get_inclusions(extra_inclusions)
+    publishers = self._get_publishers(obj.__class__, attrs, inclusions)
+    return {attr_name: publisher(obj, inclusion_filter)
+            for attr_name, publisher in publishers}
 
   @classmethod
   def do_update_attrs(cls, obj, json_obj, attrs):
@@ -52,6 +52,7 @@ class CacheManager:
     self.marked_for_add = {}
     self.marked_for_update = {}
     self.marked_for_delete = []
+    self.permission_changes = None
 
   def get_collection(self, category, resource, filter):
     """Get collection from cache.
@@ -202,3 +203,4 @@ class CacheManager:
     self.marked_for_add = {}
     self.marked_for_update = {}
     self.marked_for_delete = []
+    self.permission_changes = None
@@ -3,6 +3,7 @@
 
 """Base objects for csv file converters."""
 
+import itertools
 from collections import defaultdict
 
 from ggrc import settings
@@ -64,36 +65,64 @@ class Converter(object):
     self.response_data = []
     self.exportable = get_exportables()
     self.indexer = get_indexer()
+    self.progress = {"parsed": 0, "validated": 0, "written": 0}
+    self.progress_callback = kwargs.get("progress_callback")
 
-  def to_array(self):
-    with benchmark("Create block converters"):
-      self.block_converters_from_ids()
-    with benchmark("Handle row data"):
-      self.handle_row_data()
-    with benchmark("Make block array"):
-      return self.to_block_array()
-
-  def to_block_array(self):
-    """ exporting each in it's own block separated by empty lines
+  def update_progress(self, **counts):
+    """Add row counts to the progress and report it to progress_callback.
 
-    Generate 2d array where each cell represents a cell in a csv file
+    Args:
+      counts: numbers of rows that were parsed, validated or written.
     """
-    csv_data = []
-    for block_converter in self.block_converters:
-      csv_header, csv_body = block_converter.to_array()
+    for key, count in counts.iteritems():
+      self.progress[key] += count
+    if self.progress_callback:
+      self.progress_callback(dict(self.progress))
+
+  def to_row_stream(self):
+    """Get the csv width and a generator of csv rows for all export blocks.
+
+    Every block is exported with its header and two empty lines after its
+    body. The first column holds "Object type" and the block name in the
+    header and is empty otherwise. Rows of object blocks are built from chunks
+    of objects while they are consumed, so the whole 2D array is never held in
+    memory.
+
+    Returns:
+      tuple with the number of columns and a generator of rows.
+    """
+    with benchmark("Create block converters"):
+      self.block_converters_from_ids()
+    self.update_progress(parsed=sum(len(object_data.get("ids", []))
+                                    for object_data in self.ids_by_type))
+    headers = [block_converter.generate_csv_header()
+               for block_converter in self.block_converters]
+    width = max([len(line) + 1 for header in headers for line in header] or
+                [0])
+    return width, self._generate_block_rows(headers)
+
+  def _generate_block_rows(self, headers):
+    """Generate csv rows of export blocks separated by empty lines."""
+    for block_converter, csv_header in zip(self.block_converters, headers):
+      block_data = itertools.chain(
+          csv_header,
+          block_converter.generate_csv_body_chunks(),
+          [[], []],
+      )
       # multi block csv must have first column empty
-      two_empty_lines = [[], []]
-      block_data = csv_header + csv_body + two_empty_lines
-      for line in block_data:
-        line.insert(0, "")
-      block_data[0][0] = "Object type"
-      block_data[1][0] = block_converter.name
-      csv_data.extend(block_data)
-    return csv_data
+      first_cells = itertools.chain(
+          ["Object type", block_converter.name],
+          itertools.repeat(""),
+      )
+      for first_cell, line in itertools.izip(first_cells, block_data):
+        yield [first_cell] + line
 
   def import_csv(self):
     self.block_converters_from_csv()
     self.row_converters_from_csv()
+    self.update_progress(parsed=sum(len(block_converter.row_converters)
+                                    for block_converter in
+                                    self.block_converters))
     self.handle_priority_columns()
     self.import_objects()
     self.import_secondary_objects()
@@ -104,10 +133,6 @@ class Converter(object):
       for block_converter in self.block_converters:
         block_converter.handle_row_data(attr_name)
 
-  def handle_row_data(self):
-    for converter in self.block_converters:
-      converter.handle_row_data()
-
   def row_converters_from_csv(self):
     for converter in self.block_converters:
       converter.row_converters_from_csv()
@@ -116,6 +141,8 @@ class Converter(object):
     """ fill the block_converters class variable
 
     Generate block converters from a list of tuples with an object name and ids
+    Row converters are created later, chunk by chunk, while the export is
+    streamed.
     """
     object_map = {o.__name__: o for o in self.exportable.values()}
     for object_data in self.ids_by_type:
@@ -131,7 +158,6 @@ class Converter(object):
                                          fields=fields, object_ids=object_ids,
                                          class_name=class_name)
         block_converter.check_block_restrictions()
-        block_converter.row_converters_from_ids()
         self.block_converters.append(block_converter)
 
   def block_converters_from_csv(self):
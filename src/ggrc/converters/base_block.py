@@ -7,6 +7,8 @@ Each import block should contain data for one Object type. The blocks are
 separated in the csv file with empty lines.
 """
 
+import time
+from datetime import datetime
 from logging import getLogger
 from collections import defaultdict
 from collections import OrderedDict
@@ -15,20 +17,30 @@ from collections import Counter
 from sqlalchemy import exc
 from sqlalchemy import or_
 from sqlalchemy import and_
+from sqlalchemy import inspect
 from sqlalchemy.orm.exc import UnmappedInstanceError
 
 from ggrc import db
 from ggrc import models
+from ggrc import settings
+from ggrc.automapper import AutomapperGenerator
+from ggrc.login import get_current_user_id
 from ggrc.rbac import permissions
 from ggrc.utils import benchmark
 from ggrc.utils import structures
 from ggrc.converters import errors
+from ggrc.converters import get_exportables
 from ggrc.converters import get_shared_unique_rules
 from ggrc.converters import pre_commit_checks
 from ggrc.converters.base_row import RowConverter
+from ggrc.converters.handlers import handlers
+from ggrc.converters.handlers.custom_attribute import \
+    CustomAttributeColumHandler
 from ggrc.converters.import_helper import get_column_order
 from ggrc.converters.import_helper import get_object_column_definitions
+from ggrc.services.common import get_cache
 from ggrc.services.common import get_modified_objects
+from ggrc.services.common import queue_index_update
 from ggrc.services.common import update_index
 from ggrc.services.common import update_memcache_after_commit
 from ggrc.services.common import update_memcache_before_commit
@@ -44,6 +56,13 @@ logger = getLogger(__name__)
 CACHE_EXPIRY_IMPORT = 600
 
 
+def get_identifier_column(model):
+  """Get the column with user visible identifiers of model objects."""
+  if hasattr(model, "slug"):
+    return model.slug
+  return model.email
+
+
 class BlockConverter(object):
   # pylint: disable=too-many-public-methods
 
@@ -100,6 +119,9 @@ class BlockConverter(object):
     self._roles_cache = None
     self._user_roles_cache = None
     self._ca_definitions_cache = None
+    self._relationships_cache = None
+    self._objects_cache = None
+    self.new_relationships = OrderedDict()
     self.converter = converter
     self.offset = options.get("offset", 0)
     self.object_class = options.get("object_class")
@@ -172,6 +194,98 @@ class BlockConverter(object):
       self._ca_definitions_cache = self._create_ca_definitions_cache()
     return self._ca_definitions_cache
 
+  def _is_person_attribute(self, title):
+    """Check if a custom attribute column contains person emails."""
+    return any(
+        definition.attribute_type == "Map:Person"
+        for (_, cad_title), definition
+        in self.get_ca_definitions_cache().iteritems()
+        if cad_title == title
+    )
+
+  def _get_identifier_columns(self):
+    """Get columns that reference objects with slugs or emails.
+
+    Returns:
+      dict with a list of column indexes for every referenced model.
+    """
+    exportables = get_exportables()
+    columns = defaultdict(list)
+    for index, (attr_name, header) in enumerate(self.headers.items()):
+      handler = header["handler"]
+      model = None
+      if attr_name in ("slug", "email"):
+        model = self.object_class
+      elif issubclass(handler, handlers.MappingColumnHandler):
+        model = exportables.get(header.get("attr_name", ""))
+      elif issubclass(handler, handlers.UserColumnHandler):
+        model = models.Person
+      elif issubclass(handler, CustomAttributeColumHandler) and \
+              self._is_person_attribute(header["display_name"]):
+        model = models.Person
+      if model is not None:
+        columns[model].append(index)
+    return columns
+
+  def _create_objects_cache(self):
+    """Load all objects referenced with slugs and emails in the block.
+
+    All columns are scanned first and the referenced objects are then loaded
+    with a few IN queries per model.
+
+    Returns:
+      dict with objects by lower case identifier for every referenced model.
+      Identifiers of objects that do not exist are mapped to None.
+    """
+    cache = {}
+    chunk_size = settings.QUERY_CHUNK_SIZE
+    with benchmark("Prefetch objects referenced in block"):
+      for model, indexes in self._get_identifier_columns().iteritems():
+        identifiers = set()
+        for row in self.rows:
+          for index in indexes:
+            identifiers.update(line.strip().lower()
+                               for line in row[index].splitlines()
+                               if line.strip())
+        objects = dict.fromkeys(identifiers)
+        column = get_identifier_column(model)
+        identifiers = list(identifiers)
+        for start in range(0, len(identifiers), chunk_size):
+          query = db.session.query(model, column).filter(
+              column.in_(identifiers[start:start + chunk_size]))
+          for obj, identifier in query:
+            objects[identifier.lower()] = obj
+        cache[model] = objects
+    return cache
+
+  def get_objects_cache(self):
+    """Get objects referenced in the block by model and identifier."""
+    if self._objects_cache is None:
+      self._objects_cache = self._create_objects_cache()
+    return self._objects_cache
+
+  def find_object(self, model, identifier):
+    """Find an object by its slug or email.
+
+    Objects referenced in the block are taken from the objects cache. The
+    cache is built before previous blocks are saved, so objects created by
+    those blocks are taken from the new objects of the converter. Objects
+    deleted by a previous block and identifiers that were not prefetched are
+    queried.
+    """
+    identifier = identifier.lower()
+    objects = self.get_objects_cache().get(model, {})
+    if identifier in objects:
+      obj = objects[identifier]
+      if obj is None:
+        obj = self.converter.new_objects.get(model, {}).get(identifier)
+        if obj is None or inspect(obj).persistent:
+          return obj
+      elif obj in db.session:
+        return obj
+    column = get_identifier_column(model)
+    return model.query.filter(column == identifier).first()
+
   def _get_relationships(self):
     """Get all relationships for any of the object in the current block."""
     relationship = models.Relationship
@@ -241,6 +355,93 @@ class BlockConverter(object):
       self._mapping_cache = self._create_mapping_cache()
     return self._mapping_cache
 
+  @staticmethod
+  def _get_relationships_query(stubs):
+    """Get the query of relationships of objects with the given stubs.
+
+    Objects are filtered with a type and an IN list of ids for every type in
+    both directions and the results are combined with UNION, so that MySQL
+    can use the source and destination indexes of the relationships table.
+    """
+    ids_by_type = defaultdict(set)
+    for type_, id_ in stubs:
+      ids_by_type[type_].add(id_)
+    relationship = models.Relationship
+    queries = []
+    for type_, ids in ids_by_type.iteritems():
+      queries.append(relationship.query.filter(
+          relationship.source_type == type_,
+          relationship.source_id.in_(ids),
+      ))
+      queries.append(relationship.query.filter(
+          relationship.destination_type == type_,
+          relationship.destination_id.in_(ids),
+      ))
+    return queries[0].union(*queries[1:])
+
+  def _create_relationships_cache(self):
+    """Load relationships of all saved row objects in the block at once.
+
+    Returns:
+      dict of Relationship objects by ((type, id), (type, id)) pairs of the
+      related objects in both directions.
+    """
+    stubs = {(row.obj.type, row.obj.id) for row in self.row_converters
+             if row.obj is not None and row.obj.id is not None}
+    cache = {}
+    if not stubs:
+      return cache
+    with benchmark("Fetch relationships of imported objects"):
+      for rel in self._get_relationships_query(stubs):
+        self.add_to_relationships_cache(rel, cache)
+    return cache
+
+  def get_relationships_cache(self):
+    """Get relationships of saved row objects."""
+    if self._relationships_cache is None:
+      self._relationships_cache = self._create_relationships_cache()
+    return self._relationships_cache
+
+  @staticmethod
+  def add_to_relationships_cache(relationship, cache):
+    """Add relationship to the relationships cache in both directions."""
+    source = (relationship.source_type, relationship.source_id)
+    destination = (relationship.destination_type, relationship.destination_id)
+    cache.setdefault((source, destination), relationship)
+    cache.setdefault((destination, source), relationship)
+
+  def get_relationship(self, source, destination):
+    """Get the mapping of two saved objects in any direction.
+
+    Returns:
+      Relationship object, the (source, destination) stubs of a new mapping
+      that is not inserted yet, or None if the objects are not mapped.
+    """
+    return self.get_relationships_cache().get(
+        ((source.type, source.id), (destination.type, destination.id)))
+
+  def add_relationship(self, source, destination):
+    """Add a new mapping to be inserted with the other mappings of the block.
+    """
+    source = (source.type, source.id)
+    destination = (destination.type, destination.id)
+    cache = self.get_relationships_cache()
+    cache[(source, destination)] = cache[(destination, source)] = (
+        source, destination)
+    self.new_relationships[(source, destination)] = None
+
+  def remove_relationship(self, source, destination):
+    """Delete the mapping of two saved objects."""
+    source = (source.type, source.id)
+    destination = (destination.type, destination.id)
+    cache = self.get_relationships_cache()
+    mapping = cache.pop((source, destination), None)
+    cache.pop((destination, source), None)
+    if isinstance(mapping, models.Relationship):
+      db.session.delete(mapping)
+    elif mapping is not None:
+      self.new_relationships.pop(mapping, None)
+
   def get_role(self, name):
     """Get role from local cache for a given name."""
     if not self._roles_cache:
@@ -343,10 +544,38 @@ class BlockConverter(object):
     """ Generate 2D array populated with object values """
     return [r.to_array(self.fields) for r in self.row_converters]
 
-  def to_array(self):
-    csv_header = self.generate_csv_header()
-    csv_body = self.generate_csv_body()
-    return csv_header, csv_body
+  def generate_csv_body_chunks(self, chunk_size=None):
+    """ Generate csv body rows loading exported objects in chunks
+
+    Only the objects, row converters and caches of the current chunk are kept
+    in memory, so memory use does not grow with the number of exported
+    objects.
+    """
+    if self.ignore or not self.object_ids:
+      return
+    if chunk_size is None:
+      chunk_size = settings.QUERY_CHUNK_SIZE
+    all_ids = sorted(self.object_ids)
+    try:
+      for start in xrange(0, len(all_ids), chunk_size):
+        with benchmark("Export {} chunk: {}".format(self.name, start)):
+          # Block caches are built for the objects in self.object_ids
+          self.object_ids = all_ids[start:start + chunk_size]
+          self._mapping_cache = None
+          self._owners_cache = None
+          self._user_roles_cache = None
+          objects = self.object_class.eager_query().filter(
+              self.object_class.id.in_(self.object_ids)
+          ).order_by(self.object_class.id)
+          self.row_converters_from_objects(objects, start)
+          self.handle_row_data()
+          csv_body = self.generate_csv_body()
+          self.row_converters = []
+        self.converter.update_progress(written=len(csv_body))
+        for row in csv_body:
+          yield row
+    finally:
+      self.object_ids = all_ids
 
   def get_header_names(self):
     """ Get all posible user column names for current object """
@@ -406,14 +635,10 @@ class BlockConverter(object):
                          headers=self.headers, index=i)
       self.row_converters.append(row)
 
-  def row_converters_from_ids(self):
-    """ Generate a row converter object for every csv row """
-    if self.ignore or not self.object_ids:
-      return
+  def row_converters_from_objects(self, objects, start_index=0):
+    """ Generate a row converter object for every exported object """
     self.row_converters = []
-    objects = self.object_class.eager_query().filter(
-        self.object_class.id.in_(self.object_ids)).all()
-    for i, obj in enumerate(objects):
+    for i, obj in enumerate(objects, start_index):
       row = RowConverter(self, self.object_class, obj=obj,
                          headers=self.headers, index=i)
       self.row_converters.append(row)
@@ -476,63 +701,209 @@ class BlockConverter(object):
       row_converter.setup_secondary_objects(slugs_dict)
 
     if not self.converter.dry_run:
-      for row_converter in self.row_converters:
-        try:
-          row_converter.insert_secondary_objects()
-        except exc.SQLAlchemyError as err:
-          db.session.rollback()
-          logger.exception("Import failed with: %s", err.message)
-          row_converter.add_error(errors.UNKNOWN_ERROR)
-      self.save_import()
+      for row_converters in self._generate_row_chunks():
+        for row_converter in row_converters:
+          try:
+            row_converter.insert_secondary_objects()
+          except exc.SQLAlchemyError as err:
+            db.session.rollback()
+            logger.exception("Import failed with: %s", err.message)
+            row_converter.add_error(errors.UNKNOWN_ERROR)
+        self.insert_relationships()
+        self.save_import()
+
+  def insert_relationships(self):
+    """Insert new mappings of the block and create automappings for them.
+
+    Mappings of all rows are written with a single executemany INSERT and
+    loaded back to get revisions in the import event, the same way as the
+    automapper writes automappings. They are handled by a single automapper,
+    so the related objects it loads are shared between rows. This is safe
+    because automappings do not create any new mappings that would have to be
+    processed by the same automapper.
+    """
+    if not self.new_relationships:
+      return
+    pairs = self.new_relationships.keys()
+    self.new_relationships = OrderedDict()
+    user_id = get_current_user_id()
+    now = datetime.now().replace(microsecond=0)
+    message = "Insert {} mappings".format(len(pairs))
+    with benchmark(message):
+      # INSERT IGNORE skips mappings that were created by automappings of an
+      # earlier chunk, they are loaded below together with the inserted ones.
+      inserter = models.Relationship.__table__.insert().prefix_with("IGNORE")
+      try:
+        db.session.execute(inserter, [{
+            "modified_by_id": user_id,
+            "created_at": now,
+            "updated_at": now,
+            "source_type": source_type,
+            "source_id": source_id,
+            "destination_type": destination_type,
+            "destination_id": destination_id,
+            "context_id": None,
+        } for (source_type, source_id), (destination_type, destination_id)
+            in pairs])
+      except exc.SQLAlchemyError as err:
+        db.session.rollback()
+        logger.exception("Import failed with: %s", err.message)
+        self.add_errors(errors.UNKNOWN_ERROR, line=self.offset + 2)
+        return
+      relationships = self._load_relationships(pairs)
+
+    cache = self.get_relationships_cache()
+    for relationship in relationships:
+      source = (relationship.source_type, relationship.source_id)
+      destination = (relationship.destination_type,
+                     relationship.destination_id)
+      cache[(source, destination)] = cache[(destination, source)] = (
+          relationship)
+    revisions_cache = get_cache(create=True)
+    if revisions_cache:
+      revisions_cache.new.update(
+          (relationship, relationship.log_json())
+          for relationship in relationships
+      )
 
-  def _import_objects_prepare(self):
-    """Setup all objects and do pre-commit checks for them."""
-    for row_converter in self.row_converters:
+    message = "Generate automappings for {} mappings".format(
+        len(relationships))
+    with benchmark(message):
+      automapper = AutomapperGenerator(use_benchmark=False)
+      for relationship in relationships:
+        automapper.generate_automappings(relationship)
+
+  def _load_relationships(self, pairs):
+    """Load relationships of the given (source, destination) stub pairs."""
+    pairs = set(pairs)
+    sources = {source for source, _ in pairs}
+    return [
+        relationship
+        for relationship in self._get_relationships_query(sources)
+        if ((relationship.source_type, relationship.source_id),
+            (relationship.destination_type, relationship.destination_id))
+        in pairs
+    ]
+
+  def _import_objects_prepare(self, row_converters=None):
+    """Setup objects and do pre-commit checks for them.
+
+    Args:
+      row_converters: rows to prepare, all rows of the block by default.
+    """
+    if row_converters is None:
+      row_converters = self.row_converters
+
+    for row_converter in row_converters:
       row_converter.setup_object()
 
-    for row_converter in self.row_converters:
+    for row_converter in row_converters:
       self._check_object(row_converter)
 
-    self.clean_session_from_ignored_objs()
+    self.clean_session_from_ignored_objs(row_converters)
+    self.converter.update_progress(validated=len(row_converters))
+
+  def _generate_row_chunks(self):
+    """Split row converters into chunks of IMPORT_CHUNK_SIZE rows."""
+    chunk_size = settings.IMPORT_CHUNK_SIZE
+    for start in xrange(0, len(self.row_converters), chunk_size):
+      yield self.row_converters[start:start + chunk_size]
 
   def import_objects(self):
     """Add all objects to the database.
 
-    This function flushes all objects to the database if the dry_run flag is
-    not set and all signals for the imported objects get sent.
+    This function saves objects to the database in chunks of rows if the
+    dry_run flag is not set, and sends all signals for the imported objects.
+    Every chunk is set up, checked and committed on its own, so the session
+    never holds pending changes of more than one chunk. If a chunk can not be
+    committed, its rows and the rows of all later chunks get an error, so that
+    only rows of committed chunks are counted as imported.
     """
     if self.ignore:
       return
 
-    self._import_objects_prepare()
+    if self.converter.dry_run:
+      self._import_objects_prepare()
+      return
 
-    if not self.converter.dry_run:
-      new_objects = []
-      for row_converter in self.row_converters:
-        row_converter.send_pre_commit_signals()
-      for row_converter in self.row_converters:
-        try:
-          row_converter.insert_object()
-          db.session.flush()
-        except exc.SQLAlchemyError as err:
-          db.session.rollback()
-          logger.exception("Import failed with: %s", err.message)
+    start = time.time()
+    written = 0
+    chunks = self._generate_row_chunks()
+    for row_converters in chunks:
+      written += self._import_chunk(row_converters)
+      if self.ignore:
+        break
+    for row_converters in chunks:
+      for row_converter in row_converters:
+        if not row_converter.ignore:
+          row_converter.add_error(errors.IMPORT_STOPPED_ERROR)
+    elapsed = time.time() - start
+    logger.info("Imported %s %s rows in %.1f s, %.1f rows/s",
+                written, self.name, elapsed, written / max(elapsed, 1e-6))
+
+  def _import_chunk(self, row_converters):
+    """Prepare, save and commit objects of a chunk of rows.
+
+    Returns:
+      Number of rows that were written to the database.
+    """
+    self._import_objects_prepare(row_converters)
+    for row_converter in row_converters:
+      row_converter.send_pre_commit_signals()
+    if not self._insert_objects(row_converters):
+      return 0
+    new_objects = [row_converter.obj for row_converter in row_converters
+                   if row_converter.is_new and not row_converter.ignore]
+    self.send_collection_post_signals(new_objects)
+    import_event = self.save_import()
+    if self.ignore:
+      for row_converter in row_converters:
+        if not row_converter.ignore:
           row_converter.add_error(errors.UNKNOWN_ERROR)
-        else:
-          if row_converter.is_new and not row_converter.ignore:
-            new_objects.append(row_converter.obj)
-      self.send_collection_post_signals(new_objects)
-      import_event = self.save_import()
-      for row_converter in self.row_converters:
-        row_converter.send_post_commit_signals(event=import_event)
-
-  def clean_session_from_ignored_objs(self):
+      return 0
+    for row_converter in row_converters:
+      row_converter.send_post_commit_signals(event=import_event)
+    written = sum(1 for row_converter in row_converters
+                  if not row_converter.ignore)
+    self.converter.update_progress(written=written)
+    return written
+
+  def _insert_objects(self, row_converters):
+    """Add objects of the given rows to the session and flush them at once.
+
+    A failed flush rolls back the whole chunk, so all of its rows get an
+    error in that case.
+
+    Returns:
+      True if the objects were flushed.
+    """
+    message = "Insert {} objects: {}".format(self.name, len(row_converters))
+    with benchmark(message):
+      try:
+        for row_converter in row_converters:
+          row_converter.insert_object()
+        db.session.flush()
+      except exc.SQLAlchemyError as err:
+        db.session.rollback()
+        logger.exception("Import failed with: %s", err.message)
+        for row_converter in row_converters:
+          if not row_converter.ignore:
+            row_converter.add_error(errors.UNKNOWN_ERROR)
+        return False
+    return True
+
+  def clean_session_from_ignored_objs(self, row_converters=None):
     """Clean DB session from ignored objects.
 
     This function expunges objects from 'db.session' which are in rows that
     marked as 'ignored' before commit.
+
+    Args:
+      row_converters: rows to check, all rows of the block by default.
     """
-    for row_converter in self.row_converters:
+    if row_converters is None:
+      row_converters = self.row_converters
+    for row_converter in row_converters:
       obj = row_converter.obj
       try:
         if row_converter.ignore and obj in db.session:
@@ -562,6 +933,7 @@ class BlockConverter(object):
       import_event = log_event(db.session, None)
       update_memcache_before_commit(
           self, modified_objects, CACHE_EXPIRY_IMPORT)
+      queue_index_update(db.session, modified_objects)
       db.session.commit()
       update_memcache_after_commit(self)
       update_index(db.session, modified_objects)
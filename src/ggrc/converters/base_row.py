@@ -113,7 +113,9 @@ class RowConverter(object):
                      column_names=", ".join(missing))
 
   def find_by_key(self, key, value):
-    return self.object_class.query.filter_by(**{key: value}).first()
+    if not value:
+      return self.object_class.query.filter_by(**{key: value}).first()
+    return self.block_converter.find_object(self.object_class, value)
 
   def get_value(self, key):
     item = self.attrs.get(key) or self.objects.get(key)
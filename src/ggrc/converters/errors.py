@@ -81,6 +81,9 @@ DELETE_CASCADE_ERROR = (u"Line {line}: Cannot delete object {object_type}:"
 
 UNKNOWN_ERROR = u"Line {line}: Import failed due to unknown error."
 
+IMPORT_STOPPED_ERROR = (u"Line {line}: Import of the block was stopped by an"
+                        u" earlier error. The line will be ignored.")
+
 INVALID_START_END_DATES = (u"Line {line}: {start_date} can not be after "
                            u"{end_date}. The line will be ignored.")
 
@@ -180,7 +180,8 @@ class CustomAttributeColumHandler(handlers.TextColumnHandler):
     if self.mandatory and not self.raw_value:
       self.add_error(errors.MISSING_VALUE_ERROR, column_name=self.display_name)
       return
-    value = models.Person.query.filter_by(email=self.raw_value).first()
+    value = self.row_converter.block_converter.find_object(models.Person,
+                                                           self.raw_value)
     if self.mandatory and not value:
       self.add_error(errors.WRONG_VALUE, column_name=self.display_name)
     return value
@@ -11,7 +11,6 @@ from sqlalchemy import and_
 from sqlalchemy import or_
 
 from ggrc import db
-from ggrc.automapper import AutomapperGenerator
 from ggrc.converters import errors
 from ggrc.converters import get_exportables
 from ggrc.login import get_current_user
@@ -25,7 +24,6 @@ from ggrc.models import Person
 from ggrc.models import Policy
 from ggrc.models import Program
 from ggrc.models import Regulation
-from ggrc.models import Relationship
 from ggrc.models import Standard
 from ggrc.models import all_models
 from ggrc.models.reflection import AttributeInfo
@@ -221,7 +219,8 @@ class UserColumnHandler(ColumnHandler):
   def get_person(self, email):
     new_objects = self.row_converter.block_converter.converter.new_objects
     if email not in new_objects[Person]:
-      new_objects[Person][email] = Person.query.filter_by(email=email).first()
+      block_converter = self.row_converter.block_converter
+      new_objects[Person][email] = block_converter.find_object(Person, email)
     return new_objects[Person].get(email)
 
   def parse_item(self):
@@ -425,8 +424,9 @@ class MappingColumnHandler(ColumnHandler):
     lines = set(self.raw_value.splitlines())
     slugs = set([slug.lower() for slug in lines if slug.strip()])
     objects = []
+    block_converter = self.row_converter.block_converter
     for slug in slugs:
-      obj = class_.query.filter_by(slug=slug).first()
+      obj = block_converter.find_object(class_, slug)
       if obj:
         if permissions.is_allowed_update_for(obj):
           objects.append(obj)
@@ -456,24 +456,14 @@ class MappingColumnHandler(ColumnHandler):
     if self.dry_run or not self.value:
       return
     current_obj = self.row_converter.obj
-    relationships = []
-    mapping = None
+    block_converter = self.row_converter.block_converter
     for obj in self.value:
-      if current_obj.id:
-        mapping = Relationship.find_related(current_obj, obj)
+      mapping = block_converter.get_relationship(current_obj, obj)
       if not self.unmap and not mapping:
-        mapping = Relationship(source=current_obj, destination=obj)
-        relationships.append(mapping)
-        db.session.add(mapping)
+        block_converter.add_relationship(current_obj, obj)
       elif self.unmap and mapping:
-        db.session.delete(mapping)
-    db.session.flush()
-    # it is safe to reuse this automapper since no other objects will be
-    # created while creating automappings and cache reuse yields significant
-    # performance boost
-    automapper = AutomapperGenerator(use_benchmark=False)
-    for relation in relationships:
-      automapper.generate_automappings(relation)
+        block_converter.remove_relationship(current_obj, obj)
+    # new mappings are inserted and automapped by the block converter
     self.dry_run = True
 
   def get_value(self):
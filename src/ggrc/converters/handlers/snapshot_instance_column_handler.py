@@ -6,9 +6,7 @@ from sqlalchemy.orm import load_only
 
 from cached_property import cached_property
 
-from ggrc import db
 from ggrc import models
-from ggrc.automapper import AutomapperGenerator
 from ggrc.converters import errors
 from ggrc.converters.handlers.handlers import MappingColumnHandler
 
@@ -91,26 +89,18 @@ class SnapshotInstanceColumnHandler(MappingColumnHandler):
     if self.dry_run or not self.value:
       return
     row_obj = self.row_converter.obj
-    relationships = []
+    block_converter = self.row_converter.block_converter
     child_id_snapshot_dict = {
         i.child_id: i for i in self.audit_object_pool_query.all()
     }
     for obj in self.value:
       snapshot = child_id_snapshot_dict.get(obj.id)
-      mapping = models.Relationship.find_related(row_obj, snapshot)
+      mapping = block_converter.get_relationship(row_obj, snapshot)
       if not self.unmap and not mapping:
-        mapping = models.Relationship(source=row_obj, destination=snapshot)
-        relationships.append(mapping)
-        db.session.add(mapping)
+        block_converter.add_relationship(row_obj, snapshot)
       elif self.unmap and mapping:
-        db.session.delete(mapping)
-    db.session.flush(relationships)
-    # it is safe to reuse this automapper since no other objects will be
-    # created while creating automappings and cache reuse yields significant
-    # performance boost
-    automapper = AutomapperGenerator(use_benchmark=False)
-    for relation in relationships:
-      automapper.generate_automappings(relation)
+        block_converter.remove_relationship(row_obj, snapshot)
+    # new mappings are inserted and automapped by the block converter
     self.dry_run = True
 
   def get_value(self):
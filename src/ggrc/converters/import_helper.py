@@ -52,20 +52,25 @@ def get_column_order(columns):
   return AttributeInfo.get_column_order(columns)
 
 
-def generate_csv_string(csv_data):
-  """ Turn 2d string array into a string representing a csv file """
+def generate_csv_stream(rows, width, buffer_size=64 * 1024):
+  """ Generate csv file content from a stream of rows
+
+  Rows are padded to the given width and written to a small buffer that is
+  flushed every time it grows over buffer_size bytes.
+  """
   output_buffer = StringIO()
   writer = csv.writer(output_buffer)
-
-  csv_data = equalize_array(csv_data)
-  csv_data = utf_8_encode_array(csv_data)
-
-  for row in csv_data:
-    writer.writerow(row)
-
+  for row in rows:
+    row = row + [""] * (width - len(row))
+    writer.writerow([val.encode("utf-8") for val in row])
+    if output_buffer.tell() >= buffer_size:
+      yield output_buffer.getvalue()
+      output_buffer.seek(0)
+      output_buffer.truncate()
   body = output_buffer.getvalue()
   output_buffer.close()
-  return body
+  if body:
+    yield body
 
 
 def extract_relevant_data(csv_data):
@@ -80,17 +85,6 @@ def extract_relevant_data(csv_data):
   return column_definitions, data
 
 
-def equalize_array(array):
-  """ Expand all rows of 2D array to the same length """
-  if len(array) == 0:
-    return array
-  max_length = max([len(i) for i in array])
-  for row in array:
-    diff = max_length - len(row)
-    row.extend([""] * diff)
-  return array
-
-
 def split_array(csv_data):
   """ Split array by empty lines """
   data_blocks = []
@@ -128,11 +122,6 @@ def read_csv_file(csv_file):
   return [row for row in csv_reader(csv_file)]
 
 
-def utf_8_encode_array(array):
-  """ encode 2D array to utf8 """
-  return [[val.encode("utf-8") for val in line] for line in array]
-
-
 def utf_8_encoder(csv_data):
   """This function is a generator that attempts to encode the string as utf-8.
   It is assumed that the data is likely to be encoded in ascii. If encoding
@@ -6,16 +6,22 @@
 # flake8: noqa
 import collections
 import datetime
+import functools
+import json
+import time
 
 import flask
 import sqlalchemy as sa
 
 from ggrc import db
 from ggrc import models
+from ggrc import settings
 from ggrc.fulltext.mysql import MysqlRecordProperty as Record
 from ggrc.models import inflector
 from ggrc.rbac import context_query_filter
 from ggrc.utils import query_helpers, benchmark
+from ggrc.utils import parallel
+from ggrc.utils import temporary_tables
 from ggrc.converters import custom_operators
 from ggrc.converters.exceptions import BadQueryException
 
@@ -80,7 +86,8 @@ class QueryHelper(object):
 
   def __init__(self, query):
     self.query = self._clean_query(query)
-    self._count = 0
+    self._ids = {}
+    self._debug = {}
 
   def _get_snapshot_child_type(self, object_query):
     """Return child_type for snapshot from a query"""
@@ -201,11 +208,92 @@ class QueryHelper(object):
     Returns:
       list of dicts: same query as the input with all ids that match the filter
     """
-    for object_query in self.query:
-      ids = self._get_ids(object_query)
-      object_query["ids"] = ids
+    self._evaluate_ids()
+    for index, object_query in enumerate(self.query):
+      object_query["ids"] = self._ids[index]
     return self.query
 
+  def _get_dependencies(self, index, expression):
+    """Get indexes of object queries referenced with __previous__."""
+    if not isinstance(expression, dict):
+      return set()
+    dependencies = set()
+    if expression.get("object_name") == "__previous__":
+      previous = (expression.get("ids") or [None])[0]
+      if not isinstance(previous, int) or not 0 <= previous < index:
+        raise BadQueryException(u"Invalid __previous__ reference")
+      dependencies.add(previous)
+    dependencies.update(self._get_dependencies(index, expression.get("left")))
+    dependencies.update(self._get_dependencies(index, expression.get("right")))
+    return dependencies
+
+  @staticmethod
+  def _get_query_key(object_query):
+    """Get a key that is equal for object queries with the same ids."""
+    return json.dumps({
+        "object_name": object_query["object_name"],
+        "filters": object_query.get("filters"),
+        "permissions": object_query.get("permissions", "read"),
+        "order_by": object_query.get("order_by"),
+        "limit": object_query.get("limit"),
+    }, sort_keys=True, default=unicode)
+
+  def _get_previous(self):
+    """Get object queries with evaluated ids for __previous__ references."""
+    return [dict(object_query, ids=self._ids[index])
+            if index in self._ids else object_query
+            for index, object_query in enumerate(self.query)]
+
+  def _get_timed_ids(self, index):
+    """Get ids of an object query and the time it took."""
+    start = time.time()
+    ids = self._get_ids(self.query[index])
+    return ids, time.time() - start
+
+  def _evaluate_ids(self):
+    """Evaluate ids of all object queries.
+
+    Object queries form a DAG by their __previous__ references. Identical
+    object queries are evaluated only once. The rest are evaluated in waves of
+    queries whose references are already evaluated, and queries of a wave run
+    concurrently in at most QUERY_API_WORKERS threads if the connection pool
+    has enough free connections.
+    """
+    dependencies = {}
+    sources = {}
+    keys = {}
+    pending = []
+    for index, object_query in enumerate(self.query):
+      dependencies[index] = self._get_dependencies(
+          index, object_query.get("filters", {}).get("expression"))
+      key = self._get_query_key(object_query)
+      if key in keys:
+        sources[index] = keys[key]
+      else:
+        keys[key] = index
+        pending.append(index)
+
+    wave = 0
+    while pending:
+      ready = [index for index in pending
+               if dependencies[index].issubset(self._ids)]
+      with benchmark("Get ids: _evaluate_ids > wave of {} queries".format(
+          len(ready))):
+        results = parallel.run_in_threads(
+            [functools.partial(self._get_timed_ids, index) for index in ready],
+            settings.QUERY_API_WORKERS,
+        )
+      for index, (ids, duration) in zip(ready, results):
+        self._ids[index] = ids
+        self._debug[index] = {"wave": wave, "time": duration}
+      for index, source in sources.iteritems():
+        if source in ready:
+          self._ids[index] = self._ids[source]
+          self.query[index]["total"] = self.query[source].get("total")
+          self._debug[index] = {"wave": wave, "same_as": source}
+      pending = [index for index in pending if index not in self._ids]
+      wave += 1
+
   @staticmethod
   def _get_type_query(model, permission_type):
     """Filter by contexts and resources
@@ -219,7 +307,7 @@ class QueryHelper(object):
 
     if contexts is not None:
       if resources:
-        resource_sql = model.id.in_(resources)
+        resource_sql = temporary_tables.in_ids(model.id, resources)
       else:
         resource_sql = sa.sql.false()
 
@@ -227,11 +315,9 @@ class QueryHelper(object):
           context_query_filter(model.context_id, contexts),
           resource_sql)
 
-  def _get_objects(self, object_query):
-    """Get a set of objects described in the filters."""
-
-    with benchmark("Get ids: _get_objects -> _get_ids"):
-      ids = self._get_ids(object_query)
+  @staticmethod
+  def _get_objects(object_query, ids):
+    """Get objects with the given ids in the same order."""
     if not ids:
       return set()
 
@@ -274,7 +360,7 @@ class QueryHelper(object):
           expression,
           object_class,
           tgt_class,
-          self.query
+          self._get_previous()
       )
       if filter_expression is not None:
         query = query.filter(filter_expression)
@@ -368,10 +454,12 @@ class QueryHelper(object):
     Returns:
       the query with sorting parameters.
     """
-    def joins_and_order(clause):
+    def joins_and_order(index, clause):
       """Get join operations and ordering field from item of order_by list.
 
       Args:
+        index: the position of the clause in order_by, it names the joined
+               fulltext alias so that aliases are unique within the query;
         clause: {"name": the name of model's field,
                  "desc": reverse sort on this field if True}
 
@@ -391,7 +479,7 @@ class QueryHelper(object):
 
       def by_fulltext():
         """Join fulltext index table, order by indexed CA value."""
-        alias = sa.orm.aliased(Record, name=u"fulltext_{}".format(self._count))
+        alias = sa.orm.aliased(Record, name=u"fulltext_{}".format(index))
         joins = [(alias, sa.and_(
             alias.key == model.id,
             alias.type == model.__name__,
@@ -436,7 +524,6 @@ class QueryHelper(object):
             joins, order = None, attr
         else:
           # Snapshot or non object attributes are treated as custom attributes
-          self._count += 1
           joins, order = by_fulltext()
 
       if clause.get("desc", False):
@@ -444,7 +531,8 @@ class QueryHelper(object):
 
       return joins, order
 
-    join_lists, orders = zip(*[joins_and_order(clause) for clause in order_by])
+    join_lists, orders = zip(*[joins_and_order(index, clause)
+                               for index, clause in enumerate(order_by)])
     for join_list in join_lists:
       if join_list is not None:
         for join in join_list:
@@ -55,10 +55,6 @@ class SnapshotBlockConverter(object):
     self.ids = ids
     self.fields = fields or []
 
-  @staticmethod
-  def handle_row_data():
-    pass
-
   @property
   def name(self):
     return "{} Snapshot".format(self.child_type)
@@ -304,6 +300,14 @@ class SnapshotBlockConverter(object):
         for snapshot in self.snapshots
     ] or [[]]
 
-  def to_array(self):
-    """Get 2D list representing the CSV file."""
-    return self._header_list, self._body_list
+  def generate_csv_header(self):
+    """Get 2D list representing the CSV header."""
+    return self._header_list
+
+  def generate_csv_body_chunks(self):
+    """Generate CSV body rows.
+
+    Snapshot content values depend on custom attribute definitions and stubs
+    of all snapshots in the block, so the whole block body is built at once.
+    """
+    return iter(self._body_list)
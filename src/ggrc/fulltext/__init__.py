@@ -28,7 +28,22 @@ class Indexer(object):
     return builder
 
   def fts_record_for(self, obj):
-    return self.get_builder(obj.__class__).as_record(obj)
+    """Build the record of a single object.
+
+    The batch builder is used, so custom attribute values and access control
+    list entries are loaded with one query each instead of per relationship.
+    """
+    return self.get_builder(obj.__class__).as_records([obj])[0]
+
+  def fts_records_for(self, objs):
+    """Build records for a list of objects with one batch per class."""
+    objs_by_class = defaultdict(list)
+    for obj in objs:
+      objs_by_class[obj.__class__].append(obj)
+    records = []
+    for obj_class, class_objs in objs_by_class.iteritems():
+      records.extend(self.get_builder(obj_class).as_records(class_objs))
+    return records
 
   def invalidate_cache(self):
     self.cache = defaultdict(dict)
@@ -50,7 +65,12 @@ def resolve_default_text_indexer():
   """Get indexer for settings fulltest db"""
   from ggrc import settings
   db_scheme = settings.SQLALCHEMY_DATABASE_URI.split(':')[0].split('+')[0]
-  return 'ggrc.fulltext.{db_scheme}.Indexer'.format(db_scheme=db_scheme)
+  if settings.FULLTEXT_NATIVE_SEARCH:
+    indexer_name = 'FulltextIndexer'
+  else:
+    indexer_name = 'Indexer'
+  return 'ggrc.fulltext.{db_scheme}.{indexer_name}'.format(
+      db_scheme=db_scheme, indexer_name=indexer_name)
 
 
 def get_indexer():
@@ -92,19 +92,24 @@ class CustomRoleAttr(FullTextAttr):
     super(CustomRoleAttr, self).__init__(alias, alias)
     self.with_template = False
 
-  def get_property_for(self, instance):
-    """Returns index properties of all custom roles for a given instance"""
+  @staticmethod
+  def get_property_from_entries(entries):
+    """Returns index properties of custom roles from preloaded entries
+
+    Args:
+      entries: iterable of (role name, person id, person name, person email)
+          tuples.
+    """
     results = {}
     sorted_roles = defaultdict(list)
-    for acl in getattr(instance, self.alias, []):
-      ac_role = acl.ac_role.name
-      person_id = acl.person.id
-      if not results.get(acl.ac_role.name, None):
-        results[acl.ac_role.name] = {}
-      sorted_roles[ac_role].append(acl.person.user_name)
-      results[ac_role]["{}-email".format(person_id)] = acl.person.email
-      results[ac_role]["{}-name".format(person_id)] = acl.person.name
-      results[ac_role]["{}-user_name".format(person_id)] = acl.person.user_name
+    for ac_role, person_id, person_name, person_email in entries:
+      user_name = person_email.split("@")[0]
+      if not results.get(ac_role, None):
+        results[ac_role] = {}
+      sorted_roles[ac_role].append(user_name)
+      results[ac_role]["{}-email".format(person_id)] = person_email
+      results[ac_role]["{}-name".format(person_id)] = person_name
+      results[ac_role]["{}-user_name".format(person_id)] = user_name
     for role in sorted_roles:
       results[role]["__sort__"] = u':'.join(sorted(sorted_roles[role]))
     return results
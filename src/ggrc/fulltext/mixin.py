@@ -5,16 +5,28 @@
 import itertools
 from collections import namedtuple
 
-from sqlalchemy import inspect, orm
+from sqlalchemy import and_, bindparam, inspect, orm
+from sqlalchemy.sql.expression import tuple_
 
 from ggrc import db
 
 from ggrc import fulltext
+from ggrc.utils import benchmark
 
 
 ReindexRule = namedtuple("ReindexRule", ["model", "rule"])
 
 
+def _record_row_key(row):
+  """Get the primary key of a full text record row."""
+  return (row["key"], row["type"], row["property"], row["subproperty"])
+
+
+def _record_row_values(row):
+  """Get the values of a full text record row that are not in its key."""
+  return (row["context_id"], row["tags"], row["content"])
+
+
 # pylint: disable=too-few-public-methods
 class Indexed(object):
   """Mixin for Index And auto reindex current model instance"""
@@ -47,39 +59,98 @@ class Indexed(object):
     return (self.__class__.__name__, self.id)
 
   @classmethod
-  def get_insert_query_for(cls, ids):
-    """Return insert class record query. It will return None, if it's empty."""
-    if not ids:
-      return
+  def get_record_rows_for(cls, ids):
+    """Return index record rows for objects with given ids.
+
+    Returns:
+      dict of record values by (key, type, property, subproperty) tuples.
+    """
     instances = cls.indexed_query().filter(cls.id.in_(ids))
     indexer = fulltext.get_indexer()
     keys = inspect(indexer.record_type).c
-    records = (indexer.fts_record_for(i) for i in instances)
+    records = indexer.fts_records_for(instances)
     rows = itertools.chain(*[indexer.records_generator(i) for i in records])
-    values = [{c.name: getattr(r, a) for a, c in keys.items()} for r in rows]
-    if values:
-      return indexer.record_type.__table__.insert().values(values)
+    values = ({c.name: getattr(r, a) for a, c in keys.items()} for r in rows)
+    return {_record_row_key(row): row for row in values}
 
   @classmethod
-  def get_delete_query_for(cls, ids):
-    """Return delete class record query. If ids are empty, will return None."""
-    if not ids:
-      return
-    indexer = fulltext.get_indexer()
-    return indexer.record_type.__table__.delete().where(
-        indexer.record_type.type == cls.__name__
-    ).where(
-        indexer.record_type.key.in_(ids)
+  def get_stored_record_rows_for(cls, ids):
+    """Return index record rows stored for objects with given ids.
+
+    Returns:
+      dict of (context_id, tags, content) by (key, type, property,
+      subproperty) tuples.
+    """
+    record_type = fulltext.get_indexer().record_type
+    query = db.session.query(
+        record_type.key,
+        record_type.type,
+        record_type.property,
+        record_type.subproperty,
+        record_type.context_id,
+        record_type.tags,
+        record_type.content,
+    ).filter(
+        record_type.type == cls.__name__,
+        record_type.key.in_(ids),
     )
+    return {tuple(row[:4]): tuple(row[4:]) for row in query}
 
   @classmethod
   def bulk_record_update_for(cls, ids):
-    """Bulky update index records for current class"""
-    delete_query = cls.get_delete_query_for(ids)
-    insert_query = cls.get_insert_query_for(ids)
-    for query in [delete_query, insert_query]:
-      if query is not None:
-        db.session.execute(query)
+    """Bulky update index records for current class
+
+    New records are compared with the stored ones and only the rows that were
+    added, changed or removed are written.
+    """
+    if not ids:
+      return
+    with benchmark("Build fulltext records for {}".format(cls.__name__)):
+      new_rows = cls.get_record_rows_for(ids)
+      stored_rows = cls.get_stored_record_rows_for(ids)
+    to_delete = [row_key for row_key in stored_rows
+                 if row_key not in new_rows]
+    to_insert = []
+    to_update = []
+    for row_key, row in new_rows.iteritems():
+      if row_key not in stored_rows:
+        to_insert.append(row)
+      elif stored_rows[row_key] != _record_row_values(row):
+        to_update.append(row)
+    unchanged = len(new_rows) - len(to_insert) - len(to_update)
+    with benchmark("Write fulltext records for {}: {} inserted, {} updated, "
+                   "{} deleted, {} unchanged".format(
+                       cls.__name__, len(to_insert), len(to_update),
+                       len(to_delete), unchanged)):
+      table = fulltext.get_indexer().record_type.__table__
+      if to_delete:
+        # MySQL does not use indexes for a row constructor IN, so the rows are
+        # narrowed down by the primary key prefix first
+        db.session.execute(table.delete().where(and_(
+            table.c.type == cls.__name__,
+            table.c.key.in_({row_key[0] for row_key in to_delete}),
+            tuple_(
+                table.c.key, table.c.type, table.c.property,
+                table.c.subproperty
+            ).in_(to_delete),
+        )))
+      if to_update:
+        db.session.execute(
+            table.update().where(and_(
+                table.c.key == bindparam("b_key"),
+                table.c.type == bindparam("b_type"),
+                table.c.property == bindparam("b_property"),
+                table.c.subproperty == bindparam("b_subproperty"),
+            )).values(
+                context_id=bindparam("b_context_id"),
+                tags=bindparam("b_tags"),
+                content=bindparam("b_content"),
+            ),
+            [{"b_" + name: value for name, value in row.iteritems()}
+             for row in to_update],
+        )
+      if to_insert:
+        db.session.execute(table.insert(), to_insert)
 
   @classmethod
   def indexed_query(cls):
@@ -1,6 +1,7 @@
 # Copyright (C) 2017 Google Inc.
 # Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
 """Full text index engine for Mysql DB backend"""
+import re
 from collections import defaultdict
 
 from sqlalchemy import and_
@@ -17,11 +18,14 @@ from sqlalchemy.sql.expression import select
 from sqlalchemy import event
 
 from ggrc import db
+from ggrc import settings
 from ggrc.login import is_creator
 from ggrc.models import all_models
 from ggrc.models.inflector import get_model
 from ggrc.utils import query_helpers
+from ggrc.utils import temporary_tables
 from ggrc.rbac import context_query_filter
+from ggrc.fulltext import outbox
 from ggrc.fulltext.sql import SqlIndexer
 
 
@@ -51,7 +55,12 @@ class MysqlIndexer(SqlIndexer):
   record_type = MysqlRecordProperty
 
   @staticmethod
-  def _get_filter_query(terms):
+  def _get_terms_query(terms):
+    """Get the filter matching records that contain the search terms."""
+    return MysqlRecordProperty.content.contains(terms)
+
+  @classmethod
+  def _get_filter_query(cls, terms):
     """Get the whitelist of fields to filter in full text table."""
     whitelist = MysqlRecordProperty.property.in_(
         ['title', 'name', 'email', 'notes', 'description', 'slug'])
@@ -59,7 +68,7 @@ class MysqlIndexer(SqlIndexer):
     if not terms:
       return whitelist
     elif terms:
-      return and_(whitelist, MysqlRecordProperty.content.contains(terms))
+      return and_(whitelist, cls._get_terms_query(terms))
 
   @staticmethod
   def get_permissions_query(model_names, permission_type='read',
@@ -78,7 +87,7 @@ class MysqlIndexer(SqlIndexer):
         if resources:
           resource_sql = and_(
               MysqlRecordProperty.type == model_name,
-              MysqlRecordProperty.key.in_(resources))
+              temporary_tables.in_ids(MysqlRecordProperty.key, resources))
         else:
           resource_sql = false()
 
@@ -225,7 +234,62 @@ class MysqlIndexer(SqlIndexer):
     return query.all()
 
 
+class MysqlFulltextIndexer(MysqlIndexer):
+  """Full text index engine using the native InnoDB FULLTEXT index.
+
+  Search terms are matched with MATCH ... AGAINST in boolean mode, with every
+  word of the terms being a required prefix. This lets MySQL use the FULLTEXT
+  index on the content column instead of scanning the whole table with LIKE.
+  """
+
+  # The InnoDB parser splits text into words of letters, digits and "_"
+  WORD_DELIMITERS = re.compile(r'\W+', re.UNICODE)
+
+  @classmethod
+  def _get_words(cls, terms):
+    """Split terms into words like the InnoDB FULLTEXT parser.
+
+    Returns:
+      list of words and list of whitespace separated terms that the parser
+      splits into more words, like e-mail addresses.
+    """
+    words = []
+    split_terms = []
+    for term in terms.split():
+      term_words = [word for word in cls.WORD_DELIMITERS.split(term) if word]
+      words.extend(term_words)
+      if len(term_words) > 1:
+        split_terms.append(term)
+    return words, split_terms
+
+  @classmethod
+  def _get_terms_query(cls, terms):
+    """Get the filter matching records that contain the search terms.
+
+    Words that can not be found in the index because they are too short or
+    stopwords are checked with a LIKE filter on the rows found through the
+    index. If no word is indexed the LIKE filter is used alone. Terms that
+    the parser splits into more words are checked with LIKE too, so that the
+    words must be found together with their delimiters.
+    """
+    words, split_terms = cls._get_words(terms)
+    indexed_words = [word for word in words
+                     if len(word) >= settings.FULLTEXT_MIN_TOKEN_SIZE and
+                     word.lower() not in settings.FULLTEXT_STOPWORDS]
+    like_query = super(MysqlFulltextIndexer, cls)._get_terms_query
+    if not indexed_words:
+      return like_query(terms)
+    match_query = MysqlRecordProperty.content.match(
+        u" ".join(u"+{}*".format(word) for word in indexed_words))
+    if len(indexed_words) < len(words):
+      return and_(match_query, like_query(terms))
+    if split_terms:
+      return and_(match_query, *[like_query(term) for term in split_terms])
+    return match_query
+
+
 Indexer = MysqlIndexer
+FulltextIndexer = MysqlFulltextIndexer
 
 
 @event.listens_for(db.session.__class__, 'before_commit')
@@ -242,5 +306,12 @@ def update_indexer(session):  # pylint:disable=unused-argument
     if type_name:
       models_ids_to_reindex[type_name].add(id_value)
   db.session.reindex_set = set()
+  if outbox.is_enabled():
+    outbox.enqueue(db.session, (
+        (model_name, id_value, outbox.UPDATE)
+        for model_name, ids in models_ids_to_reindex.iteritems()
+        for id_value in ids
+    ))
+    return
   for model_name, ids in models_ids_to_reindex.iteritems():
     get_model(model_name).bulk_record_update_for(ids)
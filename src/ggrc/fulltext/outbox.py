@@ -0,0 +1,188 @@
+# Copyright (C) 2017 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""Outbox for asynchronous full text index updates.
+
+When the FULLTEXT_INDEX_OUTBOX setting is enabled, the write path does not
+update fulltext_record_properties itself. It only records which objects were
+changed in the fulltext_index_outbox table, inside the same transaction as the
+change. The outbox is then drained in batches by a worker that updates the
+index records of every changed object once, no matter how many times it was
+changed since the last run.
+"""
+
+import datetime
+import itertools
+from collections import OrderedDict
+from collections import defaultdict
+from logging import getLogger
+
+from sqlalchemy import func
+
+from ggrc import db
+from ggrc import settings
+from ggrc.fulltext import get_indexer
+from ggrc.utils import benchmark
+
+
+logger = getLogger(__name__)  # pylint: disable=invalid-name
+
+UPDATE = "update"
+DELETE = "delete"
+
+
+class IndexOutboxEntry(db.Model):
+  """Object whose full text index records must be updated."""
+  # pylint: disable=too-few-public-methods
+  __tablename__ = "fulltext_index_outbox"
+
+  id = db.Column(db.Integer, primary_key=True)
+  type = db.Column(db.String(64), nullable=False)
+  key = db.Column(db.Integer, nullable=False)
+  operation = db.Column(db.Enum(UPDATE, DELETE), nullable=False)
+  created_at = db.Column(db.DateTime, nullable=False)
+
+
+def is_enabled():
+  """Check if index updates should go through the outbox."""
+  return bool(getattr(settings, "FULLTEXT_INDEX_OUTBOX", False))
+
+
+def enqueue(session, entries):
+  """Record index updates in the current transaction.
+
+  Args:
+    session: session holding the transaction with the changes.
+    entries: iterable of (type, key, operation) tuples.
+  """
+  now = datetime.datetime.utcnow()
+  values = [{"type": type_, "key": key, "operation": operation,
+             "created_at": now}
+            for type_, key, operation in entries]
+  if values:
+    session.execute(IndexOutboxEntry.__table__.insert(), values)
+
+
+def enqueue_modified_objects(session, cache):
+  """Record index updates for objects from the request cache.
+
+  Indexed objects are queued by the update_indexer session listener, so only
+  objects that are not Indexed, snapshots and deleted objects are queued here,
+  same as update_index does for the synchronous path.
+  """
+  from ggrc.fulltext.mixin import Indexed
+  if cache is None:
+    return
+  entries = [
+      (obj.__class__.__name__, obj.id, UPDATE)
+      for obj in itertools.chain(cache.new, cache.dirty)
+      if obj.type == "Snapshot" or not isinstance(obj, Indexed)
+  ]
+  entries.extend((obj.__class__.__name__, obj.id, DELETE)
+                 for obj in cache.deleted)
+  enqueue(session, entries)
+
+
+def _group_entries(entries):
+  """Get the last operation for every queued object grouped by type.
+
+  Returns:
+    dict {operation: {type: [keys]}}
+  """
+  last_operations = OrderedDict()
+  for entry in entries:
+    last_operations[(entry.type, entry.key)] = entry.operation
+  grouped = defaultdict(lambda: defaultdict(list))
+  for (type_, key), operation in last_operations.iteritems():
+    grouped[operation][type_].append(key)
+  return grouped
+
+
+def _update_records(type_, keys):
+  """Update index records of objects of one type."""
+  from ggrc.fulltext.mixin import Indexed
+  from ggrc.models.inflector import get_model
+  from ggrc.snapshotter.indexer import reindex_snapshots
+  if type_ == "Snapshot":
+    reindex_snapshots(keys)
+    return
+  model = get_model(type_)
+  if model is None:
+    logger.warning("Skipped index update for unknown type: %s", type_)
+    return
+  if issubclass(model, Indexed):
+    model.bulk_record_update_for(keys)
+    return
+  indexer = get_indexer()
+  query = model.query.filter(model.id.in_(keys))
+  for record in indexer.fts_records_for(query):
+    indexer.update_record(record, commit=False)
+
+
+def _delete_records(type_, keys):
+  """Delete index records of deleted objects of one type."""
+  record_type = get_indexer().record_type
+  db.session.query(record_type).filter(
+      record_type.type == type_,
+      record_type.key.in_(keys),
+  ).delete(synchronize_session=False)
+
+
+def drain(batch_size=None, max_batches=None):
+  """Apply queued index updates in batches.
+
+  Every batch is read in queue order, reduced to the last operation for each
+  object and applied with one bulk update per type. Entries are removed from
+  the outbox only after their batch has been applied, so a failed batch is
+  retried on the next run.
+
+  Args:
+    batch_size: number of outbox entries read at once, QUERY_CHUNK_SIZE by
+        default.
+    max_batches: stop after that many batches, drain the whole outbox if None.
+
+  Returns:
+    number of processed outbox entries.
+  """
+  if batch_size is None:
+    batch_size = settings.QUERY_CHUNK_SIZE
+  processed = 0
+  for _ in itertools.islice(itertools.count(), max_batches):
+    entries = IndexOutboxEntry.query.order_by(
+        IndexOutboxEntry.id
+    ).limit(batch_size).all()
+    if not entries:
+      break
+    message = "Drain fulltext index outbox batch: {}".format(len(entries))
+    with benchmark(message):
+      grouped = _group_entries(entries)
+      for type_, keys in grouped[UPDATE].iteritems():
+        _update_records(type_, keys)
+      for type_, keys in grouped[DELETE].iteritems():
+        _delete_records(type_, keys)
+      # Entries committed after the batch was read may have lower ids, so only
+      # the entries that were read are removed
+      db.session.query(IndexOutboxEntry).filter(
+          IndexOutboxEntry.id.in_([entry.id for entry in entries])
+      ).delete(synchronize_session=False)
+      db.session.commit()
+    processed += len(entries)
+  return processed
+
+
+def get_status():
+  """Get the outbox size and the age of its oldest entry."""
+  count, oldest = db.session.query(
+      func.count(IndexOutboxEntry.id),
+      func.min(IndexOutboxEntry.created_at),
+  ).one()
+  if oldest is None:
+    lag = 0
+  else:
+    lag = (datetime.datetime.utcnow() - oldest).total_seconds()
+  return {
+      "enabled": is_enabled(),
+      "pending": count,
+      "oldest": oldest,
+      "lag_seconds": max(lag, 0),
+  }
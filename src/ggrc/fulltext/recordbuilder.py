@@ -3,11 +3,14 @@
 
 """Module for full text index record builder."""
 
+from collections import defaultdict
+
 from ggrc import db
 from ggrc.models import all_models
 from ggrc.models.reflection import AttributeInfo
 from ggrc.models.person import Person
 from ggrc.models.mixins import CustomAttributable
+from ggrc.fulltext.attributes import CustomRoleAttr
 from ggrc.fulltext.attributes import FullTextAttr
 from ggrc.fulltext.mixin import Indexed
 
@@ -45,7 +48,7 @@ class RecordBuilder(object):
         tgt_class, '_fulltext_attrs')
     self.indexer = indexer
 
-  def _get_properties(self, obj):
+  def _get_properties(self, obj, acl_entries):
     """Get indexable properties and values.
 
     Properties should be returned in the following format:
@@ -58,6 +61,9 @@ class RecordBuilder(object):
       ...
     }
     If there is no subproperty - empty string is used as a key
+
+    Custom role properties are built from acl_entries, the (role name,
+    person id, person name, person email) tuples of the object.
     """
     if obj.type == "Snapshot":
       # Snapshots do not have any indexable content. The object content for
@@ -79,6 +85,8 @@ class RecordBuilder(object):
     for attr in self._fulltext_attrs:
       if isinstance(attr, basestring):
         properties[property_tmpl.format(attr)] = {"": getattr(obj, attr)}
+      elif isinstance(attr, CustomRoleAttr):
+        properties.update(attr.get_property_from_entries(acl_entries))
       elif isinstance(attr, FullTextAttr):
         properties.update(attr.get_property_for(obj))
     return properties
@@ -127,10 +135,12 @@ class RecordBuilder(object):
 
     If Person provided by Revision, need to go to DB to get Person data
     """
+    return self._build_person_subprops(*self.get_person_id_name_email(person))
+
+  @staticmethod
+  def _build_person_subprops(person_id, person_name, person_email):
+    """Get dict of Person properties for fulltext indexing from its data."""
     subproperties = {}
-    person_id, person_name, person_email = self.get_person_id_name_email(
-        person
-    )
     subproperties["{}-name".format(person_id)] = person_name
     subproperties["{}-user_name".format(person_id)] = \
         person_email.split("@")[0]
@@ -150,50 +160,164 @@ class RecordBuilder(object):
     content = ":".join(sorted(sort_values))
     return {"__sort__": content}
 
-  def get_custom_attribute_properties(self, obj):
-    """Get property value in case of indexing CA
+  def _build_custom_attribute_properties(self, title, attribute_type,
+                                         attribute_value, person):
+    """Get CA property value from the CA definition and value data
+
+    person is the (id, name, email) tuple of the attribute object for
+    Map:Person attributes and None otherwise.
     """
     # The name of the attribute property needs to be unique for each object,
     # the value comes from the custom_attribute_value
-    attribute_name = obj.custom_attribute.title
     properties = {}
-    if (obj.custom_attribute.attribute_type == "Map:Person" and
-            obj.attribute_object_id):
-      properties[attribute_name] = self.build_person_subprops(
-          obj.attribute_object)
-      properties[attribute_name].update(self.build_list_sort_subprop(
-          [obj.attribute_object]))
+    if attribute_type == "Map:Person" and person:
+      properties[title] = self._build_person_subprops(*person)
+      properties[title]["__sort__"] = person[2].split("@")[0]
     else:
-      properties[attribute_name] = {"": obj.attribute_value}
+      properties[title] = {"": attribute_value}
     return properties
 
-  def as_record(self, obj):  # noqa  # pylint:disable=too-many-branches
-    """Generate record representation for an object.
+  def _load_custom_attribute_rows(self, obj_type, ids):
+    """Load CA values and definitions of objects of one type.
 
-    Properties should be returned in the following format:
-    {
-      property1: {
-        subproperty1: value1,
-        subproperty2: value2,
-        ...
-      },
-      ...
-    }
-    If there is no subproperty - empty string is used as a key
+    Returns:
+      dict of (title, attribute_type, attribute_value, attribute_object_id)
+      lists by object id.
+    """
+    cav = all_models.CustomAttributeValue
+    cad = all_models.CustomAttributeDefinition
+    query = db.session.query(
+        cav.attributable_id,
+        cad.title,
+        cad.attribute_type,
+        cav.attribute_value,
+        cav.attribute_object_id,
+    ).join(
+        cad, cad.id == cav.custom_attribute_id
+    ).filter(
+        cav.attributable_type == obj_type,
+        cav.attributable_id.in_(ids),
+    ).order_by(cav.id)
+    rows = defaultdict(list)
+    for row in query:
+      rows[row[0]].append(row[1:])
+    return rows
+
+  def _load_acl_rows(self, obj_type, ids):
+    """Load access control list entries of objects of one type.
+
+    Returns:
+      dict of (ac_role_id, person_id) lists by object id.
+    """
+    acl = all_models.AccessControlList
+    query = db.session.query(
+        acl.object_id,
+        acl.ac_role_id,
+        acl.person_id,
+    ).filter(
+        acl.object_type == obj_type,
+        acl.object_id.in_(ids),
+    ).order_by(acl.id)
+    rows = defaultdict(list)
+    for row in query:
+      rows[row[0]].append(row[1:])
+    return rows
+
+  @staticmethod
+  def _load_people_and_roles(person_ids, ac_role_ids):
+    """Load names of people and roles in bulk.
+
+    The data is loaded for every batch instead of being kept in the indexer
+    cache, so renamed people and roles are indexed with their current names.
+
+    Returns:
+      (people_map, ac_role_map) tuple of dicts with (name, email) tuples by
+      person id and role names by role id.
     """
-    # Defaults. These work when the record is not a custom attribute
+    people_map = {}
+    if person_ids:
+      people_map = {
+          person_id: (name, email)
+          for person_id, name, email in db.session.query(
+              Person.id, Person.name, Person.email,
+          ).filter(Person.id.in_(set(person_ids)))
+      }
+    ac_role_map = {}
+    if ac_role_ids:
+      ac_role = all_models.AccessControlRole
+      ac_role_map = dict(db.session.query(
+          ac_role.id,
+          ac_role.name,
+      ).filter(ac_role.id.in_(set(ac_role_ids))))
+    return people_map, ac_role_map
 
-    properties = self._get_properties(obj)
-    if isinstance(obj, CustomAttributable):
-      for custom_attr in obj.custom_attribute_values:
-        properties.update(self.get_custom_attribute_properties(custom_attr))
+  def _build_record(self,  # pylint: disable=too-many-arguments
+                    obj, cav_rows, acl_rows, people_map, ac_role_map):
+    """Build the record of an object from its preloaded CA and ACL rows.
 
+    acl_rows is None if the builder's class has no custom role attributes.
+    """
+    acl_entries = None
+    if acl_rows is not None:
+      acl_entries = [
+          (ac_role_map[ac_role_id], person_id) + people_map[person_id]
+          for ac_role_id, person_id in acl_rows
+      ]
+    properties = self._get_properties(obj, acl_entries)
+    for title, attribute_type, value, object_id in cav_rows:
+      person = None
+      if object_id in people_map:
+        person = (object_id,) + people_map[object_id]
+      properties.update(self._build_custom_attribute_properties(
+          title, attribute_type, value, person))
     return Record(
-        # This logic saves custom attribute values as attributes of the object
-        # that owns the attribute values. When obj is not a
-        # CustomAttributeValue the values are saved directly.
         obj.id,
         obj.__class__.__name__,
         obj.context_id,
         properties
     )
+
+  def as_records(self, objs):
+    """Generate record representations for a list of objects.
+
+    Custom attribute values and definitions, access control list entries and
+    the people and roles they reference are loaded for all objects at once,
+    so the number of queries does not depend on the number of objects.
+    All objects must be instances of the builder's class.
+    """
+    if not objs:
+      return []
+    obj_type = objs[0].__class__.__name__
+    ids = [obj.id for obj in objs]
+    cav_rows = {}
+    if isinstance(objs[0], CustomAttributable):
+      cav_rows = self._load_custom_attribute_rows(obj_type, ids)
+    acl_rows = None
+    if any(isinstance(attr, CustomRoleAttr) for attr in self._fulltext_attrs):
+      acl_rows = self._load_acl_rows(obj_type, ids)
+
+    person_ids = []
+    ac_role_ids = []
+    for rows in cav_rows.itervalues():
+      person_ids.extend(
+          attribute_object_id
+          for _, attribute_type, _, attribute_object_id in rows
+          if attribute_type == "Map:Person" and attribute_object_id
+      )
+    for rows in (acl_rows or {}).itervalues():
+      for ac_role_id, person_id in rows:
+        ac_role_ids.append(ac_role_id)
+        person_ids.append(person_id)
+    people_map, ac_role_map = self._load_people_and_roles(person_ids,
+                                                          ac_role_ids)
+
+    return [
+        self._build_record(
+            obj,
+            cav_rows.get(obj.id, []),
+            None if acl_rows is None else acl_rows.get(obj.id, []),
+            people_map,
+            ac_role_map,
+        )
+        for obj in objs
+    ]
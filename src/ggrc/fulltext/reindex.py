@@ -0,0 +1,179 @@
+# Copyright (C) 2017 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""Parallel and resumable full text reindex.
+
+A full reindex first splits every indexed model and snapshots into id ranges
+that are saved in the fulltext_reindex_chunks table. The chunks are then
+reindexed either in the current process or on a pool of REINDEX_PROCESSES
+worker processes, every worker using its own database connection. A chunk is
+marked as done in the same transaction as its index records, so a reindex that
+was interrupted continues with the remaining chunks the next time it is run.
+"""
+
+import multiprocessing
+import time
+from logging import getLogger
+
+from ggrc import db
+from ggrc import settings
+from ggrc.fulltext import get_indexer
+from ggrc.fulltext import get_indexed_model_names
+from ggrc.fulltext.mixin import Indexed
+from ggrc.models import all_models
+from ggrc.models.inflector import get_model
+from ggrc.snapshotter.indexer import reindex_snapshots
+from ggrc.utils import benchmark
+from ggrc.utils import generate_query_chunks
+from ggrc.utils import generate_query_chunks_streamed
+
+
+logger = getLogger(__name__)  # pylint: disable=invalid-name
+
+
+class ReindexChunk(db.Model):
+  """Range of object ids of one model that must be reindexed."""
+  # pylint: disable=too-few-public-methods
+  __tablename__ = "fulltext_reindex_chunks"
+
+  id = db.Column(db.Integer, primary_key=True)
+  model = db.Column(db.String(64), nullable=False)
+  first_id = db.Column(db.Integer, nullable=False)
+  last_id = db.Column(db.Integer, nullable=False)
+  done = db.Column(db.Boolean, nullable=False, default=False)
+  records = db.Column(db.Integer)
+
+
+def _fill_indexer_cache():
+  """Load people and roles used by snapshot records into the indexer cache."""
+  indexer = get_indexer()
+  people = db.session.query(all_models.Person.id, all_models.Person.name,
+                            all_models.Person.email)
+  indexer.cache["people_map"] = {p.id: (p.name, p.email) for p in people}
+  indexer.cache["ac_role_map"] = dict(db.session.query(
+      all_models.AccessControlRole.id,
+      all_models.AccessControlRole.name,
+  ))
+
+
+def _reindex_not_indexed_model(model):
+  """Recreate records for a model that does not use the Indexed mixin."""
+  # pylint: disable=protected-access
+  logger.warning(
+      "Try to index model that not inherited from Indexed mixin: %s",
+      model.__name__
+  )
+  indexer = get_indexer()
+  indexer.delete_records_by_type(model.__name__)
+  mapper_class = model._sa_class_manager.mapper.base_mapper.class_
+  query = model.query.options(
+      db.undefer_group(mapper_class.__name__ + '_complete'),
+  )
+  for query_chunk in generate_query_chunks(query):
+    for record in indexer.fts_records_for(query_chunk):
+      indexer.create_record(record, False)
+    db.session.commit()
+
+
+def _plan_chunks():
+  """Split all objects that must be reindexed into chunks of ids."""
+  chunks = []
+  model_names = sorted(get_indexed_model_names()) + ["Snapshot"]
+  for model_name in model_names:
+    model = get_model(model_name)
+    if model_name != "Snapshot" and not issubclass(model, Indexed):
+      _reindex_not_indexed_model(model)
+      continue
+    ids_query = db.session.query(model.id).order_by(model.id)
+    chunks.extend(
+        {"model": model_name, "first_id": ids[0][0], "last_id": ids[-1][0],
+         "done": False}
+        for ids in generate_query_chunks_streamed(ids_query)
+    )
+  # Chunks are saved at once, so an interrupted planning starts from scratch
+  if chunks:
+    db.session.execute(ReindexChunk.__table__.insert(), chunks)
+  db.session.commit()
+
+
+def _reindex_chunk(chunk_id):
+  """Reindex objects from a single chunk and mark the chunk as done.
+
+  This is the worker function for the process pool, so it must only use
+  arguments that can be pickled.
+
+  Returns:
+    number of reindexed objects.
+  """
+  chunk = ReindexChunk.query.get(chunk_id)
+  model = get_model(chunk.model)
+  ids = [id_ for id_, in db.session.query(model.id).filter(
+      model.id.between(chunk.first_id, chunk.last_id))]
+  if chunk.model == "Snapshot":
+    reindex_snapshots(ids)
+  else:
+    model.bulk_record_update_for(ids)
+  chunk.records = len(ids)
+  chunk.done = True
+  db.session.commit()
+  return len(ids)
+
+
+def _reindex_chunks(chunk_ids):
+  """Reindex chunks in the current process or on a process pool.
+
+  Yields:
+    number of objects reindexed for every finished chunk.
+  """
+  processes = settings.REINDEX_PROCESSES
+  if processes <= 1 or len(chunk_ids) <= 1:
+    for chunk_id in chunk_ids:
+      yield _reindex_chunk(chunk_id)
+    return
+  # Forked workers must not share connections with this process, so all of
+  # them are closed before the pool is created. Every worker opens its own.
+  db.session.remove()
+  db.engine.dispose()
+  pool = multiprocessing.Pool(processes)
+  try:
+    for records in pool.imap_unordered(_reindex_chunk, chunk_ids):
+      yield records
+  finally:
+    pool.close()
+    pool.join()
+
+
+def reindex():
+  """Reindex all objects, continuing an interrupted reindex if there is one.
+
+  Returns:
+    dict with the number of reindexed objects, elapsed time and throughput.
+  """
+  with benchmark("Full reindex"):
+    start = time.time()
+    if db.session.query(ReindexChunk.id).first() is None:
+      with benchmark("Plan reindex chunks"):
+        _plan_chunks()
+    else:
+      logger.info("Resuming interrupted reindex")
+    chunk_ids = [id_ for id_, in db.session.query(ReindexChunk.id).filter(
+        ReindexChunk.done.is_(False)).order_by(ReindexChunk.id)]
+    logger.info("Reindexing %s chunks", len(chunk_ids))
+    _fill_indexer_cache()
+    records = 0
+    for done, chunk_records in enumerate(_reindex_chunks(chunk_ids), 1):
+      records += chunk_records
+      logger.info("Reindexed %s of %s chunks, %.1f records/s", done,
+                  len(chunk_ids), records / max(time.time() - start, 1e-6))
+    db.session.query(ReindexChunk).delete()
+    db.session.commit()
+    get_indexer().invalidate_cache()
+    elapsed = time.time() - start
+    stats = {
+        "records": records,
+        "seconds": elapsed,
+        "records_per_second": records / max(elapsed, 1e-6),
+    }
+    logger.info("Reindexed %(records)s records in %(seconds).1f s, "
+                "%(records_per_second).1f records/s", stats)
+    return stats
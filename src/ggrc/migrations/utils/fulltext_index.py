@@ -0,0 +1,58 @@
+# Copyright (C) 2017 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""
+FULLTEXT index on fulltext_record_properties content
+
+The index is used only by the native search of FULLTEXT_NATIVE_SEARCH and
+every write of the full text table has to maintain it, so it is created only
+when that search is enabled and the database has InnoDB FULLTEXT indexes,
+which MySQL supports since 5.6.
+
+This helper is used by the following migrations:
+
+* ggrc.migrations.versions.20170601120000_2a7c3ab1f5e4
+"""
+
+from sqlalchemy.sql import text
+
+from ggrc import settings
+
+
+INDEX_NAME = "ix_fulltext_record_properties_content"
+
+
+def is_supported(connection):
+  """Check if the database can create InnoDB FULLTEXT indexes."""
+  return (connection.dialect.name == "mysql" and
+          connection.dialect.server_version_info >= (5, 6))
+
+
+def has_index(connection):
+  """Check if the FULLTEXT index exists."""
+  return bool(connection.execute(text(
+      "SHOW INDEX FROM fulltext_record_properties WHERE Key_name = :name"
+  ), name=INDEX_NAME).fetchall())
+
+
+def create_index(connection):
+  """Create the FULLTEXT index if the native search needs it.
+
+  Returns:
+    True if the index was created.
+  """
+  if (not settings.FULLTEXT_NATIVE_SEARCH or
+          not is_supported(connection) or has_index(connection)):
+    return False
+  connection.execute(
+      "ALTER TABLE fulltext_record_properties "
+      "ADD FULLTEXT INDEX {} (content)".format(INDEX_NAME))
+  return True
+
+
+def drop_index(connection):
+  """Drop the FULLTEXT index if it exists."""
+  if connection.dialect.name == "mysql" and has_index(connection):
+    connection.execute(
+        "ALTER TABLE fulltext_record_properties "
+        "DROP INDEX {}".format(INDEX_NAME))
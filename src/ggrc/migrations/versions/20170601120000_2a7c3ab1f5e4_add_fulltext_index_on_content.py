@@ -0,0 +1,30 @@
+# Copyright (C) 2017 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""
+Add FULLTEXT index on fulltext_record_properties content
+
+The index is created only with FULLTEXT_NATIVE_SEARCH enabled on MySQL 5.6+.
+
+Create Date: 2017-06-01 12:00:00.000000
+"""
+# disable Invalid constant name pylint warning for mandatory Alembic variables.
+# pylint: disable=invalid-name
+
+from alembic import op
+
+from ggrc.migrations.utils import fulltext_index
+
+# revision identifiers, used by Alembic.
+revision = '2a7c3ab1f5e4'
+down_revision = '59a7bd61e36a'
+
+
+def upgrade():
+  """Upgrade database schema and/or data, creating a new revision."""
+  fulltext_index.create_index(op.get_bind())
+
+
+def downgrade():
+  """Downgrade database schema and/or data back to the previous revision."""
+  fulltext_index.drop_index(op.get_bind())
@@ -0,0 +1,35 @@
+# Copyright (C) 2017 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""
+Add fulltext index outbox table
+
+Create Date: 2017-06-02 12:00:00.000000
+"""
+# disable Invalid constant name pylint warning for mandatory Alembic variables.
+# pylint: disable=invalid-name
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '3f1d9a6c2b7e'
+down_revision = '2a7c3ab1f5e4'
+
+
+def upgrade():
+  """Upgrade database schema and/or data, creating a new revision."""
+  op.create_table(
+      'fulltext_index_outbox',
+      sa.Column('id', sa.Integer(), nullable=False),
+      sa.Column('type', sa.String(length=64), nullable=False),
+      sa.Column('key', sa.Integer(), nullable=False),
+      sa.Column('operation', sa.Enum('update', 'delete'), nullable=False),
+      sa.Column('created_at', sa.DateTime(), nullable=False),
+      sa.PrimaryKeyConstraint('id'),
+  )
+
+
+def downgrade():
+  """Downgrade database schema and/or data back to the previous revision."""
+  op.drop_table('fulltext_index_outbox')
@@ -0,0 +1,36 @@
+# Copyright (C) 2017 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""
+Add fulltext reindex chunks table
+
+Create Date: 2017-06-05 12:00:00.000000
+"""
+# disable Invalid constant name pylint warning for mandatory Alembic variables.
+# pylint: disable=invalid-name
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '4b8e2d5f7a19'
+down_revision = '3f1d9a6c2b7e'
+
+
+def upgrade():
+  """Upgrade database schema and/or data, creating a new revision."""
+  op.create_table(
+      'fulltext_reindex_chunks',
+      sa.Column('id', sa.Integer(), nullable=False),
+      sa.Column('model', sa.String(length=64), nullable=False),
+      sa.Column('first_id', sa.Integer(), nullable=False),
+      sa.Column('last_id', sa.Integer(), nullable=False),
+      sa.Column('done', sa.Boolean(), nullable=False),
+      sa.Column('records', sa.Integer(), nullable=True),
+      sa.PrimaryKeyConstraint('id'),
+  )
+
+
+def downgrade():
+  """Downgrade database schema and/or data back to the previous revision."""
+  op.drop_table('fulltext_reindex_chunks')
@@ -0,0 +1,43 @@
+# Copyright (C) 2017 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""
+Add profiles table
+
+Create Date: 2017-06-09 12:00:00.000000
+"""
+# disable Invalid constant name pylint warning for mandatory Alembic variables.
+# pylint: disable=invalid-name
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '6d2a4f7b9c1e'
+down_revision = '5c9f3e8a1d2b'
+
+
+def upgrade():
+  """Upgrade database schema and/or data, creating a new revision."""
+  op.create_table(
+      'profiles',
+      sa.Column('id', sa.Integer(), nullable=False),
+      sa.Column('method', sa.String(length=16), nullable=False),
+      sa.Column('path', sa.String(length=250), nullable=False),
+      sa.Column('status', sa.Integer(), nullable=True),
+      sa.Column('duration', sa.Float(), nullable=False),
+      sa.Column('data', sa.LargeBinary(length=16777215), nullable=False),
+      sa.Column('modified_by_id', sa.Integer(), nullable=True),
+      sa.Column('created_at', sa.DateTime(), nullable=False),
+      sa.Column('updated_at', sa.DateTime(), nullable=False),
+      sa.Column('context_id', sa.Integer(), nullable=True),
+      sa.ForeignKeyConstraint(['context_id'], ['contexts.id']),
+      sa.PrimaryKeyConstraint('id'),
+  )
+  op.create_index('fk_profiles_contexts', 'profiles', ['context_id'])
+  op.create_index('ix_profiles_updated_at', 'profiles', ['updated_at'])
+
+
+def downgrade():
+  """Downgrade database schema and/or data back to the previous revision."""
+  op.drop_table('profiles')
@@ -0,0 +1,39 @@
+# Copyright (C) 2017 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""
+Add background task data table
+
+Create Date: 2017-06-12 12:00:00.000000
+"""
+# disable Invalid constant name pylint warning for mandatory Alembic variables.
+# pylint: disable=invalid-name
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '7e3b5a8c2d4f'
+down_revision = '6d2a4f7b9c1e'
+
+
+def upgrade():
+  """Upgrade database schema and/or data, creating a new revision."""
+  op.create_table(
+      'background_task_data',
+      sa.Column('id', sa.Integer(), nullable=False),
+      sa.Column('background_task_id', sa.Integer(), nullable=False),
+      sa.Column('name', sa.String(length=64), nullable=False),
+      sa.Column('position', sa.Integer(), nullable=False),
+      sa.Column('content', sa.LargeBinary(length=16777215), nullable=False),
+      sa.ForeignKeyConstraint(['background_task_id'], ['background_tasks.id'],
+                              ondelete='CASCADE'),
+      sa.PrimaryKeyConstraint('id'),
+      sa.UniqueConstraint('background_task_id', 'name', 'position',
+                          name='uq_background_task_data'),
+  )
+
+
+def downgrade():
+  """Downgrade database schema and/or data back to the previous revision."""
+  op.drop_table('background_task_data')
@@ -52,6 +52,7 @@ from ggrc.models.program import Program
 from ggrc.models.project import Project
 from ggrc.models.relationship import Relationship
 from ggrc.models.relationship import RelationshipAttr
+from ggrc.models.request_profile import RequestProfile
 from ggrc.models.revision import Revision
 from ggrc.models.section import Section
 from ggrc.models.snapshot import Snapshot
@@ -109,6 +110,7 @@ all_models = [
     Revision,
     Event,
     BackgroundTask,
+    RequestProfile,
     NotificationConfig,
     NotificationType,
     Notification,
@@ -1,27 +1,54 @@
 # Copyright (C) 2017 Google Inc.
 # Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
 
+import zlib
 from logging import getLogger
 from functools import wraps
 from time import time
 
 from flask import request
+from flask import stream_with_context
 from flask.wrappers import Response
 from werkzeug.datastructures import Headers
+from werkzeug.exceptions import Forbidden
+from werkzeug.exceptions import NotFound
 
 from ggrc import db
 from ggrc import settings
 from ggrc.login import get_current_user
+from ggrc.utils import as_json
 from ggrc.models.mixins import Base
 from ggrc.models.deferred import deferred
 from ggrc.models.mixins import Stateful
 from ggrc.models.types import CompressedType
+from ggrc.models.types import JsonType
 
 
 # pylint: disable=invalid-name
 logger = getLogger(__name__)
 
 
+class BackgroundTaskData(db.Model):
+  """Part of a large value stored for a background task.
+
+  Values such as uploaded and exported files are zlib compressed and split
+  into parts of BACKGROUND_TASK_DATA_PART_SIZE bytes, so their size is not
+  limited by a single column or by the maximum packet size of the database.
+  """
+  # pylint: disable=too-few-public-methods
+  __tablename__ = "background_task_data"
+
+  id = db.Column(db.Integer, primary_key=True)
+  background_task_id = db.Column(
+      db.Integer,
+      db.ForeignKey("background_tasks.id", ondelete="CASCADE"),
+      nullable=False,
+  )
+  name = db.Column(db.String(64), nullable=False)
+  position = db.Column(db.Integer, nullable=False)
+  content = db.Column(db.LargeBinary(length=16777215), nullable=False)
+
+
 class BackgroundTask(Base, Stateful, db.Model):
   __tablename__ = 'background_tasks'
 
@@ -34,10 +61,12 @@ class BackgroundTask(Base, Stateful, db.Model):
   name = deferred(db.Column(db.String), 'BackgroundTask')
   parameters = deferred(db.Column(CompressedType), 'BackgroundTask')
   result = deferred(db.Column(CompressedType), 'BackgroundTask')
+  progress = deferred(db.Column(JsonType), 'BackgroundTask')
 
   _publish_attrs = [
       'name',
-      'result'
+      'result',
+      'progress',
   ]
 
   _aliases = {
@@ -54,32 +83,138 @@ class BackgroundTask(Base, Stateful, db.Model):
     db.session.commit()
 
   def finish(self, status, result):
-    # Ensure to not commit any not-yet-committed changes
-    db.session.rollback()
+    """Save the task status and result.
 
+    The content of streamed responses, such as exported files, is stored with
+    write_data instead of the result column, so its size is not limited.
+    """
     if isinstance(result, Response):
-      self.result = {'content': result.response[0],
-                     'status_code': result.status_code,
+      task_result = {'status_code': result.status_code,
                      'headers': result.headers.items()}
+      if result.is_streamed:
+        self.write_data("result", result.iter_encoded())
+      else:
+        task_result['content'] = result.response[0]
     else:
-      self.result = {'content': result,
+      task_result = {'content': result,
                      'status_code': 200,
                      'headers': [('Content-Type', 'text/html')]}
+
+    # Ensure to not commit any not-yet-committed changes
+    db.session.rollback()
+
+    self.result = task_result
     self.status = status
     db.session.add(self)
     db.session.commit()
 
+  def write_data(self, name, chunks):
+    """Store a value given as an iterable of strings under the name.
+
+    The value is compressed and written part by part with a separate
+    connection like the progress, so it is never held in memory as a whole
+    and is kept when the task transaction is rolled back. A value stored
+    earlier under the same name is replaced.
+    """
+    table = BackgroundTaskData.__table__
+    db.engine.execute(table.delete().where(
+        (table.c.background_task_id == self.id) & (table.c.name == name)
+    ))
+
+    def compress():
+      compressor = zlib.compressobj()
+      for chunk in chunks:
+        yield compressor.compress(chunk)
+      yield compressor.flush()
+
+    part_size = settings.BACKGROUND_TASK_DATA_PART_SIZE
+    position = 0
+    pending = ""
+    for data in compress():
+      pending += data
+      while len(pending) >= part_size:
+        self._insert_data(name, position, pending[:part_size])
+        pending = pending[part_size:]
+        position += 1
+    if pending or not position:
+      self._insert_data(name, position, pending)
+
+  def _insert_data(self, name, position, content):
+    db.engine.execute(BackgroundTaskData.__table__.insert().values(
+        background_task_id=self.id,
+        name=name,
+        position=position,
+        content=content,
+    ))
+
+  def read_data(self, name):
+    """Generate the strings of a value stored with write_data.
+
+    Parts are loaded one by one, so the value is never held in memory as a
+    whole.
+    """
+    part_ids = [id_ for id_, in db.session.query(BackgroundTaskData.id).filter(
+        BackgroundTaskData.background_task_id == self.id,
+        BackgroundTaskData.name == name,
+    ).order_by(BackgroundTaskData.position)]
+    decompressor = zlib.decompressobj()
+    for part_id in part_ids:
+      content = db.session.query(BackgroundTaskData.content).filter(
+          BackgroundTaskData.id == part_id).scalar()
+      data = decompressor.decompress(content)
+      if data:
+        yield data
+    data = decompressor.flush()
+    if data:
+      yield data
+
+  def update_progress(self, progress):
+    """Save task progress outside of the current transaction.
+
+    The progress is written with a separate connection, so it can be polled
+    while the task is still working on uncommitted changes.
+    """
+    table = self.__table__
+    db.engine.execute(table.update().where(
+        table.c.id == self.id
+    ).values(progress=progress))
+
+  def make_status_response(self):
+    """Make a response with the task status and progress."""
+    from ggrc.app import app
+    status = {
+        "id": self.id,
+        "name": self.name,
+        "status": self.status,
+        "progress": self.progress,
+    }
+    return app.make_response((as_json(status), 200,
+                              [("Content-Type", "application/json")]))
+
   def make_response(self, default=None):
+    """Make a response with the task result.
+
+    Results of streamed responses are streamed from the stored data.
+    """
     if self.result is None:
       return default
     from ggrc.app import app
-    return app.make_response((self.result['content'],
+    if 'content' in self.result:
+      return app.make_response((self.result['content'],
+                                self.result['status_code'],
+                                self.result['headers']))
+    return app.response_class(stream_with_context(self.read_data("result")),
                               self.result['status_code'],
-                              self.result['headers']))
+                              self.result['headers'])
 
 
-def create_task(name, url, queued_callback=None, parameters=None):
+def create_task(name, url, queued_callback=None, parameters=None, data=None):
+  """Create a background task and schedule it.
 
+  Small task arguments are stored in parameters. Large ones such as uploaded
+  files are given in data, a dict of iterables of strings by name, and are
+  stored with BackgroundTask.write_data.
+  """
   # task name must be unique
   if not parameters:
     parameters = {}
@@ -88,6 +223,8 @@ def create_task(name, url, queued_callback=None, parameters=None):
   task.modified_by = get_current_user()
   db.session.add(task)
   db.session.commit()
+  for data_name, chunks in (data or {}).iteritems():
+    task.write_data(data_name, chunks)
 
   # schedule a task queue
   if getattr(settings, 'APP_ENGINE', False):
@@ -107,8 +244,17 @@ def create_task(name, url, queued_callback=None, parameters=None):
 
 
 def make_task_response(id_):
+  """Get the task result or its status if the task is not finished.
+
+  Task results hold exported and imported data, so only the user who started
+  the task can get them.
+  """
   task = BackgroundTask.query.get(id_)
-  return task.make_response()
+  if task is None:
+    raise NotFound()
+  if task.modified_by_id != get_current_user().id:
+    raise Forbidden()
+  return task.make_response(task.make_status_response())
 
 
 def queued_task(func):
@@ -123,6 +269,7 @@ def queued_task(func):
     task.start()
     try:
       result = func(task)
+      task.finish("Success", result)
     except:
       import traceback
       logger.exception("Task failed")
@@ -132,6 +279,5 @@ def queued_task(func):
       # Return 200 so that the task is not retried
       return app.make_response((
           'failure', 200, [('Content-Type', 'text/html')]))
-    task.finish("Success", result)
     return result
   return decorated_view
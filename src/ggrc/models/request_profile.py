@@ -0,0 +1,29 @@
+# Copyright (C) 2017 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""Compressed pstats data of profiled requests."""
+
+import zlib
+
+from ggrc import db
+from ggrc.models.mixins import Base
+
+
+class RequestProfile(Base, db.Model):
+  """Compressed pstats data of a profiled request.
+
+  The profiled user is stored in modified_by_id.
+  """
+  __tablename__ = "profiles"
+
+  method = db.Column(db.String(16), nullable=False)
+  path = db.Column(db.String(250), nullable=False)
+  status = db.Column(db.Integer)
+  duration = db.Column(db.Float, nullable=False)
+  # not in the complete group, so that only downloads load the data
+  data = db.deferred(db.Column(db.LargeBinary(length=16777215),
+                               nullable=False))
+
+  def get_pstats_dump(self):
+    """Get profile data in the format written by pstats.Stats.dump_stats."""
+    return zlib.decompress(self.data)
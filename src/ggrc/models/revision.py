@@ -61,18 +61,27 @@ class Revision(Base, db.Model):
     )
 
   def __init__(self, obj, modified_by_id, action, content):
-    self.resource_id = obj.id
-    self.resource_type = obj.__class__.__name__
-    self.resource_slug = getattr(obj, "slug", None)
-    self.modified_by_id = modified_by_id
-    self.action = action
-    self.content = content
+    row = self.get_row(obj, modified_by_id, action, content)
+    for attr, value in row.iteritems():
+      setattr(self, attr, value)
 
+  @staticmethod
+  def get_row(obj, modified_by_id, action, content):
+    """Get column values of a revision for inserting it without the ORM."""
+    row = {
+        "resource_id": obj.id,
+        "resource_type": obj.__class__.__name__,
+        "resource_slug": getattr(obj, "slug", None),
+        "modified_by_id": modified_by_id,
+        "action": action,
+        "content": content,
+    }
     for attr in ["source_type",
                  "source_id",
                  "destination_type",
                  "destination_id"]:
-      setattr(self, attr, getattr(obj, attr, None))
+      row[attr] = getattr(obj, attr, None)
+    return row
 
   def _description_mapping(self, link_objects):
     """Compute description for revisions with <-> in display name."""
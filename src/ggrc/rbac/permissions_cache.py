@@ -0,0 +1,281 @@
+# Copyright (C) 2017 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""Scoped invalidation of cached user permissions.
+
+User permissions are cached in memcache in separate stages, so that a change
+only drops the stages of the users it affects:
+
+  roles - permissions from global and context roles, role implications,
+          context relationships, the personal context and backlog workflows.
+  owners - object owner permissions.
+  assignees - permissions to assigned objects and objects mapped to them.
+  acl - access control list permissions.
+
+Changes are described with a dict of stage names to sets of affected user ids,
+where None instead of a set means all users.
+
+Cached stages are keyed with generation counters: a global version of the
+stage and a version of the stage for the user are part of the key, so
+invalidation increments the version instead of deleting cached values, and
+permissions loaded before a change are never stored under the new key.
+Cached permissions are stored as compressed marshal data.
+"""
+
+import marshal
+import time
+import zlib
+
+import sqlalchemy
+from sqlalchemy import and_
+from sqlalchemy import event
+from sqlalchemy import or_
+from sqlalchemy.orm.session import Session
+
+from ggrc import db
+from ggrc import settings
+from ggrc.utils import benchmark_stats
+
+
+ROLES = "roles"
+OWNERS = "owners"
+ASSIGNEES = "assignees"
+ACL = "acl"
+STAGES = (ROLES, OWNERS, ASSIGNEES, ACL)
+
+PERMISSION_CACHE_TIMEOUT = 3600  # 60 minutes
+
+# Changes of these types affect a stage for every user
+_GLOBAL_CHANGES = {
+    "Role": ROLES,
+    "ContextImplication": ROLES,
+    "Context": ROLES,
+    "Workflow": ROLES,
+    "AccessControlRole": ACL,
+}
+
+# Changes of these types affect a stage of the user in person_id
+_PERSON_CHANGES = {
+    "UserRole": ROLES,
+    "ObjectOwner": OWNERS,
+    "AccessControlList": ACL,
+}
+
+# Key of (stage, person id) pairs of replaced people in the session info
+_OLD_PEOPLE_KEY = "permissions_old_people"
+
+
+def get_version_key(stage, user_id=None):
+  """Get the key of the global or user version of a stage."""
+  if user_id is None:
+    return "permissions:version:{}".format(stage)
+  return "permissions:version:{}:{}".format(user_id, stage)
+
+
+def get_key(user_id, stage, version):
+  return "permissions:{}:{}:{}".format(user_id, stage, version)
+
+
+def get_memcache_client():
+  from ggrc.cache import MemCache
+  return MemCache().memcache_client
+
+
+def _add_change(changes, stage, user_ids):
+  """Add affected users of a stage, None for all users."""
+  if stage in changes and changes[stage] is None:
+    return
+  if user_ids is None:
+    changes[stage] = None
+  else:
+    changes.setdefault(stage, set()).update(user_ids)
+
+
+def _get_assignees(endpoints):
+  """Get ids of people assigned to any of the (type, id) endpoints."""
+  if not endpoints:
+    return set()
+  from ggrc.models import all_models
+  rel = all_models.Relationship
+  attrs = all_models.RelationshipAttr
+  query = db.session.query(rel.source_id, rel.destination_id,
+                           rel.source_type).join(
+      attrs, and_(attrs.relationship_id == rel.id,
+                  attrs.attr_name == "AssigneeType"),
+  ).filter(or_(*[
+      or_(and_(rel.source_type == "Person",
+               rel.destination_type == type_, rel.destination_id == id_),
+          and_(rel.destination_type == "Person",
+               rel.source_type == type_, rel.source_id == id_))
+      for type_, id_ in endpoints
+  ]))
+  return {source_id if source_type == "Person" else destination_id
+          for source_id, destination_id, source_type in query}
+
+
+def _has_contexts(endpoints):
+  """Check if any of the (type, id) endpoints owns a context."""
+  if not endpoints:
+    return False
+  from ggrc.models import all_models
+  context = all_models.Context
+  return db.session.query(db.session.query(context.id).filter(or_(*[
+      and_(context.related_object_type == type_,
+           context.related_object_id == id_)
+      for type_, id_ in endpoints
+  ])).exists()).scalar()
+
+
+def _get_old_person_ids(obj):
+  """Get ids of people replaced in person_id of an unflushed object."""
+  return sqlalchemy.inspect(obj).attrs.person_id.history.deleted or ()
+
+
+@event.listens_for(Session, "before_flush")
+def _store_old_people(session, *_):
+  """Remember replaced people, the history is gone after the flush."""
+  old_people = session.info.setdefault(_OLD_PEOPLE_KEY, set())
+  for obj in session.dirty:
+    stage = _PERSON_CHANGES.get(obj.__class__.__name__)
+    if stage is not None:
+      old_people.update((stage, person_id)
+                        for person_id in _get_old_person_ids(obj))
+
+
+@event.listens_for(Session, "after_commit")
+@event.listens_for(Session, "after_rollback")
+def _clear_old_people(session):
+  """Forget replaced people once the transaction is over."""
+  session.info.pop(_OLD_PEOPLE_KEY, None)
+
+
+def _add_object_changes(changes, endpoints, obj):
+  """Add stages affected by a modified object.
+
+  Endpoints of relationships are added to endpoints to check their assignees
+  for all objects at once.
+  """
+  type_ = obj.__class__.__name__
+  if type_ in _GLOBAL_CHANGES:
+    _add_change(changes, _GLOBAL_CHANGES[type_], None)
+  elif type_ in _PERSON_CHANGES:
+    person_ids = {obj.person_id}
+    person_ids.update(_get_old_person_ids(obj))
+    _add_change(changes, _PERSON_CHANGES[type_], person_ids)
+  elif type_ == "Person":
+    for stage in STAGES:
+      _add_change(changes, stage, [obj.id])
+  elif type_ == "Relationship":
+    # Changes of AssigneeType attributes also mark the relationship dirty
+    for end_type, end_id in ((obj.source_type, obj.source_id),
+                             (obj.destination_type, obj.destination_id)):
+      if end_type == "Person":
+        _add_change(changes, ASSIGNEES, [end_id])
+      else:
+        endpoints.add((end_type, end_id))
+
+
+def get_permission_changes(modified_objects):
+  """Get permission stages affected by modified objects.
+
+  This must be called before the changes are committed, while deleted objects
+  can still be read. People replaced in person_id of dirty objects are
+  affected as well.
+
+  Args:
+    modified_objects: ggrc.models.cache.Cache with new, dirty and deleted
+      objects.
+  Returns:
+    dict of stage names to sets of affected user ids or None for all users.
+  """
+  changes = {}
+  endpoints = set()
+  objects = (list(modified_objects.new) + list(modified_objects.dirty) +
+             list(modified_objects.deleted))
+  for obj in objects:
+    _add_object_changes(changes, endpoints, obj)
+  for stage, person_id in db.session.info.pop(_OLD_PEOPLE_KEY, ()):
+    _add_change(changes, stage, [person_id])
+  if endpoints:
+    _add_change(changes, ASSIGNEES, _get_assignees(endpoints))
+    if _has_contexts(endpoints):
+      _add_change(changes, ROLES, None)
+  return changes
+
+
+def get_keys(cache, user_id):
+  """Get keys of cached permission stages of a user.
+
+  Missing versions are initialized with the current time in milliseconds, so
+  that an evicted version does not reuse the keys of an older value.
+
+  Returns:
+    dict of stage names to keys, stages without versions are omitted.
+  """
+  version_keys = [get_version_key(stage, user_id) for stage in STAGES]
+  version_keys.extend(get_version_key(stage) for stage in STAGES)
+  versions = cache.get_multi(version_keys)
+  missing = [key for key in version_keys if key not in versions]
+  if missing:
+    initial = int(time.time() * 1000)
+    cache.add_multi({key: initial for key in missing})
+    versions.update(cache.get_multi(missing))
+  keys = {}
+  for stage in STAGES:
+    global_version = versions.get(get_version_key(stage))
+    user_version = versions.get(get_version_key(stage, user_id))
+    if global_version is not None and user_version is not None:
+      keys[stage] = get_key(user_id, stage,
+                            "{}.{}".format(global_version, user_version))
+  return keys
+
+
+def dumps(permissions):
+  """Serialize permissions dict for memcache."""
+  return zlib.compress(marshal.dumps(permissions))
+
+
+def loads(data):
+  """Deserialize permissions dict stored with dumps."""
+  return marshal.loads(zlib.decompress(data))
+
+
+def record_stats(hits, misses, rebuild_times):
+  """Report cache hits, misses and stage rebuild times to benchmark stats.
+
+  Args:
+    hits: number of stages found in the cache.
+    misses: number of stages that were loaded.
+    rebuild_times: dict of stage names to load durations in seconds.
+  """
+  if not settings.BENCHMARK_STATS:
+    return
+  stats = benchmark_stats.stats
+  stats.increment("permissions cache > hit", hits)
+  stats.increment("permissions cache > miss", misses)
+  stats.add(("permissions cache > rebuild {}".format(stage), duration)
+            for stage, duration in rebuild_times.iteritems())
+
+
+def clear_permission_cache(changes=None):
+  """Invalidate cached permissions affected by changes or all of them.
+
+  Args:
+    changes: dict of stage names to sets of affected user ids or None for all
+      users, as returned by get_permission_changes. All cached permissions are
+      invalidated if changes are not given.
+  """
+  if not getattr(settings, 'MEMCACHE_MECHANISM', False):
+    return
+  if changes is None:
+    changes = dict.fromkeys(STAGES)
+  version_keys = set()
+  for stage, user_ids in changes.iteritems():
+    if user_ids is None:
+      version_keys.add(get_version_key(stage))
+    else:
+      version_keys.update(get_version_key(stage, user_id)
+                          for user_id in user_ids)
+  if version_keys:
+    # Missing versions are not created, they are initialized on next load
+    get_memcache_client().offset_multi(dict.fromkeys(version_keys, 1))
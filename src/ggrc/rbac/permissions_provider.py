@@ -142,123 +142,145 @@ _CONDITIONS_MAP = {
 }
 
 
-class DefaultUserPermissions(UserPermissions):
-  # super user, context_id 0 indicates all contexts
-  ADMIN_PERMISSION = Permission(
-      '__GGRC_ADMIN__',
-      '__GGRC_ALL__',
-      None,
-      0,
-  )
+ADMIN_ACTION = '__GGRC_ADMIN__'
+ALL_RESOURCES = '__GGRC_ALL__'
 
-  def _admin_permission_for_context(self, context_id):
-    """Create an admin permission object for the given context"""
-    return Permission(
-        self.ADMIN_PERMISSION.action,
-        self.ADMIN_PERMISSION.resource_type,
-        None,
-        context_id)
-
-  def _permission_match(self, permission, permissions):
-    """Check if the user has the given permission"""
-
-    if None in \
-        permissions\
-            .get(permission.action, {})\
-            .get(permission.resource_type, {})\
-            .get('contexts', []):
-      return True
-    return \
-        permission.resource_id in permissions\
-        .get(permission.action, {})\
-        .get(permission.resource_type, {})\
-        .get('resources', [])\
-        or permission.context_id in \
-        permissions\
-        .get(permission.action, {})\
-        .get(permission.resource_type, {})\
-        .get('contexts', [])\
-        or permission.context_id in \
-        permissions\
-        .get(permission.action, {})\
-        .get(self.ADMIN_PERMISSION.resource_type, {})\
-        .get('contexts', [])
 
-  @staticmethod
-  def _permissions():
-    """Returns request permission from the global scope"""
-    return getattr(g, '_request_permissions', {})
+class _CompiledEntry(object):
+  """Permissions of one action on one resource type."""
+  # pylint: disable=too-few-public-methods
 
-  def _is_allowed(self, permission):
-    permissions = self._permissions()
-    if permission.resource_type != '/admin' \
-       and permission.context_id \
-       and self._is_allowed(permission._replace(context_id=None)):
+  __slots__ = ("contexts", "resources", "all_contexts", "conditions")
+
+  def __init__(self, entry):
+    self.contexts = frozenset(entry.get('contexts', ()))
+    self.resources = frozenset(entry.get('resources', ()))
+    self.all_contexts = None in self.contexts
+    self.conditions = {
+        context_id: [(str(condition['condition']),
+                      _CONDITIONS_MAP.get(str(condition['condition'])),
+                      condition.get('terms') or {})
+                     for condition in conditions]
+        for context_id, conditions in entry.get('conditions', {}).items()
+    }
+
+
+_EMPTY_ENTRY = _CompiledEntry({})
+
+
+class CompiledPermissions(object):
+  """Permissions dict compiled into sets for constant time checks.
+
+  Args:
+    permissions: permissions dict as returned by load_permissions_for. The
+      dict is kept in ``source`` and must not be changed afterwards.
+  """
+
+  def __init__(self, permissions):
+    self.source = permissions
+    self._entries = {
+        (action, resource_type): _CompiledEntry(entry)
+        for action, resource_types in (permissions or {}).items()
+        if isinstance(resource_types, dict)
+        for resource_type, entry in resource_types.items()
+        if entry
+    }
+    admin = self.get_entry(ADMIN_ACTION, ALL_RESOURCES)
+    self.admin_contexts = admin.contexts
+    self.admin_conditions = admin.conditions.get(None, [])
+    self.is_admin = (admin.all_contexts or None in admin.resources or
+                     0 in admin.contexts)
+
+  def get_entry(self, action, resource_type):
+    return self._entries.get((action, resource_type), _EMPTY_ENTRY)
+
+  def has_entry(self, action, resource_type):
+    return (action, resource_type) in self._entries
+
+  def is_allowed(self, action, resource_type, resource_id, context_id):
+    """Check a permission on a resource type in a context.
+
+    A permission is granted by the resource type or all resources entries of
+    the action in the given context or in all contexts, by the resource id, or
+    by admin permissions for the context or for everything.
+    """
+    if self.is_admin or context_id in self.admin_contexts:
       return True
-    if self._permission_match(permission, permissions):
+    entry = self.get_entry(action, resource_type)
+    if (entry.all_contexts or context_id in entry.contexts or
+            resource_id in entry.resources):
       return True
-    if self._permission_match(self.ADMIN_PERMISSION, permissions):
+    all_resources = self.get_entry(action, ALL_RESOURCES)
+    if context_id in all_resources.contexts:
       return True
-    return self._permission_match(
-        self._admin_permission_for_context(permission.context_id),
-        permissions)
+    # Admin paths are checked only in their own context
+    return bool(resource_type != '/admin' and context_id and
+                all_resources.all_contexts)
 
   @staticmethod
-  def _check_conditions(instance, action, conditions):
+  def check_conditions(instance, action, conditions):
     """Check if any condition is valid for the instance."""
-    for condition in conditions:
-      func = _CONDITIONS_MAP[str(condition['condition'])]
-      terms = condition.setdefault('terms', {})
+    for name, func, terms in conditions:
+      if func is None:
+        raise KeyError(name)
       if func(instance, _current_action=action, **terms):
         return True
     return False
 
-  def _is_allowed_for(self, instance, action):
-    permissions = self._permissions()
-    # Check for admin permission
-    if self._permission_match(self.ADMIN_PERMISSION, permissions):
-      conditions = permissions[self.ADMIN_PERMISSION.action]\
-          .get(self.ADMIN_PERMISSION.resource_type)\
-          .get("conditions", {})\
-          .get(None, [])
-      if not conditions:
+  def is_allowed_for(self, instance, action):
+    """Check a permission on an instance."""
+    if self.is_admin:
+      if not self.admin_conditions:
         return True
-      return self._check_conditions(instance, action, conditions)
-    if (not permissions.get(action) or
-       not permissions[action].get(instance._inflector.model_singular)):
+      return self.check_conditions(instance, action, self.admin_conditions)
+    resource_type = instance._inflector.model_singular
+    if not self.has_entry(action, resource_type):
       return False
-    resources = self._permissions()\
-        .setdefault(action, {})\
-        .setdefault(instance._inflector.model_singular, {})\
-        .setdefault('resources', [])
-    contexts = self._permissions()\
-        .setdefault(action, {})\
-        .setdefault(instance._inflector.model_singular, {})\
-        .setdefault('contexts', [])
+    entry = self.get_entry(action, resource_type)
+    if instance.id in entry.resources:
+      return True
     # We can't use instance.context_id, because it requires the
     # object <-> context mapping to be created,
     # which isn't the case when creating objects
     context_id = None
     if hasattr(instance, 'context') and hasattr(instance.context, 'id'):
       context_id = instance.context.id
-    if instance.id in resources:
-      return True
-    no_context_conditions = self._permissions()\
-        .setdefault(action, {})\
-        .setdefault(instance._inflector.model_singular, {})\
-        .setdefault('conditions', {})\
-        .setdefault(None, [])
-
-    context_conditions = self._permissions()\
-        .setdefault(action, {})\
-        .setdefault(instance._inflector.model_singular, {})\
-        .setdefault('conditions', {})\
-        .setdefault(context_id, [])
-    conditions = no_context_conditions + context_conditions
+    conditions = (entry.conditions.get(None, []) +
+                  entry.conditions.get(context_id, []))
     # Check any conditions applied per resource
-    if (None in contexts or context_id in contexts) and not conditions:
+    if (entry.all_contexts or context_id in entry.contexts) and not conditions:
       return True
-    return self._check_conditions(instance, action, conditions)
+    return self.check_conditions(instance, action, conditions)
+
+
+class DefaultUserPermissions(UserPermissions):
+  # super user, context_id 0 indicates all contexts
+  ADMIN_PERMISSION = Permission(
+      ADMIN_ACTION,
+      ALL_RESOURCES,
+      None,
+      0,
+  )
+
+  @staticmethod
+  def _permissions():
+    """Returns request permission from the global scope"""
+    return getattr(g, '_request_permissions', {})
+
+  def _compiled_permissions(self):
+    """Get compiled permissions, compiling them once per permissions dict."""
+    permissions = self._permissions()
+    compiled = getattr(g, '_compiled_permissions', None)
+    if compiled is None or compiled.source is not permissions:
+      compiled = CompiledPermissions(permissions)
+      setattr(g, '_compiled_permissions', compiled)
+    return compiled
+
+  def _is_allowed(self, permission):
+    return self._compiled_permissions().is_allowed(*permission)
+
+  def _is_allowed_for(self, instance, action):
+    return self._compiled_permissions().is_allowed_for(instance, action)
 
   def is_allowed_create(self, resource_type, resource_id, context_id):
     """Whether or not the user is allowed to create a resource of the specified
@@ -305,7 +327,7 @@ class DefaultUserPermissions(UserPermissions):
     resource_type"""
     permissions = self._permissions()
 
-    if self._permission_match(self.ADMIN_PERMISSION, permissions):
+    if self._compiled_permissions().is_admin:
       return None
 
     # Get the list of resources for a given resource type and any
@@ -326,7 +348,7 @@ class DefaultUserPermissions(UserPermissions):
     #   permissions are expected (e.g. that every user has ADMIN_PERMISSION).
     permissions = self._permissions()
 
-    if self._permission_match(self.ADMIN_PERMISSION, permissions):
+    if self._compiled_permissions().is_admin:
       return None
 
     # Get the list of contexts for a given resource type and any
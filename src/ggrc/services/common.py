@@ -6,6 +6,7 @@
 resources.
 """
 
+import base64
 import datetime
 import hashlib
 import itertools
@@ -17,12 +18,15 @@ from exceptions import TypeError
 from wsgiref.handlers import format_date_time
 from urllib import urlencode
 
+from dateutil import parser as date_parser
+
 from flask import url_for, request, current_app, g, has_request_context
 from flask.views import View
 from flask.ext.sqlalchemy import Pagination
 import sqlalchemy.orm.exc
 from sqlalchemy import and_, or_
 from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.associationproxy import AssociationProxy
 from sqlalchemy.sql.expression import tuple_
 from werkzeug.exceptions import BadRequest, Forbidden
 
@@ -30,13 +34,17 @@ import ggrc.builder.json
 import ggrc.models
 from ggrc import db, utils
 from ggrc.utils import as_json, benchmark
+from ggrc.utils import temporary_tables
 from ggrc.fulltext import get_indexer
+from ggrc.fulltext import outbox as fulltext_outbox
 from ggrc.login import get_current_user_id, get_current_user
 from ggrc.models.cache import Cache
 from ggrc.models.event import Event
 from ggrc.models.revision import Revision
 from ggrc.models.exceptions import ValidationError, translate_message
 from ggrc.rbac import permissions, context_query_filter
+from ggrc.rbac.permissions_cache import clear_permission_cache
+from ggrc.rbac.permissions_cache import get_permission_changes
 from ggrc.services.attribute_query import AttributeQueryBuilder
 from ggrc.services import signals
 from ggrc.models.background_task import BackgroundTask, create_task
@@ -190,6 +198,8 @@ def update_memcache_before_commit(context, modified_objects, expiry_time):
   context.cache_manager = _get_cache_manager()
 
   if modified_objects is not None:
+    context.cache_manager.permission_changes = get_permission_changes(
+        modified_objects)
     if len(modified_objects.new) > 0:
       memcache_mark_for_deletion(context, modified_objects.new.items())
 
@@ -260,7 +270,7 @@ def update_memcache_after_commit(context):
     if delete_result is not True:
       logger.error("CACHE: Failed to remove status entries from cache")
 
-  clear_permission_cache()
+  clear_permission_cache(cache_manager.permission_changes)
   cache_manager.clear_cache()
 
 
@@ -309,19 +319,35 @@ def get_modified_objects(session):
     return None
 
 
+def queue_index_update(session, cache):
+  """Queue fulltext index updates for cached objects if outbox is enabled.
+
+  This must be called before the commit so that queued updates are saved in
+  the same transaction as the changes.
+  """
+  if fulltext_outbox.is_enabled():
+    fulltext_outbox.enqueue_modified_objects(session, cache)
+
+
 def update_index(session, cache):
-  """Update fulltext index records for cached objects."""
+  """Update fulltext index records for cached objects.
+
+  Nothing is done if index updates are queued in the fulltext outbox.
+  """
   from ggrc.snapshotter.indexer import reindex_snapshots
   from ggrc.fulltext.mixin import Indexed
-  if cache is None:
+  if cache is None or fulltext_outbox.is_enabled():
     return
   indexer = get_indexer()
   reindex_snapshots_list = []
+  not_indexed_objs = []
   for obj in itertools.chain(cache.new, cache.dirty):
     if obj.type == "Snapshot":
       reindex_snapshots_list.append(obj.id)
     elif not isinstance(obj, Indexed):
-      indexer.update_record(indexer.fts_record_for(obj), commit=False)
+      not_indexed_objs.append(obj)
+  for record in indexer.fts_records_for(not_indexed_objs):
+    indexer.update_record(record, commit=False)
   for obj in cache.deleted:
     indexer.delete_record(obj.id, obj.__class__.__name__, commit=False)
   session.commit()
@@ -331,17 +357,29 @@ def update_index(session, cache):
     reindex_snapshots(reindex_snapshots_list)
 
 
-def _revision_generator(user_id, action, objects):
+def _get_log_json(obj, log_json_cache):
+  """Get log_json of an object, computing it once for every logged event."""
+  if obj not in log_json_cache:
+    log_json_cache[obj] = obj.log_json()
+  return log_json_cache[obj]
+
+
+def _revision_generator(user_id, action, objects, log_json_cache):
   for obj in objects:
-    yield Revision(obj, user_id, action, obj.log_json())
+    yield Revision.get_row(obj, user_id, action,
+                           _get_log_json(obj, log_json_cache))
 
 
-def _get_log_revisions(current_user_id, obj=None, force_obj=False):
-  """Generate and return revisions for all cached objects."""
+def _get_log_revisions(current_user_id, obj=None, force_obj=False,
+                       forced_objects=()):
+  """Generate and return revision rows for all cached objects."""
   revisions = []
   cache = get_cache()
   if not cache:
     return revisions
+  # Objects can get several revisions in a single event, for instance an
+  # ownable that is also dirty, so log_json is computed only once per object.
+  log_json_cache = {}
   owner_modified_objects = []
   folder_modified_objects = []
   all_edited_objects = itertools.chain(cache.new, cache.dirty, cache.deleted)
@@ -351,40 +389,48 @@ def _get_log_revisions(current_user_id, obj=None, force_obj=False):
     if o.type == "ObjectFolder" and o.folderable:
       folder_modified_objects.append(o.folderable)
   revisions.extend(_revision_generator(
-      current_user_id, "created", cache.new
+      current_user_id, "created", cache.new, log_json_cache
+  ))
+  revisions.extend(_revision_generator(
+      current_user_id, "modified", cache.dirty, log_json_cache
   ))
   revisions.extend(_revision_generator(
-      current_user_id, "modified", cache.dirty
+      current_user_id, "modified", owner_modified_objects, log_json_cache
   ))
   revisions.extend(_revision_generator(
-      current_user_id, "modified", owner_modified_objects
+      current_user_id, "modified", folder_modified_objects, log_json_cache
   ))
+  forced_objects = list(forced_objects)
+  if force_obj and obj is not None:
+    forced_objects.append(obj)
+  # If the ``obj`` has been updated, but only its custom attributes have
+  # been changed, then this object will not be added into
+  # ``cache.dirty set``. So that its revision will not be created.
+  # The ``force_obj`` flag solves the issue, but in a bit dirty way.
   revisions.extend(_revision_generator(
-      current_user_id, "modified", folder_modified_objects
+      current_user_id, "modified",
+      [o for o in forced_objects if o not in cache.dirty], log_json_cache
   ))
-  if force_obj and obj is not None and obj not in cache.dirty:
-    # If the ``obj`` has been updated, but only its custom attributes have
-    # been changed, then this object will not be added into
-    # ``cache.dirty set``. So that its revision will not be created.
-    # The ``force_obj`` flag solves the issue, but in a bit dirty way.
-    revision = Revision(obj, current_user_id, 'modified', obj.log_json())
-    revisions.append(revision)
   revisions.extend(_revision_generator(
-      current_user_id, "deleted", cache.deleted
+      current_user_id, "deleted", cache.deleted, log_json_cache
   ))
   return revisions
 
 
 def log_event(session, obj=None, current_user_id=None, flush=True,
-              force_obj=False):
+              force_obj=False, forced_objects=()):
   """Logs an event on object `obj`.
 
+  Only the event is added to the session, its revisions are inserted with a
+  single executemany statement once the event id is known.
+
   Args:
     session: Current SQLAlchemy session (db.session)
     obj: object on which some operation took place
     current_user_id: ID of the user performing operation
     flush: If set to true, flush the session at the start
     force_obj: Used in case of custom attribute changes to force revision write
+    forced_objects: Objects that get a revision like `obj` with force_obj
   Returns:
     Uncommitted models.Event instance
   """
@@ -393,7 +439,8 @@ def log_event(session, obj=None, current_user_id=None, flush=True,
     session.flush()
   if current_user_id is None:
     current_user_id = get_current_user_id()
-  revisions = _get_log_revisions(current_user_id, obj=obj, force_obj=force_obj)
+  revisions = _get_log_revisions(current_user_id, obj=obj, force_obj=force_obj,
+                                 forced_objects=forced_objects)
   if obj is None:
     resource_id = 0
     resource_type = None
@@ -411,28 +458,23 @@ def log_event(session, obj=None, current_user_id=None, flush=True,
         resource_id=resource_id,
         resource_type=resource_type,
         context_id=context_id)
-    event.revisions = revisions
     session.add(event)
+    session.flush([event])
+    for revision in revisions:
+      revision["event_id"] = event.id
+    with benchmark("Insert {} revisions".format(len(revisions))):
+      session.execute(Revision.__table__.insert(), revisions)
   return event
 
 
-def clear_permission_cache():
-  if not getattr(settings, 'MEMCACHE_MECHANISM', False):
-    return
-  cache = _get_cache_manager().cache_object.memcache_client
-  cached_keys_set = cache.get('permissions:list') or set()
-  cached_keys_set.add('permissions:list')
-  # We delete all the cached user permissions as well as
-  # the permissions:list value itself
-  cache.delete_multi(cached_keys_set)
-
-
 class ModelView(View):
   """Basic view handler for all models"""
   # pylint: disable=protected-access
   # access to _sa_class_manager is needed for fetching the right mapper
   DEFAULT_PAGE_SIZE = 20
   MAX_PAGE_SIZE = 100
+  # __fields published without loading any model attributes
+  PROJECTION_PROPERTIES = frozenset(['type', 'selfLink', 'viewLink'])
   pk = 'id'
   pk_type = 'int'
 
@@ -582,7 +624,8 @@ class ModelView(View):
       resources = permissions.read_resources_for(self.model.__name__)
       filter_expr = context_query_filter(self.model.context_id, contexts)
       if resources:
-        filter_expr = or_(filter_expr, self.model.id.in_(resources))
+        filter_expr = or_(filter_expr,
+                          temporary_tables.in_ids(self.model.id, resources))
       query = query.filter(filter_expr)
       for j in joinlist:
         j_class = j.property.mapper.class_
@@ -749,9 +792,15 @@ class Resource(ModelView):
             else:
               return self.collection_post()
           elif method == 'PUT':
-            return self.put(*args, **kwargs)
+            if self.pk in kwargs and kwargs[self.pk] is not None:
+              return self.put(*args, **kwargs)
+            else:
+              return self.collection_put()
           elif method == 'DELETE':
-            return self.delete(*args, **kwargs)
+            if self.pk in kwargs and kwargs[self.pk] is not None:
+              return self.delete(*args, **kwargs)
+            else:
+              return self.collection_delete()
           else:
             raise NotImplementedError()
         except (IntegrityError, ValidationError, ValueError) as err:
@@ -893,6 +942,8 @@ class Resource(ModelView):
     with benchmark("Update memcache before commit for collection PUT"):
       update_memcache_before_commit(
           self.request, modified_objects, CACHE_EXPIRY_COLLECTION)
+    with benchmark("Queue index update"):
+      queue_index_update(db.session, modified_objects)
     with benchmark("Commit"):
       db.session.commit()
     with benchmark("Query for object"):
@@ -950,6 +1001,8 @@ class Resource(ModelView):
       with benchmark("Update memcache before commit for collection DELETE"):
         update_memcache_before_commit(
             self.request, modified_objects, CACHE_EXPIRY_COLLECTION)
+      with benchmark("Queue index update"):
+        queue_index_update(db.session, modified_objects)
       with benchmark("Commit"):
         db.session.commit()
       with benchmark("Update index"):
@@ -971,17 +1024,255 @@ class Resource(ModelView):
     task.finish("Success", result)
     return result
 
+  def _get_bulk_objects(self, sources):
+    """Load all objects referenced by ids in bulk request items."""
+    ids = {src.get('id') for src in sources if isinstance(src, dict)}
+    ids = [id_ for id_ in ids if isinstance(id_, (int, long))]
+    if not ids:
+      return {}
+    if hasattr(self.model, 'eager_query'):
+      query = self.model.eager_query()
+    else:
+      query = db.session.query(self.model)
+    return {obj.id: obj for obj in query.filter(self.model.id.in_(ids))}
+
+  def _get_bulk_item(self, src, objects):
+    """Get the object for a bulk request item and check its version.
+
+    Instead of the If-Match and If-Unmodified-Since headers of single object
+    requests, every item must contain the updated_at value of the object.
+
+    Returns:
+      tuple of the object and None, or None and an error (status, message).
+    """
+    if not isinstance(src, dict) or \
+       not isinstance(src.get('id'), (int, long)):
+      return None, (400, 'Required attribute "id" not found')
+    obj = objects.get(src['id'])
+    if obj is None:
+      return None, (404, self.not_found_message())
+    if 'updated_at' not in src:
+      return None, (428, 'Missing attribute: updated_at')
+    try:
+      updated_at = date_parser.parse(src['updated_at']).replace(tzinfo=None)
+    except (AttributeError, TypeError, ValueError):
+      return None, (400, 'Invalid attribute "updated_at"')
+    if updated_at != self.modified_at(obj):
+      return None, (409, "The resource could not be updated due to a "
+                         "conflict with the current state on the server. "
+                         "Please resolve the conflict by refreshing the "
+                         "resource.")
+    return obj, None
+
+  def _commit_bulk_changes(self, forced_objects=()):
+    """Log, cache and commit changes of a bulk request.
+
+    Returns:
+      the single Event logged for all changed objects and the modified
+      objects for _update_after_bulk_commit.
+    """
+    with benchmark("Get modified objects"):
+      modified_objects = get_modified_objects(db.session)
+    with benchmark("Log event for all objects"):
+      event = log_event(db.session, flush=False,
+                        forced_objects=forced_objects)
+    with benchmark("Update memcache before commit for bulk request"):
+      update_memcache_before_commit(
+          self.request, modified_objects, CACHE_EXPIRY_COLLECTION)
+    with benchmark("Queue index update"):
+      queue_index_update(db.session, modified_objects)
+    with benchmark("Commit collection"):
+      db.session.commit()
+    return event, modified_objects
+
+  def _update_after_bulk_commit(self, modified_objects):
+    """Update the index and memcache after changes of a bulk request."""
+    with benchmark("Update index"):
+      update_index(db.session, modified_objects)
+    with benchmark("Update memcache after commit for bulk request"):
+      update_memcache_after_commit(self.request)
+
+  def _make_bulk_response(self, res):
+    """Make a response with a (status, body) pair for every item.
+
+    The response status is 200 if any item was saved, failed items are only
+    reported by their own status. Otherwise it is the status of the first
+    failed item.
+    """
+    headers = {"Content-Type": "application/json"}
+    errors = [(status, body) for status, body in res
+              if not 200 <= status < 300]
+    status = 200
+    if errors:
+      if len(errors) == len(res):
+        status = errors[0][0]
+      headers["X-Flash-Error"] = ' || '.join(error for _, error in errors)
+    return current_app.make_response((self.as_json(res), status, headers))
+
+  def _get_bulk_body(self, max_items=None):
+    """Get the list of items from a bulk request body.
+
+    Args:
+      max_items: maximum allowed number of items, unlimited by default.
+    """
+    body = self.request.json
+    if not isinstance(body, list):
+      raise BadRequest('Request body must be a list of objects.')
+    if max_items is not None and len(body) > max_items:
+      raise BadRequest(
+          'Request body must have at most {} objects.'.format(max_items))
+    return body
+
+  def collection_put(self):
+    """Update a list of objects with a single commit.
+
+    The body is a list of wrapped objects as in a collection POST. Items that
+    are missing, forbidden or outdated get their own error status and all
+    other items are saved together and logged with a single Event.
+    Lists longer than BULK_PUT_MAX_ITEMS are rejected.
+    """
+    if self.request.mimetype != 'application/json':
+      return current_app.make_response(
+          ('Content-Type must be application/json', 415, []))
+    body = self._get_bulk_body(settings.BULK_PUT_MAX_ITEMS)
+    root_attribute = self.model._inflector.table_singular
+    sources = [wrapped_src.get(root_attribute)
+               if isinstance(wrapped_src, dict) else None
+               for wrapped_src in body]
+    res = [None] * len(body)
+    updated = []
+    committed = False
+    with benchmark("Build stub query cache"):
+      self._build_request_stub_cache(body)
+    try:
+      with benchmark("Query for objects"):
+        objects = self._get_bulk_objects(sources)
+      with benchmark("Update objects"):
+        for index, src in enumerate(sources):
+          obj, error = self._get_bulk_item(src, objects)
+          if error is None:
+            try:
+              self._check_put_permissions(
+                  obj, self.get_context_id_from_json(src))
+            except Forbidden as exc:
+              error = (exc.code, exc.description)
+          if error is not None:
+            res[index] = error
+            continue
+          self.json_update(obj, src)
+          obj.modified_by_id = get_current_user_id()
+          db.session.add(obj)
+          if hasattr(obj, "validate_custom_attributes"):
+            obj.validate_custom_attributes()
+          signals.Restful.model_put.send(
+              obj.__class__, obj=obj, src=src, service=self)
+          set_ids_for_new_custom_attributes(obj)
+          updated.append((index, obj, src))
+      if updated:
+        event, modified_objects = self._commit_bulk_changes(
+            forced_objects=[updated_obj for _, updated_obj, _ in updated])
+        committed = True
+        self._update_after_bulk_commit(modified_objects)
+        with benchmark("Send PUT - after commit events"):
+          for _, obj, src in updated:
+            signals.Restful.model_put_after_commit.send(
+                obj.__class__, obj=obj, src=src, service=self, event=event)
+          db.session.commit()
+        with benchmark("Serialize objects"):
+          for index, obj, _ in updated:
+            res[index] = (200, self.object_for_json(obj))
+    except (IntegrityError, ValidationError, ValueError) as error:
+      db.session.rollback()
+      if committed:
+        # The objects are already saved, so the error of the after commit
+        # handlers fails the request as in a single PUT.
+        raise
+      # Nothing was saved, so every item without an error fails the same way
+      error = self._make_error_from_exception(error)
+      res = [error if item_res is None else item_res for item_res in res]
+    finally:
+      if hasattr(g, "referenced_objects"):
+        delattr(g, "referenced_objects")
+    return self._make_bulk_response(res)
+
+  def _can_delete(self, obj):
+    """Check if the current user can delete the object."""
+    model_name = self.model.__name__
+    return (
+        (permissions.is_allowed_delete(model_name, obj.id, obj.context_id) or
+         permissions.has_conditions("delete", model_name)) and
+        permissions.is_allowed_delete_for(obj)
+    )
+
+  def collection_delete(self):
+    """Delete a list of objects with a single commit.
+
+    The body is a list of dicts with id and updated_at of the objects.
+    Items that are missing, forbidden or outdated get their own error status
+    and all other items are deleted together and logged with a single Event.
+    Lists longer than BULK_DELETE_MAX_ITEMS are rejected.
+    """
+    body = self._get_bulk_body(settings.BULK_DELETE_MAX_ITEMS)
+    res = [None] * len(body)
+    deleted = []
+    committed = False
+    try:
+      with benchmark("Query for objects"):
+        objects = self._get_bulk_objects(body)
+      with benchmark("Delete objects"):
+        for index, src in enumerate(body):
+          obj, error = self._get_bulk_item(src, objects)
+          if error is None and not self._can_delete(obj):
+            error = (Forbidden.code, Forbidden.description)
+          if error is not None:
+            res[index] = error
+            continue
+          db.session.delete(obj)
+          signals.Restful.model_deleted.send(
+              obj.__class__, obj=obj, service=self)
+          deleted.append((index, obj))
+      if deleted:
+        event, modified_objects = self._commit_bulk_changes()
+        committed = True
+        self._update_after_bulk_commit(modified_objects)
+        with benchmark("Send DELETEd - after commit events"):
+          for _, obj in deleted:
+            signals.Restful.model_deleted_after_commit.send(
+                obj.__class__, obj=obj, service=self, event=event)
+        with benchmark("Serialize objects"):
+          for index, obj in deleted:
+            res[index] = (200, self.object_for_json(obj))
+    except (IntegrityError, ValidationError, ValueError) as error:
+      db.session.rollback()
+      if committed:
+        # The objects are already deleted, so the error of the after commit
+        # handlers fails the request as in a single DELETE.
+        raise
+      # Nothing was saved, so every item without an error fails the same way
+      error = self._make_error_from_exception(error)
+      res = [error if item_res is None else item_res for item_res in res]
+    return self._make_bulk_response(res)
+
   def has_cache(self):
     return getattr(settings, 'MEMCACHE_MECHANISM', False)
 
-  def apply_paging(self, matches_query):
+  def apply_paging(self, matches_query, total=None):
+    """Get a page of matches and the paging object for the response.
+
+    Args:
+      matches_query: query of all matches.
+      total: number of all matches if it is already known.
+    """
     page_size = min(
         int(request.args.get('__page_size', self.DEFAULT_PAGE_SIZE)),
         self.MAX_PAGE_SIZE)
+    if '__cursor' in request.args:
+      return self.apply_cursor_paging(matches_query, page_size, total)
     if '__page_only' in request.args:
       page_number = int(request.args.get('__page', 0))
       matches = []
-      total = matches_query.count()
+      if total is None:
+        total = matches_query.count()
     else:
       page_number = int(request.args.get('__page', 1))
       matches = matches_query\
@@ -990,7 +1281,7 @@ class Resource(ModelView):
           .all()
       if page_number == 1 and len(matches) < page_size:
         total = len(matches)
-      else:
+      elif total is None:
         total = matches_query.count()
     page = Pagination(
         matches_query, page_number, page_size, total, matches)
@@ -999,6 +1290,75 @@ class Resource(ModelView):
     }
     return matches, collection_extras
 
+  def _get_cursor_columns(self):
+    """Get columns that define the default order of matches."""
+    mapper = self.model._sa_class_manager.mapper
+    if hasattr(mapper.c, 'updated_at'):
+      return [self.modified_attr, self.model.id]
+    return [self.model.id]
+
+  def _encode_cursor(self, match):
+    """Encode the position of a match into an opaque cursor."""
+    values = [getattr(match, column.key)
+              for column in self._get_cursor_columns()]
+    if len(values) > 1 and values[0] is not None:
+      values[0] = values[0].isoformat()
+    return base64.urlsafe_b64encode(json.dumps(values))
+
+  def _get_cursor_filter(self, cursor):
+    """Get filter for matches that come after the cursor position.
+
+    Matches without a modification time are sorted after all others, as
+    MySQL sorts NULL values last in a descending order.
+    """
+    columns = self._get_cursor_columns()
+    try:
+      values = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+      if len(values) != len(columns):
+        raise ValueError("Wrong number of cursor values")
+      if len(values) > 1 and values[0] is not None:
+        values[0] = date_parser.parse(values[0])
+    except (AttributeError, TypeError, ValueError):
+      raise BadRequest("Invalid __cursor value")
+    if len(columns) == 1:
+      return columns[0] < values[0]
+    if values[0] is None:
+      return and_(columns[0].is_(None), columns[1] < values[1])
+    return or_(columns[0] < values[0],
+               and_(columns[0] == values[0], columns[1] < values[1]),
+               columns[0].is_(None))
+
+  def apply_cursor_paging(self, matches_query, page_size, total=None):
+    """Get a page of matches that follow the position in __cursor.
+
+    The page is found by seeking past the (updated_at, id) values of the last
+    match on the previous page instead of using an offset, so deep pages are
+    as fast as the first one. An empty cursor returns the first page. The
+    total number of matches is only counted when __total is requested.
+    """
+    if '__sort' in request.args or '__limit' in request.args:
+      raise BadRequest("__cursor can not be combined with __sort or __limit")
+
+    def cursor_url(cursor):
+      args = dict([(k, unicode(v)) for k, v in request.args.items()])
+      args['__cursor'] = cursor
+      return self.url_for() + '?' + urlencode(utils.encoded_dict(args))
+
+    cursor = request.args['__cursor']
+    query = matches_query
+    if cursor:
+      query = query.filter(self._get_cursor_filter(cursor))
+    matches = query.limit(page_size + 1).all()
+    paging_obj = {'first': cursor_url('')}
+    if len(matches) > page_size:
+      matches = matches[:page_size]
+      paging_obj['next'] = cursor_url(self._encode_cursor(matches[-1]))
+    if '__total' in request.args:
+      if total is None:
+        total = matches_query.count()
+      paging_obj['total'] = total
+    return matches, {'paging': paging_obj}
+
   def get_matched_resources(self, matches):
     cache_objs = {}
     if self.has_cache():
@@ -1038,54 +1398,129 @@ class Resource(ModelView):
       )
       matches_query = self.get_collection_matches(
           self.model, filter_by_contexts)
+    with benchmark("dispatch_request > collection_get > Check validator"):
+      collection_etag, total = None, None
+      if filter_by_contexts:
+        collection_etag, total = self.get_collection_etag(matches_query)
+      not_modified = self._not_modified_response(collection_etag)
+      if not_modified is not None:
+        return not_modified
     with benchmark("dispatch_request > collection_get > Query Data"):
-      if '__page' in request.args or '__page_only' in request.args:
-        with benchmark("Query matches with paging"):
-          matches, extras = self.apply_paging(matches_query)
-      else:
-        with benchmark("Query matches"):
-          matches = matches_query.all()
-          extras = {}
+      matches, extras = self._query_collection_matches(matches_query, total)
     with benchmark("dispatch_request > collection_get > Matched resources"):
-      cache_op = None
-      if '__stubs_only' in request.args:
-        objs = [{
-            'id': m[0],
-            'type': m[1],
-            'href': utils.url_for(m[1], id=m[0]),
-            'context_id': m[2]
-        } for m in matches]
-
-      else:
-        cache_objs, database_objs = self.get_matched_resources(matches)
-        objs = {}
-        objs.update(cache_objs)
-        objs.update(database_objs)
-
-        objs = [objs[m] for m in matches if m in objs]
-        with benchmark("Filter resources based on permissions"):
-          objs = filter_resource(objs)
-
-        cache_op = 'Hit' if len(cache_objs) > 0 else 'Miss'
-    with benchmark("dispatch_request > collection_get > Create Response"):
-      # Return custom fields specified via `__fields=id,title,description` etc.
-      # TODO this can be optimized by filter_resource() not retrieving
-      # the other fields to being with
+      custom_fields = None
       if '__fields' in request.args:
         custom_fields = request.args['__fields'].split(',')
+      objs, cache_op = self._get_collection_objs(
+          matches, custom_fields, filter_by_contexts)
+    with benchmark("dispatch_request > collection_get > Create Response"):
+      # Return custom fields specified via `__fields=id,title,description` etc.
+      if custom_fields:
         objs = [{f: o[f] for f in custom_fields if f in o} for o in objs]
       with benchmark("Serialize collection"):
         collection = self.build_collection_representation(
             objs, extras=extras)
 
-      if 'If-None-Match' in self.request.headers and \
-         self.request.headers['If-None-Match'] == etag(collection):
-        return current_app.make_response((
-            '', 304, [('Etag', etag(collection))]))
+      if collection_etag is None:
+        collection_etag = etag(collection)
+        not_modified = self._not_modified_response(collection_etag)
+        if not_modified is not None:
+          return not_modified
 
       with benchmark("Make response"):
         return self.json_success_response(
-            collection, self.collection_last_modified(), cache_op=cache_op)
+            collection, self.collection_last_modified(), cache_op=cache_op,
+            response_etag=collection_etag)
+
+  def _not_modified_response(self, collection_etag):
+    """Get a 304 response if the client has the collection with the etag."""
+    if collection_etag is None or \
+       self.request.headers.get('If-None-Match') != collection_etag:
+      return None
+    return current_app.make_response(('', 304, [('Etag', collection_etag)]))
+
+  def _query_collection_matches(self, matches_query, total=None):
+    """Get matches of the collection and extras with paging information."""
+    if '__page' in request.args or '__page_only' in request.args or \
+       '__cursor' in request.args:
+      with benchmark("Query matches with paging"):
+        return self.apply_paging(matches_query, total)
+    with benchmark("Query matches"):
+      return matches_query.all(), {}
+
+  def _get_collection_objs(self, matches, custom_fields, filter_by_contexts):
+    """Get readable resources or stubs of the matches.
+
+    Returns:
+      list of resources and the cache operation for the response.
+    """
+    if '__stubs_only' in request.args:
+      return [{
+          'id': m[0],
+          'type': m[1],
+          'href': utils.url_for(m[1], id=m[0]),
+          'context_id': m[2]
+      } for m in matches], None
+
+    if custom_fields and filter_by_contexts:
+      # Partial objects are never read from or stored in memcache.
+      cache_objs = {}
+      database_objs = self.get_resources_from_database(
+          matches, custom_fields)
+    else:
+      cache_objs, database_objs = self.get_matched_resources(matches)
+    objs = {}
+    objs.update(cache_objs)
+    objs.update(database_objs)
+
+    objs = [objs[m] for m in matches if m in objs]
+    with benchmark("Filter resources based on permissions"):
+      objs = filter_resource(objs)
+
+    return objs, 'Hit' if len(cache_objs) > 0 else 'Miss'
+
+  def get_collection_etag(self, matches_query):
+    """Get an etag for the collection without loading its objects.
+
+    The etag is built from the number of matched objects, their latest
+    modification time and id sum, the id of the latest event, which are all
+    read with one aggregate query, and from the read permissions of the
+    current user for the model. Every write request logs an event, so edits
+    of related data such as custom attribute values also change the etag, as
+    do several edits within the same second.
+
+    Objects included with __include are filtered by the read permissions for
+    their own models, so the etag of such responses is computed from the
+    response.
+
+    Returns:
+      etag string and number of matches, or None for both if the etag can
+      not be computed without loading the objects.
+    """
+    if '__include' in request.args:
+      return None, None
+    matches = matches_query.subquery()
+    if 'updated_at' not in matches.c:
+      return None, None
+    last_event_id = db.session.query(
+        sqlalchemy.func.max(Event.id)).as_scalar()
+    count, last_modified, id_sum, last_event_id = db.session.query(
+        sqlalchemy.func.count(),
+        sqlalchemy.func.max(matches.c.updated_at),
+        sqlalchemy.func.sum(matches.c.id),
+        last_event_id,
+    ).select_from(matches).one()
+    model_name = self.model.__name__
+    contexts = permissions.read_contexts_for(model_name)
+    resources = permissions.read_resources_for(model_name)
+    permissions_key = (
+        get_current_user_id(),
+        sorted(contexts) if contexts is not None else None,
+        sorted(resources) if resources is not None else None,
+    )
+    collection_etag = etag((model_name, count, last_modified, id_sum,
+                            last_event_id, permissions_key))
+    return collection_etag, count
 
   def get_resources_from_cache(self, matches):
     """Get resources from cache for specified matches"""
@@ -1329,6 +1764,8 @@ class Resource(ModelView):
       for obj in objects:
         object_for_json = {} if no_result else self.object_for_json(obj)
         res.append((201, object_for_json))
+    with benchmark("Queue index update"):
+      queue_index_update(db.session, modified_objects)
     with benchmark("Commit collection"):
       db.session.commit()
     with benchmark("Update index"):
@@ -1442,7 +1879,7 @@ class Resource(ModelView):
         url,
         defaults={cls.pk: None},
         view_func=view_func,
-        methods=['GET', 'POST'])
+        methods=['GET', 'POST', 'PUT', 'DELETE'])
     app.add_url_rule(
         '{url}/<{type}:{pk}>'.format(url=url, type=cls.pk_type, pk=cls.pk),
         view_func=view_func,
@@ -1498,19 +1935,67 @@ class Resource(ModelView):
     paging_obj['total'] = paging.total
     return paging_obj
 
-  def get_resources_from_database(self, matches):
+  def get_projection_query(self, fields):
+    """Get a query that loads only the requested model attributes.
+
+    Requested columns are loaded with the objects and requested relationships
+    and association proxies with one subquery each. Other fields can read any
+    attribute, so with them the full eager query of the model is used.
+    """
+    mapper = self.model._sa_class_manager.mapper
+    column_keys = {prop.key for prop in mapper.column_attrs}
+    load_columns = {'id', 'context_id'}
+    options = []
+    for field in fields:
+      attr = getattr(self.model, field, None)
+      if field in column_keys:
+        load_columns.add(field)
+      elif field in mapper.relationships:
+        prop = mapper.relationships[field]
+        load_columns.update(mapper.get_property_by_column(column).key
+                            for column in prop.local_columns)
+        options.append(sqlalchemy.orm.subqueryload(field))
+      elif isinstance(attr, AssociationProxy):
+        option = sqlalchemy.orm.subqueryload(attr.target_collection)
+        target_mapper = sqlalchemy.inspect(attr.target_class)
+        if attr.value_attr in target_mapper.relationships:
+          option = option.subqueryload(attr.value_attr)
+        options.append(option)
+      elif field not in self.PROJECTION_PROPERTIES:
+        return self.model.eager_query()
+    load_columns &= column_keys
+    return db.session.query(self.model).options(
+        sqlalchemy.orm.load_only(*load_columns), *options)
+
+  def get_resources_from_database(self, matches, fields=None):
+    """Get published resources for matches.
+
+    If fields are given, only those columns are loaded and only those
+    attributes are published.
+    """
     # FIXME: This is cheating -- `matches` should be allowed to be any model
     model = self.model
     ids = {m[0]: m for m in matches}
     with benchmark("Query database for matches"):
-      query = model.eager_query()
+      if fields:
+        query = self.get_projection_query(fields)
+      else:
+        query = model.eager_query()
       # We force the query here so that we can benchmark it
       objs = query.filter(model.id.in_(ids.keys())).all()
     with benchmark("Publish objects"):
       resources = {}
       includes = self.get_properties_to_include(request.args.get('__include'))
       for obj in objs:
-        resources[ids[obj.id]] = ggrc.builder.json.publish(obj, includes)
+        if fields:
+          resource = ggrc.builder.json.publish_fields(obj, fields, includes)
+          # filter_resource needs these even if they were not requested
+          resource.setdefault('id', obj.id)
+          resource.setdefault('type', obj.type)
+          resource.setdefault('context_id', getattr(obj, 'context_id', None))
+        else:
+          resource = ggrc.builder.json.publish(obj, includes)
+        resources[ids[obj.id]] = resource
     with benchmark("Publish representation"):
       ggrc.builder.json.publish_representation(resources)
     return resources
@@ -1550,10 +2035,11 @@ class Resource(ModelView):
     return format_date_time(time.mktime(timestamp.utctimetuple()))
 
   def json_success_response(self, response_object, last_modified,
-                            status=200, id=None, cache_op=None):
+                            status=200, id=None, cache_op=None,
+                            response_etag=None):
     headers = [
         ('Last-Modified', self.http_timestamp(last_modified)),
-        ('Etag', etag(response_object)),
+        ('Etag', response_etag or etag(response_object)),
         ('Content-Type', 'application/json'),
     ]
     if id is not None:
@@ -1580,81 +2066,145 @@ class ReadOnlyResource(Resource):
       raise NotImplementedError()
 
 
-def filter_resource(resource, depth=0, user_permissions=None):  # noqa
+class _ReadFilter(object):
+  """Read permission checks for many resources with shared lookups.
+
+  Whether a type is readable in a context does not depend on the resource
+  id, so it is checked once per (type, context) pair. Resources readable
+  outside of their contexts are checked against one id set per type.
+  """
+
+  def __init__(self, user_permissions):
+    self.user_permissions = user_permissions
+    self._allowed_contexts = {}
+    self._allowed_resources = {}
+    self._read_contexts = {}
+    self._instances = {}
+
+  def is_allowed_read(self, resource_type, resource_id, context_id):
+    """Check if the user can read the resource."""
+    key = (resource_type, context_id)
+    if key not in self._allowed_contexts:
+      self._allowed_contexts[key] = self.user_permissions.is_allowed_read(
+          resource_type, None, context_id)
+    if self._allowed_contexts[key]:
+      return True
+    return resource_id in self.read_resources_for(resource_type)
+
+  def read_resources_for(self, resource_type):
+    """Get ids of resources the user can read in any context."""
+    if resource_type not in self._allowed_resources:
+      resources = self.user_permissions.read_resources_for(resource_type)
+      self._allowed_resources[resource_type] = frozenset(resources or ())
+    return self._allowed_resources[resource_type]
+
+  def is_allowed_read_stub(self, stub):
+    """Check read access for a Relationship source or destination stub."""
+    if stub['type'] not in self._read_contexts:
+      contexts = self.user_permissions.read_contexts_for(stub['type'])
+      if contexts is not None:
+        contexts = frozenset(contexts)
+      self._read_contexts[stub['type']] = contexts
+    contexts = self._read_contexts[stub['type']]
+    if contexts is None:
+      # read_contexts_for returns None if the user has access to all the
+      # objects of this type. If the user doesn't have access to any object
+      # an empty list ([]) will be returned
+      return True
+    return (stub['context_id'] in contexts or
+            stub['id'] in self.read_resources_for(stub['type']))
+
+  def load_instances(self, resources):
+    """Load instances of all resources that Revisions point to.
+
+    Instances are loaded with one query per type instead of one query per
+    Revision.
+    """
+    ids_by_type = defaultdict(set)
+    for resource in resources:
+      if isinstance(resource, dict) and resource.get('type') == 'Revision':
+        ids_by_type[resource['resource_type']].add(resource['resource_id'])
+    for resource_type, ids in ids_by_type.iteritems():
+      res_model = getattr(ggrc.models.all_models, resource_type)
+      for instance in res_model.query.filter(res_model.id.in_(ids)):
+        self._instances[(resource_type, instance.id)] = instance
+
+  def is_allowed_read_revision(self, resource):
+    """Check read access for the instance of a Revision."""
+    key = (resource['resource_type'], resource['resource_id'])
+    if key not in self._instances:
+      res_model = getattr(ggrc.models.all_models, key[0])
+      self._instances[key] = res_model.query.get(key[1])
+    instance = self._instances[key]
+    return (instance is not None and
+            self.user_permissions.is_allowed_read_for(instance))
+
+
+def filter_resource(resource, depth=0, user_permissions=None):
   """
   Returns:
      The subset of resources which are readable based on user_permissions
   """
-
+  # pylint: disable=unused-argument
   if user_permissions is None:
     user_permissions = permissions.permissions_for(get_current_user())
+  read_filter = _ReadFilter(user_permissions)
+  is_creator = _is_creator()
+  if is_creator and isinstance(resource, (list, tuple)):
+    read_filter.load_instances(resource)
+  return _filter_resource(resource, read_filter, is_creator)
+
 
+def _get_resource_context_id(resource):
+  """Get the context id of a resource or its stub."""
+  if 'context' in resource:
+    if resource['context'] is None:
+      return None
+    return resource['context']['id']
+  assert 'context_id' in resource, "No context found for object"
+  return resource['context_id']
+
+
+def _is_resource_readable(resource, read_filter, is_creator):
+  """Check read permissions for a single resource without sub-resources."""
+  context_id = _get_resource_context_id(resource)
+  # In order to avoid loading full instances and using is_allowed_read_for,
+  # we are making a special test for the Creator here. Creator can only
+  # see relationship objects where he has read access on both source and
+  # destination. This is defined in Creator.py:220 file, but is_allowed_read
+  # can not check conditions without the full instance
+  if resource['type'] == "Relationship" and is_creator:
+    # Make a check for relationship objects that are a special case
+    # If object was deleted but relationship still exists
+    return all(not inst or read_filter.is_allowed_read_stub(inst)
+               for inst in (resource['source'], resource['destination']))
+  elif resource['type'] == "Revision" and is_creator:
+    # Make a check for revision objects that are a special case
+    return read_filter.is_allowed_read_revision(resource)
+  return read_filter.is_allowed_read(resource['type'],
+                                     resource['id'], context_id)
+
+
+def _filter_resource(resource, read_filter, is_creator):
+  """Filter resource and its sub-resources with shared permission lookups."""
   if isinstance(resource, (list, tuple)):
     filtered = []
     for sub_resource in resource:
-      filtered_sub_resource = filter_resource(
-          sub_resource, depth=depth + 1, user_permissions=user_permissions)
+      filtered_sub_resource = _filter_resource(
+          sub_resource, read_filter, is_creator)
       if filtered_sub_resource is not None:
         filtered.append(filtered_sub_resource)
     return filtered
   elif isinstance(resource, dict) and 'type' in resource:
     # First check current level
-    context_id = False
-    if 'context' in resource:
-      if resource['context'] is None:
-        context_id = None
-      else:
-        context_id = resource['context']['id']
-    elif 'context_id' in resource:
-      context_id = resource['context_id']
-    assert context_id is not False, "No context found for object"
-
-    # In order to avoid loading full instances and using is_allowed_read_for,
-    # we are making a special test for the Creator here. Creator can only
-    # see relationship objects where he has read access on both source and
-    # destination. This is defined in Creator.py:220 file, but is_allowed_read
-    # can not check conditions without the full instance
-    if resource['type'] == "Relationship" and _is_creator():
-      # Make a check for relationship objects that are a special case
-      can_read = True
-      for name in ('source', 'destination'):
-        inst = resource[name]
-        if not inst:
-          # If object was deleted but relationship still exists
-          continue
-        contexts = permissions.read_contexts_for(inst['type'])
-        if contexts is None:
-          # read_contexts_for returns None if the user has access to all the
-          # objects of this type. If the user doesn't have access to any object
-          # an empty list ([]) will be returned
-          continue
-        resources = permissions.read_resources_for(inst['type']) or []
-        if inst['context_id'] in contexts or inst['id'] in resources:
-          continue
-        can_read = False
-      if not can_read:
-        return None
-    elif resource['type'] == "Revision" and _is_creator():
-      # Make a check for revision objects that are a special case
-      res_model = getattr(ggrc.models.all_models, resource['resource_type'])
-      instance = res_model.query.get(resource['resource_id'])
-      if instance is None or\
-         not user_permissions.is_allowed_read_for(instance):
-        return None
-    else:
-      if not user_permissions.is_allowed_read(resource['type'],
-                                              resource['id'], context_id):
-        return None
+    if not _is_resource_readable(resource, read_filter, is_creator):
+      return None
     # Then, filter any typed keys
     for key, value in resource.items():
-      if key == 'context':
-        # Explicitly allow `context` objects to pass through
-        pass
-      else:
-        # Apply filtering to sub-resources
-        if isinstance(value, dict) and 'type' in value:
-          resource[key] = filter_resource(
-              value, depth=depth + 1, user_permissions=user_permissions)
+      # Explicitly allow `context` objects to pass through and apply
+      # filtering to sub-resources
+      if key != 'context' and isinstance(value, dict) and 'type' in value:
+        resource[key] = _filter_resource(value, read_filter, is_creator)
 
     return resource
   else:
@@ -66,7 +66,7 @@ def get_objects_by_query():
                         if result["last_modified"]]
   last_modified = max(last_modified_list) if last_modified_list else None
   collections = []
-  collection_fields = ["ids", "values", "count", "total"]
+  collection_fields = ["ids", "values", "count", "total", "debug"]
 
   for result in results:
     if last_modified is None:
@@ -3,6 +3,9 @@
 
 """This module contains special query helper class for query API."""
 
+import time
+
+from ggrc import settings
 from ggrc.builder import json
 from ggrc.converters.query_helper import QueryHelper
 from ggrc.models import inflector
@@ -32,6 +35,7 @@ class QueryAPIQueryHelper(QueryHelper):
       ids: [ ids of filtered objects ] (present if type is "ids")
       count: the number of objects filtered, after "limit" is applied
       total: the number of objects filtered, before "limit" is applied
+      debug: timings of the query, present if REQUEST_TIMING is enabled
   """
   def get_results(self):
     """Filter the objects and get their information.
@@ -48,10 +52,16 @@ class QueryAPIQueryHelper(QueryHelper):
       if query_type not in {"values", "ids", "count"}:
         raise NotImplementedError("Only 'values', 'ids' and 'count' queries "
                                   "are supported now")
+    with benchmark("Get result set: get_results > _evaluate_ids"):
+      self._evaluate_ids()
+    for index, object_query in enumerate(self.query):
+      query_type = object_query.get("type", "values")
       model = inflector.get_model(object_query["object_name"])
+      ids = self._ids[index]
       if query_type == "values":
+        start = time.time()
         with benchmark("Get result set: get_results > _get_objects"):
-          objects = self._get_objects(object_query)
+          objects = self._get_objects(object_query, ids)
         object_query["count"] = len(objects)
         with benchmark("get_results > _get_last_modified"):
           object_query["last_modified"] = self._get_last_modified(model,
@@ -61,13 +71,14 @@ class QueryAPIQueryHelper(QueryHelper):
               objects,
               object_query.get("fields"),
           )
+        self._debug[index]["values_time"] = time.time() - start
       else:
-        with benchmark("Get result set: get_results -> _get_ids"):
-          ids = self._get_ids(object_query)
         object_query["count"] = len(ids)
         object_query["last_modified"] = None  # synonymous to now()
         if query_type == "ids":
           object_query["ids"] = ids
+      if settings.REQUEST_TIMING:
+        object_query["debug"] = self._debug[index]
     return self.query
 
   @staticmethod
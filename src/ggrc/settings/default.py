@@ -17,6 +17,23 @@ AUTOBUILD_ASSETS = False
 ENABLE_JASMINE = False
 DEBUG_ASSETS = False
 FULLTEXT_INDEXER = None
+# Search with the native FULLTEXT index (MATCH ... AGAINST) instead of LIKE
+# when FULLTEXT_INDEXER is not set. The index is created by migrations only
+# when this is enabled and the database is MySQL 5.6+, on an already migrated
+# database it is added with ggrc.migrations.utils.fulltext_index.create_index.
+FULLTEXT_NATIVE_SEARCH = bool(os.environ.get("GGRC_FULLTEXT_NATIVE_SEARCH"))
+# Words shorter than this are not stored in the FULLTEXT index and are matched
+# with LIKE instead, it must equal innodb_ft_min_token_size of the database.
+FULLTEXT_MIN_TOKEN_SIZE = int(os.environ.get("GGRC_FULLTEXT_MIN_TOKEN_SIZE",
+                                             "3"))
+# Words ignored by the FULLTEXT index, the default InnoDB stopword list. They
+# are matched with LIKE like the short words.
+FULLTEXT_STOPWORDS = frozenset([
+    "a", "about", "an", "are", "as", "at", "be", "by", "com", "de", "en",
+    "for", "from", "how", "i", "in", "is", "it", "la", "of", "on", "or",
+    "that", "the", "this", "to", "was", "what", "when", "where", "who",
+    "will", "with", "und", "www",
+])
 USER_PERMISSIONS_PROVIDER = None
 EXTENSIONS = []
 exports = []
@@ -91,8 +108,72 @@ EMAIL_PENDING = JINJA2.get_template("notifications/view_pending_digest.html")
 
 USE_APP_ENGINE_ASSETS_SUBDOMAIN = False
 
+# Maximum number of objects deleted by a single bulk DELETE request, which is
+# handled synchronously unlike a single DELETE on App Engine
+BULK_DELETE_MAX_ITEMS = int(
+    os.environ.get("GGRC_BULK_DELETE_MAX_ITEMS", "100"))
+# Maximum number of objects updated by a single bulk PUT request
+BULK_PUT_MAX_ITEMS = int(os.environ.get("GGRC_BULK_PUT_MAX_ITEMS", "100"))
+
 BACKGROUND_COLLECTION_POST_SLEEP = 0
 
+# Size in bytes of the compressed parts in which large background task data,
+# such as imported and exported files, is stored. It must stay below the
+# max_allowed_packet of the database.
+BACKGROUND_TASK_DATA_PART_SIZE = 512 * 1024
+
+# Record full text index updates in an outbox table that is drained by a cron
+# job instead of updating the index in the request.
+FULLTEXT_INDEX_OUTBOX = bool(os.environ.get("GGRC_FULLTEXT_INDEX_OUTBOX"))
+
+# Number of rows fetched at once by full table walkers such as reindex
+QUERY_CHUNK_SIZE = int(os.environ.get("GGRC_QUERY_CHUNK_SIZE", "1000"))
+
+# Number of rows that are saved and committed together by imports
+IMPORT_CHUNK_SIZE = int(os.environ.get("GGRC_IMPORT_CHUNK_SIZE", "1000"))
+
+# Id filters with at least this many ids are joined from a temporary table
+# instead of listing the ids in the query, 0 disables temporary tables
+TEMPORARY_TABLE_MIN_IDS = int(
+    os.environ.get("GGRC_TEMPORARY_TABLE_MIN_IDS", "0"))
+
+# Number of threads evaluating independent object queries of a /query
+# request concurrently, each with its own database connection. Queries are
+# evaluated in the request thread with 1 or when the connection pool has no
+# free connections for the workers.
+QUERY_API_WORKERS = int(os.environ.get("GGRC_QUERY_API_WORKERS", "1"))
+
+# Number of worker processes used by the full text reindex. Processes can not
+# be used on App Engine, where this must stay 1.
+REINDEX_PROCESSES = int(os.environ.get("GGRC_REINDEX_PROCESSES", "1"))
+
+# Add Server-Timing and X-GGRC-Queries headers with query counts, SQL time and
+# benchmark timings to every response.
+REQUEST_TIMING = bool(os.environ.get("GGRC_REQUEST_TIMING"))
+# Number of the slowest statements listed in X-GGRC-Queries header.
+REQUEST_TIMING_SLOW_QUERIES = 3
+# Depth of the benchmark tree listed in Server-Timing header.
+REQUEST_TIMING_TREE_DEPTH = 2
+# Requests with more queries or taking longer (in seconds) are logged with a
+# warning when REQUEST_TIMING is enabled. Zero disables a budget.
+REQUEST_QUERY_BUDGET = int(os.environ.get("GGRC_REQUEST_QUERY_BUDGET", "0"))
+REQUEST_TIME_BUDGET = float(os.environ.get("GGRC_REQUEST_TIME_BUDGET", "0"))
+# Budgets for specific Flask endpoints, for instance
+# {"Control": {"queries": 50, "time": 2}}
+REQUEST_BUDGETS = {}
+# Collect rolling percentiles of request and benchmark durations, shown on
+# /admin/benchmarks. BENCHMARK_STATS_WINDOW is the number of the last
+# durations kept for every benchmark label.
+BENCHMARK_STATS = bool(os.environ.get("GGRC_BENCHMARK_STATS"))
+BENCHMARK_STATS_WINDOW = 1000
+BENCHMARK_STATS_MAX_LABELS = 2000
+# Allow admins to profile requests sent with "X-GGRC-Profile: 1" header. At
+# most PROFILE_MAX_PER_HOUR requests are profiled by every instance and the
+# last PROFILE_KEEP profiles are stored.
+PROFILE_REQUESTS = bool(os.environ.get("GGRC_PROFILE_REQUESTS"))
+PROFILE_MAX_PER_HOUR = 20
+PROFILE_KEEP = 100
+
 
 LOGGING_HANDLER = {
     "class": "logging.StreamHandler",
@@ -109,20 +109,6 @@ def get_searchable_attributes(attributes, cad_dict, content):
   return searchable_values
 
 
-def reindex():
-  """Reindex all snapshots."""
-  columns = db.session.query(
-      models.Snapshot.parent_type,
-      models.Snapshot.parent_id,
-      models.Snapshot.child_type,
-      models.Snapshot.child_id,
-  )
-  for query_chunk in generate_query_chunks(columns):
-    pairs = {Pair.from_4tuple(p) for p in query_chunk}
-    reindex_pairs(pairs)
-    db.session.commit()
-
-
 def reindex_snapshots(snapshot_ids):
   """Reindex selected snapshots"""
   if not snapshot_ids:
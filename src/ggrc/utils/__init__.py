@@ -8,6 +8,7 @@ import sys
 import sqlalchemy
 
 from flask import request
+from ggrc import settings
 from ggrc.settings import CUSTOM_URL_ROOT
 from ggrc.utils import benchmarks
 
@@ -247,11 +248,96 @@ def iso_to_us_date(date_string):
   return convert_date_format(date_string, DATE_FORMAT_ISO, DATE_FORMAT_US)
 
 
-def generate_query_chunks(query, chunk_size=1000):
-  """Make a generator splitting `query` into chunks of size `chunk_size`."""
-  count = query.count()
-  for offset in range(0, count, chunk_size):
-    yield query.order_by("id").limit(chunk_size).offset(offset)
+def _get_query_id_column(query):
+  """Get the `id` column of the first entity selected by `query`."""
+  expr = query.column_descriptions[0]["expr"]
+  return sqlalchemy.inspect(expr).class_.id
+
+
+def generate_query_chunks(query, chunk_size=None, id_column=None):
+  """Make a generator splitting `query` into chunks of size `chunk_size`.
+
+  Chunks are found by seeking on `id_column` (WHERE id > last_id) instead of
+  using LIMIT/OFFSET, so fetching a chunk costs the same wherever in the
+  table it starts. Each yielded query is bounded by the first and last id of
+  its chunk and returns rows ordered by `id_column`.
+
+  Args:
+    query: query to split into chunks.
+    chunk_size: max number of rows in one chunk, QUERY_CHUNK_SIZE by default.
+    id_column: unique column to seek on, `id` of the first queried entity by
+        default.
+
+  Yields:
+    queries that return consecutive chunks of `query` rows.
+  """
+  if chunk_size is None:
+    chunk_size = settings.QUERY_CHUNK_SIZE
+  if id_column is None:
+    id_column = _get_query_id_column(query)
+  ids_query = query.with_entities(id_column).order_by(None).order_by(
+      id_column)
+  last_id = None
+  while True:
+    chunk_ids_query = ids_query
+    if last_id is not None:
+      chunk_ids_query = chunk_ids_query.filter(id_column > last_id)
+    chunk_ids = [row[0] for row in chunk_ids_query.limit(chunk_size)]
+    if not chunk_ids:
+      return
+    yield query.filter(
+        id_column.between(chunk_ids[0], chunk_ids[-1])
+    ).order_by(None).order_by(id_column)
+    last_id = chunk_ids[-1]
+
+
+def _get_server_side_cursor(connection):
+  """Get an unbuffered cursor for a raw DB-API connection if supported."""
+  if connection.dialect.driver == "mysqldb":
+    from MySQLdb.cursors import SSCursor
+    return connection.connection.cursor(SSCursor)
+  return connection.connection.cursor()
+
+
+def generate_query_chunks_streamed(query, chunk_size=None):
+  """Make a generator reading `query` through a server-side cursor.
+
+  The statement is executed once on a dedicated connection and rows are
+  streamed from the database `chunk_size` at a time, so the whole table is
+  walked with a single query and without buffering it in memory. As the
+  connection is not the one used by `db.session`, the session can be
+  committed between chunks.
+
+  Only plain column values are returned, no ORM instances are loaded, so
+  this is meant for queries that select a few columns such as ids.
+
+  Args:
+    query: query to read.
+    chunk_size: max number of rows in one chunk, QUERY_CHUNK_SIZE by default.
+
+  Yields:
+    lists of row tuples.
+  """
+  if chunk_size is None:
+    chunk_size = settings.QUERY_CHUNK_SIZE
+  connection = query.session.get_bind(None).connect()
+  try:
+    compiled = query.statement.compile(dialect=connection.dialect)
+    params = compiled.construct_params()
+    if connection.dialect.positional:
+      params = [params[name] for name in compiled.positiontup]
+    cursor = _get_server_side_cursor(connection)
+    try:
+      cursor.execute(unicode(compiled), params)  # noqa
+      while True:
+        rows = cursor.fetchmany(chunk_size)
+        if not rows:
+          return
+        yield rows
+    finally:
+      cursor.close()
+  finally:
+    connection.close()
 
 
 def create_stub(object_, context_id=None):
@@ -0,0 +1,111 @@
+# Copyright (C) 2017 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""Rolling percentiles of request and benchmark durations.
+
+When ``BENCHMARK_STATS`` setting is enabled, the benchmark tree collected for
+every request by ``ggrc.utils.request_timing`` is added to a process wide
+collector. The collector keeps the last ``BENCHMARK_STATS_WINDOW`` durations
+of every label, where a label is the path of a benchmark in the tree such as
+"collection post > Flush posted objects". Numbers in labels are replaced with
+"N", so benchmarks with counts in their messages share a label.
+
+Besides durations, the collector keeps counters of events such as cache hits
+and misses, which are reported with their totals.
+"""
+
+import collections
+import math
+import re
+import threading
+
+from ggrc import settings
+
+
+_NUMBERS = re.compile(r"\d+")
+
+
+def _percentile(sorted_durations, percent):
+  """Get a nearest-rank percentile from sorted durations."""
+  index = int(math.ceil(percent / 100.0 * len(sorted_durations))) - 1
+  return sorted_durations[max(index, 0)]
+
+
+class BenchmarkStats(object):
+  """Thread-safe rolling window of durations per label."""
+
+  def __init__(self, window=None, max_labels=None):
+    self.window = window
+    self.max_labels = max_labels
+    self._lock = threading.Lock()
+    self._durations = {}
+    self._counters = {}
+
+  def _get_limits(self):
+    window = self.window or settings.BENCHMARK_STATS_WINDOW
+    max_labels = self.max_labels or settings.BENCHMARK_STATS_MAX_LABELS
+    return window, max_labels
+
+  def add(self, samples):
+    """Add durations to the window.
+
+    Args:
+      samples: iterable of (label, duration in seconds) pairs.
+    """
+    window, max_labels = self._get_limits()
+    samples = [(_NUMBERS.sub("N", label), duration)
+               for label, duration in samples]
+    with self._lock:
+      for label, duration in samples:
+        durations = self._durations.get(label)
+        if durations is None:
+          if len(self._durations) >= max_labels:
+            continue
+          durations = self._durations[label] = collections.deque(
+              maxlen=window)
+        durations.append(duration)
+
+  def increment(self, label, value=1):
+    """Increase the counter of an event by value."""
+    _, max_labels = self._get_limits()
+    with self._lock:
+      if label in self._counters or len(self._counters) < max_labels:
+        self._counters[label] = self._counters.get(label, 0) + value
+
+  def add_request(self, timer, label):
+    """Add total request duration and its benchmark tree."""
+    samples = [(label, timer.duration)]
+    samples.extend((" > ".join(path), duration)
+                   for path, duration, count in timer.benchmarks if count)
+    self.add(samples)
+
+  def get_summary(self):
+    """Get count, percentiles and maximum in seconds for every label.
+
+    Counters are reported with their total as count.
+    """
+    with self._lock:
+      durations = {label: sorted(values)
+                   for label, values in self._durations.iteritems()}
+      counters = dict(self._counters)
+    summary = {label: {"count": value}
+               for label, value in counters.iteritems()}
+    summary.update({
+        label: {
+            "count": len(values),
+            "p50": _percentile(values, 50),
+            "p95": _percentile(values, 95),
+            "p99": _percentile(values, 99),
+            "max": values[-1],
+        }
+        for label, values in durations.iteritems() if values
+    })
+    return summary
+
+  def clear(self):
+    with self._lock:
+      self._durations.clear()
+      self._counters.clear()
+
+
+stats = BenchmarkStats()  # pylint: disable=invalid-name
@@ -20,6 +20,7 @@ import time
 from collections import defaultdict
 
 from ggrc import settings
+from ggrc.utils import request_timing
 
 
 logger = logging.getLogger(__name__)
@@ -38,12 +39,19 @@ class BenchmarkContextManager(object):
   def __init__(self, message, **kwargs):
     self.message = message
     self.start = 0
+    self.timer = None
+    self.entry = None
 
   def __enter__(self):
+    self.timer = request_timing.get_current()
+    if self.timer is not None:
+      self.entry = self.timer.benchmark_started(self.message)
     self.start = time.time()
 
   def __exit__(self, exc_type, exc_value, exc_trace):
     end = time.time()
+    if self.timer is not None:
+      self.timer.benchmark_finished(self.entry, end - self.start)
     logger.debug("%.4f %s", end - self.start, self.message)
 
 
@@ -0,0 +1,129 @@
+# Copyright (C) 2017 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""Run independent parts of a request in worker threads.
+
+Every worker runs in a copy of the current request context, so it has its
+own flask.g and its own database session and connection. Loaded user
+permissions are shared with the workers, so they are not loaded again. Other
+objects of the request session must not be passed to the workers.
+
+The request keeps its own connection while workers run, so only as many
+workers are started as the connection pool can serve without waiting.
+Otherwise concurrent requests could exhaust the pool with connections of
+requests that all wait for their workers.
+"""
+
+import sys
+import threading
+import Queue
+
+import flask
+from sqlalchemy.pool import QueuePool
+
+from ggrc import db
+
+
+# flask.g attributes shared with workers, they must hold only plain data
+SHARED_G_ATTRS = ("_request_permissions", "_compiled_permissions")
+
+
+def _get_worker_context():
+  """Get a function that pushes a copy of the current request context."""
+  # pylint: disable=protected-access
+  app = flask.current_app._get_current_object()
+  environ = flask.request.environ.copy()
+  shared = {name: getattr(flask.g, name) for name in SHARED_G_ATTRS
+            if hasattr(flask.g, name)}
+
+  def push():
+    """Push the request context copy in a worker thread."""
+    context = app.request_context(environ)
+    context.push()
+    for name, value in shared.iteritems():
+      setattr(flask.g, name, value)
+    return context
+  return push
+
+
+def _get_free_connections():
+  """Get the number of connections that can be checked out without waiting.
+
+  Returns:
+    number of connections or None if the pool does not limit them.
+  """
+  # pylint: disable=protected-access
+  if "sqlalchemy" not in flask.current_app.extensions:
+    return None
+  pool = db.get_engine(flask.current_app).pool
+  if not isinstance(pool, QueuePool) or pool._max_overflow < 0:
+    return None
+  return pool.size() + pool._max_overflow - pool.checkedout()
+
+
+def _get_worker_count(workers, tasks):
+  """Get the number of worker threads that can run tasks without waiting."""
+  workers = min(workers, tasks)
+  if workers <= 1 or not flask.has_request_context():
+    return 1
+  free_connections = _get_free_connections()
+  if free_connections is not None:
+    workers = min(workers, free_connections)
+  return workers
+
+
+def run_in_threads(functions, workers):
+  """Call functions concurrently and get their results.
+
+  Functions are called in the current thread if there is only one of them,
+  only one worker is allowed, there is no request context or the connection
+  pool has no free connections for more than one worker.
+
+  Args:
+    functions: list of callables without arguments.
+    workers: maximal number of worker threads.
+  Returns:
+    list of results of the functions in the same order.
+  Raises:
+    The first exception raised by any of the functions.
+  """
+  workers = _get_worker_count(workers, len(functions))
+  if workers <= 1:
+    return [function() for function in functions]
+
+  push_context = _get_worker_context()
+  tasks = Queue.Queue()
+  for task in enumerate(functions):
+    tasks.put(task)
+  results = [None] * len(functions)
+  errors = []
+
+  def work():
+    """Call queued functions until the queue is empty or a function fails."""
+    try:
+      context = push_context()
+    except Exception:  # pylint: disable=broad-except
+      errors.append(sys.exc_info())
+      return
+    try:
+      while not errors:
+        try:
+          index, function = tasks.get_nowait()
+        except Queue.Empty:
+          return
+        try:
+          results[index] = function()
+        except Exception:  # pylint: disable=broad-except
+          errors.append(sys.exc_info())
+    finally:
+      context.pop()
+
+  threads = [threading.Thread(target=work) for _ in range(workers)]
+  for thread in threads:
+    thread.start()
+  for thread in threads:
+    thread.join()
+  if errors:
+    exc_type, exc_value, exc_traceback = errors[0]
+    raise exc_type, exc_value, exc_traceback
+  return results
@@ -0,0 +1,138 @@
+# Copyright (C) 2017 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""On demand cProfile capture of single requests.
+
+Admins can profile any request by sending it with ``X-GGRC-Profile: 1``
+header when ``PROFILE_REQUESTS`` setting is enabled. The pstats data of the
+request is stored compressed as a ``RequestProfile``, which can be listed on
+``/admin/profiles`` and downloaded as a file that ``pstats.Stats`` loads.
+
+At most ``PROFILE_MAX_PER_HOUR`` requests are profiled by every instance and
+only the last ``PROFILE_KEEP`` profiles are kept.
+"""
+
+import cProfile
+import datetime
+import marshal
+import pstats
+import threading
+import time
+import zlib
+from logging import getLogger
+
+from ggrc import db
+from ggrc import settings
+
+
+logger = getLogger(__name__)  # pylint: disable=invalid-name
+
+PROFILE_HEADER = "X-GGRC-Profile"
+
+
+class _RateLimit(object):
+  """Thread-safe limit of profiled requests per hour."""
+  # pylint: disable=too-few-public-methods
+
+  def __init__(self):
+    self._lock = threading.Lock()
+    self._started = []
+
+  def acquire(self):
+    """Reserve a profile slot if the hourly limit is not reached."""
+    now = time.time()
+    with self._lock:
+      self._started = [started for started in self._started
+                       if started > now - 3600]
+      if len(self._started) >= settings.PROFILE_MAX_PER_HOUR:
+        return False
+      self._started.append(now)
+      return True
+
+
+_rate_limit = _RateLimit()  # pylint: disable=invalid-name
+
+
+def get_pstats_data(profiler):
+  """Get compressed marshalled pstats data of a finished profiler."""
+  stats = pstats.Stats(profiler)
+  return zlib.compress(marshal.dumps(stats.stats))
+
+
+def store_profile(profiler, method, path, status, duration, user_id):
+  """Store profile data and remove profiles over the PROFILE_KEEP limit.
+
+  A separate connection is used, so the profile does not depend on the state
+  of the request session.
+  """
+  # pylint: disable=too-many-arguments
+  from ggrc.models.request_profile import RequestProfile
+  table = RequestProfile.__table__
+  now = datetime.datetime.utcnow()
+  with db.engine.begin() as connection:
+    connection.execute(table.insert(), {
+        "created_at": now,
+        "updated_at": now,
+        "modified_by_id": user_id,
+        "method": method,
+        "path": path[:250],
+        "status": status,
+        "duration": duration,
+        "data": get_pstats_data(profiler),
+    })
+    oldest_kept = connection.execute(
+        db.select([table.c.id]).order_by(table.c.id.desc()).offset(
+            settings.PROFILE_KEEP).limit(1)
+    ).scalar()
+    if oldest_kept is not None:
+      connection.execute(table.delete().where(table.c.id <= oldest_kept))
+
+
+def _is_profiling_allowed():
+  """Check that the current user is an admin."""
+  from ggrc.login import get_current_user_id
+  from ggrc.rbac import permissions
+  return (get_current_user_id() is not None and
+          permissions.is_allowed_read("/admin", None, 1))
+
+
+def init_app(app):
+  """Profile requests of admins that ask for it with the profile header."""
+  from flask import g
+  from flask import request
+  from ggrc.login import get_current_user_id
+
+  @app.before_request
+  def _start_profiler():  # pylint: disable=unused-variable
+    """Start profiling if an admin asked for it and the limit allows it."""
+    g.profiler = None
+    if request.headers.get(PROFILE_HEADER) != "1":
+      return
+    if not _is_profiling_allowed() or not _rate_limit.acquire():
+      return
+    g.profiler_start = time.time()
+    g.profiler = cProfile.Profile()
+    g.profiler.enable()
+
+  @app.after_request
+  def _store_profile(response):  # pylint: disable=unused-variable
+    """Stop profiling and store the profile of the request."""
+    profiler = getattr(g, "profiler", None)
+    if profiler is None:
+      return response
+    profiler.disable()
+    g.profiler = None
+    try:
+      store_profile(profiler, request.method, request.full_path,
+                    response.status_code, time.time() - g.profiler_start,
+                    get_current_user_id())
+    except Exception:  # pylint: disable=broad-except
+      logger.exception("Failed to store request profile")
+    return response
+
+  @app.teardown_request
+  def _stop_profiler(_):  # pylint: disable=unused-variable
+    """Stop profiling of requests that failed before the response."""
+    profiler = getattr(g, "profiler", None)
+    if profiler is not None:
+      profiler.disable()
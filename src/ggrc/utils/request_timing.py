@@ -0,0 +1,256 @@
+# Copyright (C) 2017 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""Per-request SQL and benchmark instrumentation.
+
+When ``REQUEST_TIMING`` setting is enabled, every request counts its database
+queries, sums their duration, remembers the slowest statements and collects
+the tree of ``benchmark(...)`` blocks it went through. The results are added
+to the response as ``Server-Timing`` and ``X-GGRC-Queries`` headers, and
+requests over the configured query or time budgets are logged as warnings.
+SQL statements are only sent to admins, other users get counts and timings.
+
+With ``BENCHMARK_STATS`` setting the collected timings are also aggregated by
+``ggrc.utils.benchmark_stats``.
+"""
+
+import json
+import re
+import threading
+import time
+from logging import getLogger
+
+import sqlalchemy
+
+from ggrc import settings
+from ggrc.utils import benchmark_stats
+
+
+logger = getLogger(__name__)  # pylint: disable=invalid-name
+
+_local = threading.local()  # pylint: disable=invalid-name
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+class RequestTimer(object):
+  """Queries and benchmarks collected for a single request."""
+  # pylint: disable=too-many-instance-attributes
+
+  def __init__(self, slow_queries=None):
+    self.start = time.time()
+    self.duration = None
+    self.query_count = 0
+    self.query_time = 0.0
+    self.slow_queries_limit = (settings.REQUEST_TIMING_SLOW_QUERIES
+                               if slow_queries is None else slow_queries)
+    self.slow_queries = []
+    self.benchmarks = []
+    self._query_start = None
+    self._stack = []
+    self._entries = {}
+
+  def query_started(self):
+    """Remember the start time of a query."""
+    self._query_start = time.time()
+
+  def query_finished(self, statement):
+    """Count a finished query and keep it if it is one of the slowest."""
+    if self._query_start is None:
+      return
+    duration = time.time() - self._query_start
+    self._query_start = None
+    self.query_count += 1
+    self.query_time += duration
+    if not self.slow_queries_limit:
+      return
+    if (len(self.slow_queries) < self.slow_queries_limit or
+            duration > self.slow_queries[-1][0]):
+      self.slow_queries.append((duration, statement))
+      self.slow_queries.sort(key=lambda query: query[0], reverse=True)
+      del self.slow_queries[self.slow_queries_limit:]
+
+  def benchmark_started(self, message):
+    """Enter a benchmark block and return its entry in the benchmark tree.
+
+    Blocks with the same path, like benchmarks in loops, share an entry.
+    """
+    self._stack.append(message)
+    path = tuple(self._stack)
+    entry = self._entries.get(path)
+    if entry is None:
+      entry = self._entries[path] = [path, 0.0, 0]
+      self.benchmarks.append(entry)
+    return entry
+
+  def benchmark_finished(self, entry, duration):
+    """Leave a benchmark block and add its duration to the entry."""
+    del self._stack[len(entry[0]) - 1:]
+    entry[1] += duration
+    entry[2] += 1
+
+  def finish(self):
+    """Set the total duration of the request."""
+    self.duration = time.time() - self.start
+
+  def get_server_timing(self, max_depth=None):
+    """Get the value of the Server-Timing header.
+
+    Benchmarks are listed in the order they were started, with their full path
+    in the description.
+    """
+    if max_depth is None:
+      max_depth = settings.REQUEST_TIMING_TREE_DEPTH
+    metrics = [
+        'total;dur={:.1f}'.format(self.duration * 1000),
+        'sql;dur={:.1f};desc="{} queries"'.format(self.query_time * 1000,
+                                                  self.query_count),
+    ]
+    benchmarks = [
+        (path, duration, count) for path, duration, count in self.benchmarks
+        if len(path) <= max_depth and count
+    ]
+    for index, (path, duration, count) in enumerate(benchmarks):
+      desc = " > ".join(path)
+      if count > 1:
+        desc += " (x{})".format(count)
+      metrics.append('b{};dur={:.1f};desc="{}"'.format(
+          index, duration * 1000, _header_text(desc)))
+    return ", ".join(metrics)
+
+  def get_queries(self, with_statements=True):
+    """Get the value of the X-GGRC-Queries header.
+
+    Args:
+      with_statements: add SQL statements of the slowest queries, otherwise
+        only their durations are listed.
+    """
+    slowest = []
+    for duration, statement in self.slow_queries:
+      query = {"time": round(duration, 4)}
+      if with_statements:
+        query["statement"] = _header_text(statement)
+      slowest.append(query)
+    return json.dumps({
+        "count": self.query_count,
+        "time": round(self.query_time, 4),
+        "slowest": slowest,
+    }, separators=(",", ":"))
+
+  def get_exceeded_budgets(self, budget):
+    """Get descriptions of budgets exceeded by this request.
+
+    Args:
+      budget: dict with optional "queries" and "time" limits, where time is
+        the total request time in seconds.
+    """
+    exceeded = []
+    if budget.get("queries") and self.query_count > budget["queries"]:
+      exceeded.append("{} queries > {}".format(self.query_count,
+                                               budget["queries"]))
+    if budget.get("time") and self.duration > budget["time"]:
+      exceeded.append("{:.3f}s > {}s".format(self.duration, budget["time"]))
+    return exceeded
+
+
+def _header_text(text, max_length=200):
+  """Make text usable in a header value."""
+  if isinstance(text, str):
+    text = text.decode("utf-8", "replace")
+  text = _WHITESPACE.sub(" ", text).strip().replace('"', "'")
+  if len(text) > max_length:
+    text = text[:max_length - 3] + "..."
+  return text.encode("ascii", "replace")
+
+
+def get_current():
+  """Get the timer of the current request or None if it is not timed."""
+  return getattr(_local, "timer", None)
+
+
+def start():
+  """Start timing the current request and return its timer."""
+  _local.timer = RequestTimer()
+  return _local.timer
+
+
+def stop():
+  """Stop timing the current request and return its timer."""
+  timer = get_current()
+  _local.timer = None
+  if timer is not None:
+    timer.finish()
+  return timer
+
+
+def before_cursor_execute(*_):
+  """SQLAlchemy listener that starts timing a query."""
+  timer = get_current()
+  if timer is not None:
+    timer.query_started()
+
+
+def after_cursor_execute(conn, cursor, statement, *_):
+  """SQLAlchemy listener that counts a finished query."""
+  # pylint: disable=unused-argument
+  timer = get_current()
+  if timer is not None:
+    timer.query_finished(statement)
+
+
+def _is_admin():
+  """Check that the current user is an admin."""
+  from ggrc.login import get_current_user_id
+  from ggrc.rbac import permissions
+  return (get_current_user_id() is not None and
+          permissions.is_allowed_read("/admin", None, 1))
+
+
+def get_budget(endpoint):
+  """Get query and time budget for a Flask endpoint."""
+  budget = {
+      "queries": settings.REQUEST_QUERY_BUDGET,
+      "time": settings.REQUEST_TIME_BUDGET,
+  }
+  budget.update(settings.REQUEST_BUDGETS.get(endpoint, {}))
+  return budget
+
+
+def init_app(app):
+  """Time all requests of the app and all queries sent by SQLAlchemy."""
+  from flask import request
+
+  sqlalchemy.event.listen(sqlalchemy.engine.Engine, "before_cursor_execute",
+                          before_cursor_execute)
+  sqlalchemy.event.listen(sqlalchemy.engine.Engine, "after_cursor_execute",
+                          after_cursor_execute)
+
+  @app.before_request
+  def _start_request_timer():  # pylint: disable=unused-variable
+    start()
+
+  @app.after_request
+  def _add_timing_headers(response):  # pylint: disable=unused-variable
+    """Add timing headers to the response and log exceeded budgets."""
+    timer = stop()
+    if timer is None:
+      return response
+    if settings.BENCHMARK_STATS:
+      benchmark_stats.stats.add_request(
+          timer, "{} {}".format(request.method, request.endpoint))
+    if not settings.REQUEST_TIMING:
+      return response
+    response.headers["Server-Timing"] = timer.get_server_timing()
+    response.headers["X-GGRC-Queries"] = timer.get_queries(
+        with_statements=_is_admin())
+    exceeded = timer.get_exceeded_budgets(get_budget(request.endpoint))
+    if exceeded:
+      logger.warning("%s %s (%s) exceeded budget: %s, sql %.3fs, "
+                     "slowest: %s", request.method, request.path,
+                     request.endpoint, ", ".join(exceeded), timer.query_time,
+                     timer.get_queries())
+    return response
+
+  @app.teardown_request
+  def _stop_request_timer(_):  # pylint: disable=unused-variable
+    stop()
@@ -0,0 +1,101 @@
+# Copyright (C) 2017 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""Filters by large id lists joined from temporary tables.
+
+Filtering by thousands of allowed context and resource ids with
+``column IN (...)`` makes MySQL spend most of the query time parsing and
+planning the literals. If ``TEMPORARY_TABLE_MIN_IDS`` is set, lists of at
+least that many ids are instead inserted into an indexed temporary table on
+the connection of the session and filtered with
+``column IN (SELECT id FROM ...)``. Servers that reject temporary tables in a
+transaction, e.g. with ``enforce_gtid_consistency``, get the IN list.
+
+Every list gets its own table, because MySQL can not refer to a temporary
+table more than once in the same query. Tables are dropped when their
+connection is returned to the pool.
+"""
+
+from logging import getLogger
+
+import sqlalchemy as sa
+from sqlalchemy import event
+from sqlalchemy import exc
+from sqlalchemy.pool import Pool
+
+from ggrc import db
+from ggrc import settings
+
+
+logger = getLogger(__name__)  # pylint: disable=invalid-name
+
+# Key of the list of temporary table names in the connection info
+_TABLES_KEY = "temporary_tables"
+
+
+def _is_id_list(ids):
+  return all(isinstance(id_, (int, long)) for id_ in ids)
+
+
+def materialize_ids(ids):
+  """Insert ids into a new temporary table of the session connection.
+
+  Args:
+    ids: iterable of integer ids.
+  Returns:
+    sqlalchemy Table with a single primary key column id.
+  """
+  connection = db.session.connection()
+  tables = connection.info.setdefault(_TABLES_KEY, [])
+  table = sa.Table(
+      "tmp_ids_{}".format(len(tables)), sa.MetaData(),
+      sa.Column("id", sa.Integer, primary_key=True),
+      prefixes=["TEMPORARY"],
+  )
+  table.create(connection)
+  tables.append(table.name)
+  inserter = table.insert()  # pylint: disable=no-value-for-parameter
+  connection.execute(inserter, [{"id": id_} for id_ in ids])
+  return table
+
+
+def in_ids(column, ids):
+  """Get a filter of column values in ids.
+
+  Short lists are compared with IN literals, long lists of integers are
+  joined from a temporary table if TEMPORARY_TABLE_MIN_IDS is set.
+
+  The temporary table only exists on the current connection of the session,
+  so the filter must be used before the session releases the connection: no
+  commit, rollback or session removal may happen between this call and the
+  query. MySQL also can not open a temporary table twice in one statement,
+  so the returned filter must be used only once per statement and a new one
+  must be created for every other use.
+  """
+  ids = set(ids)
+  min_ids = settings.TEMPORARY_TABLE_MIN_IDS
+  if (not min_ids or len(ids) < min_ids or
+          db.engine.name != "mysql" or not _is_id_list(ids)):
+    return column.in_(ids)
+  try:
+    table = materialize_ids(ids)
+  except exc.DBAPIError:
+    logger.warning("Failed to create a temporary table, filtering with IN",
+                   exc_info=True)
+    return column.in_(ids)
+  return column.in_(sa.select([table.c.id]))
+
+
+@event.listens_for(Pool, "checkin")
+def drop_temporary_tables(dbapi_connection, connection_record):
+  """Drop temporary tables of a connection returned to the pool."""
+  tables = connection_record.info.pop(_TABLES_KEY, None)
+  if not tables or dbapi_connection is None:
+    return
+  try:
+    cursor = dbapi_connection.cursor()
+    cursor.execute("DROP TEMPORARY TABLE IF EXISTS {}".format(
+        ", ".join(tables)))
+    cursor.close()
+  except Exception:  # pylint: disable=broad-except
+    logger.exception("Failed to drop temporary tables")
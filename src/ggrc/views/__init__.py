@@ -23,21 +23,20 @@ from ggrc.builder.json import publish
 from ggrc.builder.json import publish_representation
 from ggrc.converters import get_importables, get_exportables
 from ggrc.extensions import get_extension_modules
-from ggrc.fulltext import get_indexer, get_indexed_model_names, mixin
+from ggrc.fulltext import outbox as fulltext_outbox
+from ggrc.fulltext import reindex as fulltext_reindex
 from ggrc.login import get_current_user
 from ggrc.login import login_required
 from ggrc.models import all_models
 from ggrc.models.background_task import create_task
 from ggrc.models.background_task import make_task_response
 from ggrc.models.background_task import queued_task
-from ggrc.models.inflector import get_model
 from ggrc.models.reflection import AttributeInfo
 from ggrc.rbac import permissions
 from ggrc.services.common import as_json
 from ggrc.services.common import inclusion_filter
 from ggrc.services import query as services_query
 from ggrc.snapshotter import rules
-from ggrc.snapshotter.indexer import reindex as reindex_snapshots
 from ggrc.views import converters
 from ggrc.views import cron
 from ggrc.views import filters
@@ -46,7 +45,7 @@ from ggrc.views import notifications
 from ggrc.views.common import RedirectedPolymorphView
 from ggrc.views.registry import object_view
 from ggrc.utils import benchmark
-from ggrc.utils import generate_query_chunks
+from ggrc.utils import benchmark_stats
 from ggrc.utils import revisions
 
 logger = logging.getLogger(__name__)  # pylint: disable=invalid-name
@@ -65,49 +64,30 @@ def refresh_revisions(_):
 @queued_task
 def reindex(_):
   """Web hook to update the full text search index."""
-  do_reindex()
-  return app.make_response(("success", 200, [("Content-Type", "text/html")]))
+  stats = do_reindex()
+  return app.make_response((
+      "success: {records} records, {records_per_second:.1f} records/s".format(
+          **stats),
+      200,
+      [("Content-Type", "text/html")],
+  ))
 
 
-def do_reindex():
-  """Update the full text search index."""
+@app.route("/_background_tasks/drain_fulltext_index_outbox",
+           methods=["GET", "POST"])
+def drain_fulltext_index_outbox():
+  """Cron job that applies full text index updates queued in the outbox."""
+  processed = fulltext_outbox.drain()
+  return app.make_response(("processed %s" % processed, 200,
+                            [("Content-Type", "text/html")]))
 
-  indexer = get_indexer()
-  indexed_models = get_indexed_model_names()
 
-  people = db.session.query(all_models.Person.id, all_models.Person.name,
-                            all_models.Person.email)
-  indexer.cache["people_map"] = {p.id: (p.name, p.email) for p in people}
-  indexer.cache["ac_role_map"] = dict(db.session.query(
-      all_models.AccessControlRole.id,
-      all_models.AccessControlRole.name,
-  ))
-  for model in sorted(indexed_models):
-    # pylint: disable=protected-access
-    logger.info("Updating index for: %s", model)
-    with benchmark("Create records for %s" % model):
-      model = get_model(model)
-      mapper_class = model._sa_class_manager.mapper.base_mapper.class_
-      if issubclass(model, mixin.Indexed):
-        for query_chunk in generate_query_chunks(db.session.query(model.id)):
-          model.bulk_record_update_for([i.id for i in query_chunk])
-          db.session.commit()
-      else:
-        logger.warning(
-            "Try to index model that not inherited from Indexed mixin: %s",
-            model.__name__
-        )
-        indexer.delete_records_by_type(model.__name__)
-        query = model.query.options(
-            db.undefer_group(mapper_class.__name__ + '_complete'),
-        )
-        for query_chunk in generate_query_chunks(query):
-          for instance in query_chunk:
-            indexer.create_record(indexer.fts_record_for(instance), False)
-          db.session.commit()
-
-  reindex_snapshots()
-  indexer.invalidate_cache()
+def do_reindex():
+  """Update the full text search index.
+
+  An interrupted reindex is continued from the last finished chunk.
+  """
+  return fulltext_reindex.reindex()
 
 
 def get_permissions_json():
@@ -313,6 +293,57 @@ def admin_reindex():
                          [('Content-Type', 'text/html')])))
 
 
+@app.route("/admin/fulltext_index_outbox", methods=["GET"])
+@login_required
+def admin_fulltext_index_outbox():
+  """Get the number of queued full text index updates and the queue lag."""
+  if not permissions.is_allowed_read("/admin", None, 1):
+    raise Forbidden()
+  return app.make_response((as_json(fulltext_outbox.get_status()), 200,
+                            [("Content-Type", "application/json")]))
+
+
+@app.route("/admin/benchmarks", methods=["GET"])
+@login_required
+def admin_benchmarks():
+  """Get rolling percentiles of request and benchmark durations."""
+  if not permissions.is_allowed_read("/admin", None, 1):
+    raise Forbidden()
+  return app.make_response((as_json(benchmark_stats.stats.get_summary()), 200,
+                            [("Content-Type", "application/json")]))
+
+
+@app.route("/admin/profiles", methods=["GET"])
+@login_required
+def admin_profiles():
+  """List stored request profiles."""
+  if not permissions.is_allowed_read("/admin", None, 1):
+    raise Forbidden()
+  profile = all_models.RequestProfile
+  columns = [profile.id, profile.created_at, profile.method, profile.path,
+             profile.status, profile.duration, profile.modified_by_id]
+  profiles = [
+      dict(zip([column.key for column in columns], row))
+      for row in db.session.query(*columns).order_by(profile.id.desc())
+  ]
+  return app.make_response((as_json(profiles), 200,
+                            [("Content-Type", "application/json")]))
+
+
+@app.route("/admin/profiles/<int:profile_id>", methods=["GET"])
+@login_required
+def admin_profile_download(profile_id):
+  """Download a request profile in pstats format."""
+  if not permissions.is_allowed_read("/admin", None, 1):
+    raise Forbidden()
+  profile = all_models.RequestProfile.query.get_or_404(profile_id)
+  return app.make_response((profile.get_pstats_dump(), 200, [
+      ("Content-Type", "application/octet-stream"),
+      ("Content-Disposition",
+       "attachment; filename=profile_{}.pstats".format(profile.id)),
+  ]))
+
+
 @app.route("/admin/refresh_revisions", methods=["POST"])
 @login_required
 def admin_refresh_revisions():
@@ -346,6 +377,7 @@ def assessments_view():
 
 
 @app.route("/background_task/<id_task>", methods=['GET'])
+@login_required
 def get_task_response(id_task):
   """Gets the status of a background task"""
   return make_task_response(id_task)
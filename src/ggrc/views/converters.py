@@ -7,27 +7,36 @@ This module handles all view related function to import and export pages
 including the import/export api endponts.
 """
 
+import zlib
 from logging import getLogger
+from StringIO import StringIO
 
 from flask import current_app
 from flask import request
 from flask import json
 from flask import render_template
+from flask import stream_with_context
+from flask import url_for
 from werkzeug.exceptions import BadRequest
 
 from ggrc.app import app
 from ggrc.converters.base import Converter
-from ggrc.converters.import_helper import generate_csv_string
+from ggrc.converters.import_helper import generate_csv_stream
 from ggrc.converters.import_helper import read_csv_file
 from ggrc.converters.query_helper import BadQueryException
 from ggrc.converters.query_helper import QueryHelper
 from ggrc.login import login_required
+from ggrc.models.background_task import create_task
+from ggrc.models.background_task import queued_task
 from ggrc.utils import benchmark
 
 
 # pylint: disable=invalid-name
 logger = getLogger(__name__)
 
+# Number of bytes of an imported file that are read and stored at once
+IMPORT_FILE_READ_SIZE = 64 * 1024
+
 
 def check_required_headers(required_headers):
   errors = []
@@ -52,26 +61,50 @@ def parse_export_request():
   return request.json
 
 
+def _gzip_stream(chunks):
+  """Compress a stream of strings into a stream of gzip data."""
+  compressor = zlib.compressobj(6, zlib.DEFLATED, zlib.MAX_WBITS | 16)
+  for chunk in chunks:
+    data = compressor.compress(chunk)
+    if data:
+      yield data
+  yield compressor.flush()
+
+
+def _log_stream_errors(chunks):
+  """Log errors raised while the response is already being sent."""
+  try:
+    for chunk in chunks:
+      yield chunk
+  except:  # pylint: disable=bare-except
+    logger.exception("Export failed")
+    raise
+
+
 def handle_export_request():
+  """Export objects to a csv file that is streamed to the client.
+
+  Objects are loaded and converted in chunks while the response is sent, so
+  memory use does not depend on the size of the export. The response is gzip
+  compressed if the client accepts it.
+  """
   try:
     with benchmark("handle export request"):
       data = parse_export_request()
       query_helper = QueryHelper(data)
       ids_by_type = query_helper.get_ids()
-    with benchmark("Generate CSV array"):
+    with benchmark("Prepare CSV stream"):
       converter = Converter(ids_by_type=ids_by_type)
-      csv_data = converter.to_array()
-    with benchmark("Generate CSV string"):
-      csv_string = generate_csv_string(csv_data)
+      width, rows = converter.to_row_stream()
+      body = _log_stream_errors(generate_csv_stream(rows, width))
     with benchmark("Make response."):
-      object_names = "_".join(converter.get_object_names())
-      filename = "{}.csv".format(object_names)
-      headers = [
-          ("Content-Type", "text/csv"),
-          ("Content-Disposition",
-           "attachment; filename='{}'".format(filename)),
-      ]
-      return current_app.make_response((csv_string, 200, headers))
+      headers = _get_export_headers(converter)
+      headers.append(("Vary", "Accept-Encoding"))
+      if "gzip" in request.accept_encodings:
+        body = _gzip_stream(body)
+        headers.append(("Content-Encoding", "gzip"))
+      return current_app.response_class(
+          stream_with_context(body), 200, headers)
   except BadQueryException as exception:
     raise BadRequest(exception.message)
   except:  # pylint: disable=bare-except
@@ -79,6 +112,28 @@ def handle_export_request():
   raise BadRequest("Export failed due to server error.")
 
 
+def _get_export_headers(converter):
+  """Get response headers for the csv file made by the converter."""
+  object_names = "_".join(converter.get_object_names())
+  filename = "{}.csv".format(object_names)
+  return [
+      ("Content-Type", "text/csv"),
+      ("Content-Disposition",
+       "attachment; filename='{}'".format(filename)),
+  ]
+
+
+def run_export_task(task):
+  """Export objects to a csv file that is stored as the task result."""
+  converter = Converter(
+      ids_by_type=QueryHelper(task.parameters["data"]).get_ids(),
+      progress_callback=task.update_progress,
+  )
+  width, rows = converter.to_row_stream()
+  return current_app.response_class(generate_csv_stream(rows, width), 200,
+                                    _get_export_headers(converter))
+
+
 def check_import_file():
   if "file" not in request.files or not request.files["file"]:
     raise BadRequest("Missing csv file")
@@ -88,17 +143,26 @@ def check_import_file():
   return csv_file
 
 
-def parse_import_request():
-  """ Check if request contains all required fields """
+def check_import_request():
+  """Check import request headers and file.
+
+  Returns:
+    (dry_run, csv_file) tuple.
+  """
   required_headers = {
       "X-Requested-By": ["GGRC"],
       "X-test-only": ["true", "false"],
   }
   check_required_headers(required_headers)
   csv_file = check_import_file()
-  csv_data = read_csv_file(csv_file)
   dry_run = request.headers["X-test-only"] == "true"
-  return dry_run, csv_data
+  return dry_run, csv_file
+
+
+def parse_import_request():
+  """ Check if request contains all required fields """
+  dry_run, csv_file = check_import_request()
+  return dry_run, read_csv_file(csv_file)
 
 
 def handle_import_request():
@@ -115,6 +179,24 @@ def handle_import_request():
   raise BadRequest("Import failed due to server error.")
 
 
+def run_import_task(task):
+  """Import a csv file and store the import summary as the task result.
+
+  The summary holds the errors of every row, so it is returned as a streamed
+  response that is stored with the task data like export results.
+  """
+  csv_file = StringIO("".join(task.read_data("csv_file")))
+  converter = Converter(
+      dry_run=task.parameters["dry_run"],
+      csv_data=read_csv_file(csv_file),
+      progress_callback=task.update_progress,
+  )
+  converter.import_csv()
+  response_json = json.JSONEncoder().iterencode(converter.get_info())
+  headers = [("Content-Type", "application/json")]
+  return current_app.response_class(response_json, 200, headers)
+
+
 def init_converter_views():
   """Initialize views for import and export."""
 
@@ -132,6 +214,47 @@ def init_converter_views():
     with benchmark("handle import request"):
       return handle_import_request()
 
+  @app.route("/_background_tasks/export_csv", methods=["POST"])
+  @login_required
+  @queued_task
+  def export_csv_task(task):
+    return run_export_task(task)
+
+  @app.route("/_background_tasks/import_csv", methods=["POST"])
+  @login_required
+  @queued_task
+  def import_csv_task(task):
+    return run_import_task(task)
+
+  @app.route("/_service/export_csv_task", methods=["POST"])
+  @login_required
+  def schedule_export_csv():
+    """Start an export task.
+
+    The task progress can be polled on /background_task/<id>, which returns
+    the csv file once the task is finished.
+    """
+    task = create_task("export_csv", url_for(export_csv_task.__name__),
+                       export_csv_task,
+                       parameters={"data": parse_export_request()})
+    return task.make_status_response()
+
+  @app.route("/_service/import_csv_task", methods=["POST"])
+  @login_required
+  def schedule_import_csv():
+    """Start an import task.
+
+    The task progress can be polled on /background_task/<id>, which returns
+    the import summary once the task is finished.
+    """
+    dry_run, csv_file = check_import_request()
+    task = create_task("import_csv", url_for(import_csv_task.__name__),
+                       import_csv_task,
+                       parameters={"dry_run": dry_run},
+                       data={"csv_file": iter(
+                           lambda: csv_file.read(IMPORT_FILE_READ_SIZE), "")})
+    return task.make_status_response()
+
   @app.route("/import")
   @login_required
   def import_view():
@@ -5,6 +5,7 @@
 
 import datetime
 import itertools
+import time
 
 import sqlalchemy.orm
 from sqlalchemy import and_
@@ -24,8 +25,9 @@ from ggrc.models.audit import Audit
 from ggrc.models.program import Program
 from ggrc.models.object_owner import ObjectOwner
 from ggrc.rbac import permissions as rbac_permissions
+from ggrc.rbac import permissions_cache
+from ggrc.rbac.permissions_provider import CompiledPermissions
 from ggrc.rbac.permissions_provider import DefaultUserPermissions
-from ggrc.services.common import _get_cache_manager
 from ggrc.services import signals
 from ggrc.services.registry import service
 from ggrc.utils import benchmark
@@ -48,8 +50,6 @@ blueprint = Blueprint(
     static_url_path='/static/ggrc_basic_permissions',
 )
 
-PERMISSION_CACHE_TIMEOUT = 3600  # 60 minutes
-
 
 def get_public_config(_):
   """Expose additional permissions-dependent config to client.
@@ -282,10 +282,14 @@ class BasicUserPermissions(DefaultUserPermissions):
     self.user = user
     with benchmark('BasicUserPermissions > load permissions for user'):
       self.permissions = load_permissions_for(user)
+    self.compiled_permissions = CompiledPermissions(self.permissions)
 
   def _permissions(self):
     return self.permissions
 
+  def _compiled_permissions(self):
+    return self.compiled_permissions
+
 
 class UserPermissions(DefaultUserPermissions):
   """User permissions cached in the global session object"""
@@ -351,35 +355,26 @@ def collect_permissions(src_permissions, context_id, permissions):
             })
 
 
-def query_memcache(key):
-  """Check if cached permissions are available
+def query_memcache(user_id):
+  """Check which stages of user permissions are cached
 
   Args:
-      key (string): key of the stored permissions
+      user_id (int): id of the user
   Returns:
       cache (memcache_client): memcache client or None if caching
                                is not available
-      permissions_cache (dict): dict with all permissions or None if there
-                                was a cache miss
+      keys (dict): memcache keys of permission stages
+      permissions_cache (dict): cached permissions by stage, stages that are
+                                missing were a cache miss
   """
   if not getattr(settings, 'MEMCACHE_MECHANISM', False):
-    return None, None
+    return None, {}, {}
 
-  cache = _get_cache_manager().cache_object.memcache_client
-  cached_keys_set = cache.get('permissions:list') or set()
-  if key not in cached_keys_set:
-    # We set the permissions:list variable so that we are able to batch
-    # remove all permissions related keys from memcache
-    cached_keys_set.add(key)
-    cache.set('permissions:list', cached_keys_set, PERMISSION_CACHE_TIMEOUT)
-    return cache, None
-
-  permissions_cache = cache.get(key)
-  if permissions_cache:
-    # If the key is both in permissions:list and in memcache itself
-    # it is safe to return the cached permissions
-    return cache, permissions_cache
-  return cache, None
+  cache = permissions_cache.get_memcache_client()
+  keys = permissions_cache.get_keys(cache, user_id)
+  cached = cache.get_multi(keys.values())
+  return cache, keys, {stage: permissions_cache.loads(cached[key])
+                       for stage, key in keys.iteritems() if key in cached}
 
 
 def load_default_permissions(permissions):
@@ -738,54 +733,61 @@ def load_backlog_workflows(permissions):
             .append(wf_context_id)
 
 
-def store_results_into_memcache(permissions, cache, key):
-  """Load personal context for user
+def store_results_into_memcache(stage_permissions, cache, keys):
+  """Store loaded stages of user permissions
 
   Args:
-      permissions (dict): dict where the permissions will be stored
+      stage_permissions (dict): permissions by stage
       cache (cache_manager): Cache manager that should be used for storing
                              permissions
-      key (string): key of under which permissions should be stored
+      keys (dict): memcache keys of permission stages
   Returns:
       None
   """
   if cache is None:
     return
 
-  cached_keys_set = cache.get('permissions:list') or set()
-  if key in cached_keys_set:
-    # We only add the permissions to the cache if the
-    # key still exists in the permissions:list after
-    # the query has executed.
-    cache.set(key, permissions, PERMISSION_CACHE_TIMEOUT)
-
+  # Keys contain the versions read before the permissions were loaded, so
+  # permissions invalidated in the meantime are stored under stale keys.
+  mapping = {keys[stage]: permissions_cache.dumps(permissions)
+             for stage, permissions in stage_permissions.iteritems()
+             if stage in keys}
+  if mapping:
+    cache.set_multi(mapping, permissions_cache.PERMISSION_CACHE_TIMEOUT)
 
-def load_permissions_for(user):
-  """Permissions is dictionary that can be exported to json to share with
-  clients. Structure is:
-  ..
 
-    permissions[action][resource_type][contexts]
-                                      [conditions][context][context_conditions]
+def merge_permissions(src_permissions, permissions):
+  """Merge permissions dict into another one
 
-  'action' is one of 'create', 'read', 'update', 'delete'.
-  'resource_type' is the name of a valid GGRC resource type.
-  'contexts' is a list of context_id where the action is allowed.
-  'conditions' is a dictionary of 'context_conditions' indexed by 'context'
-    where 'context' is a context_id.
-  'context_conditions' is a list of dictionaries with 'condition' and 'terms'
-    keys.
-  'condition' is the string name of a conditional operator, such as 'contains'.
-  'terms' are the arguments to the 'condition'.
+  Args:
+      src_permissions (dict): permissions that should be added
+      permissions (dict): dict where the permissions will be stored
+  Returns:
+      None
   """
-  permissions = {}
-  key = 'permissions:{}'.format(user.id)
-
-  with benchmark("load_permissions > query memcache"):
-    cache, result = query_memcache(key)
-    if result:
-      return result
+  for action, resource_permissions in src_permissions.iteritems():
+    action_permissions = permissions.setdefault(action, {})
+    for resource_type, entry in resource_permissions.iteritems():
+      resource_entry = action_permissions.setdefault(resource_type, {})
+      for name, values in entry.iteritems():
+        if name == 'conditions':
+          for context_id, conditions in values.iteritems():
+            resource_entry.setdefault('conditions', {})\
+                .setdefault(context_id, list())\
+                .extend(conditions)
+        else:
+          resource_entry.setdefault(name, list()).extend(values)
+
+
+def load_role_permissions(user, permissions):
+  """Load permissions from roles, contexts and backlog workflows
 
+  Args:
+      user (Person): Person object
+      permissions (dict): dict where the permissions will be stored
+  Returns:
+      None
+  """
   with benchmark("load_permissions > load default permissions"):
     load_default_permissions(permissions)
 
@@ -803,27 +805,68 @@ def load_permissions_for(user):
     load_implied_roles(permissions, source_contexts_to_rolenames,
                        all_context_implications)
 
-  with benchmark("load_permissions > load object owners"):
-    load_object_owners(user, permissions)
-
   with benchmark("load_permissions > load context relationships"):
     load_context_relationships(permissions)
 
-  with benchmark("load_permissions > load assignee relationships"):
-    load_assignee_relationships(user, permissions)
-
   with benchmark("load_permissions > load personal context"):
     load_personal_context(user, permissions)
 
-  with benchmark("load_permissions > load access control list"):
-    load_access_control_list(user, permissions)
-
   with benchmark("load_permissions > load backlog workflows"):
     load_backlog_workflows(permissions)
 
+
+# Loaders of permission stages that are cached separately
+STAGE_LOADERS = {
+    permissions_cache.ROLES: load_role_permissions,
+    permissions_cache.OWNERS: load_object_owners,
+    permissions_cache.ASSIGNEES: load_assignee_relationships,
+    permissions_cache.ACL: load_access_control_list,
+}
+
+
+def load_permissions_for(user):
+  """Permissions is dictionary that can be exported to json to share with
+  clients. Structure is:
+  ..
+
+    permissions[action][resource_type][contexts]
+                                      [conditions][context][context_conditions]
+
+  'action' is one of 'create', 'read', 'update', 'delete'.
+  'resource_type' is the name of a valid GGRC resource type.
+  'contexts' is a list of context_id where the action is allowed.
+  'conditions' is a dictionary of 'context_conditions' indexed by 'context'
+    where 'context' is a context_id.
+  'context_conditions' is a list of dictionaries with 'condition' and 'terms'
+    keys.
+  'condition' is the string name of a conditional operator, such as 'contains'.
+  'terms' are the arguments to the 'condition'.
+
+  Every stage of permissions in ggrc.rbac.permissions_cache is cached
+  separately, so that changes only reload the stages they affect.
+  """
+  with benchmark("load_permissions > query memcache"):
+    cache, keys, cached = query_memcache(user.id)
+
+  loaded = {}
+  rebuild_times = {}
+  for stage in permissions_cache.STAGES:
+    if stage not in cached:
+      loaded[stage] = {}
+      start = time.time()
+      with benchmark("load_permissions > load {} stage".format(stage)):
+        STAGE_LOADERS[stage](user, loaded[stage])
+      rebuild_times[stage] = time.time() - start
+
   with benchmark("load_permissions > store results into memcache"):
-    store_results_into_memcache(permissions, cache, key)
+    store_results_into_memcache(loaded, cache, keys)
+  if cache is not None:
+    permissions_cache.record_stats(len(cached), len(loaded), rebuild_times)
 
+  permissions = {}
+  for stage in permissions_cache.STAGES:
+    merge_permissions(loaded[stage] if stage in loaded else cached[stage],
+                      permissions)
   return permissions
 
 
@@ -0,0 +1,154 @@
+# Copyright (C) 2017 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""Tests for compiled JSON publishing of model attributes."""
+
+import json
+
+import mock
+
+from ggrc.builder.json import get_json_builder
+from ggrc.builder.json import publish
+from ggrc.builder.json import publish_representation
+from ggrc.models import all_models
+from ggrc.utils import as_json
+from ggrc.utils import url_for
+from integration.ggrc import TestCase
+from integration.ggrc.models import factories
+
+
+def _to_json(value):
+  """Get the value as it is sent to clients."""
+  return json.loads(as_json(value))
+
+
+def _stub(obj):
+  """Get the expected link object of obj."""
+  if obj is None:
+    return None
+  return {
+      "id": obj.id,
+      "type": obj.__class__.__name__,
+      "href": url_for(obj),
+      "context_id": obj.context_id,
+  }
+
+
+class TestCompiledPublish(TestCase):
+  """Tests for the published values of every kind of compiled attribute."""
+
+  def setUp(self):
+    super(TestCompiledPublish, self).setUp()
+    person = factories.PersonFactory()
+    control = factories.ControlFactory()
+    factories.OwnerFactory(ownable=control, person=person)
+    assessment = factories.AssessmentFactory()
+    factories.RelationshipFactory(source=control, destination=assessment)
+    factories.IssueFactory()
+    factories.ObjectiveFactory()
+    self.person_id = person.id
+    self.control_id = control.id
+    self.assessment_id = assessment.id
+
+  @staticmethod
+  def _publish(obj, inclusions=(), inclusion_filter=None):
+    return _to_json(publish_representation(
+        publish(obj, inclusions, inclusion_filter)))
+
+  def _get_objects(self):
+    return (all_models.Person.query.get(self.person_id),
+            all_models.Control.query.get(self.control_id),
+            all_models.Assessment.query.get(self.assessment_id))
+
+  def test_values_and_links(self):
+    """Plain values, relationships and association proxies are published."""
+    person, control, _ = self._get_objects()
+    owner = all_models.ObjectOwner.query.filter_by(
+        ownable_type="Control", ownable_id=control.id).one()
+
+    published = self._publish(control)
+
+    self.assertEqual(published["id"], control.id)
+    self.assertEqual(published["type"], "Control")
+    self.assertEqual(published["title"], control.title)
+    self.assertEqual(published["selfLink"], url_for(control))
+    self.assertEqual(published["modified_by"], _stub(control.modified_by))
+    self.assertEqual(published["owners"], [_stub(person)])
+    self.assertEqual(published["object_owners"], [_stub(owner)])
+
+  def test_properties_and_raw_values(self):
+    """Polymorphic properties and raw association proxies are published."""
+    _, control, assessment = self._get_objects()
+    relationship = all_models.Relationship.query.filter_by(
+        source_type="Control", source_id=control.id).one()
+
+    published = self._publish(relationship)
+
+    self.assertEqual(published["source"], _stub(control))
+    self.assertEqual(published["destination"], _stub(assessment))
+    self.assertEqual(published["attrs"], _to_json(dict(relationship.attrs)))
+
+  def test_custom_publish(self):
+    """Attributes with a custom publish function use that function."""
+    _, _, assessment = self._get_objects()
+    self.assertEqual(self._publish(assessment)["assignees"],
+                     _to_json(assessment.publish_assignees()))
+
+  def test_included(self):
+    """Included objects are published in full."""
+    person, control, _ = self._get_objects()
+    published = self._publish(control, (("owners",),))
+    self.assertEqual(published["owners"], [self._publish(person)])
+
+  def test_included_links(self):
+    """Inclusions of filtered objects are added to their link objects."""
+    person, control, _ = self._get_objects()
+    owner = all_models.ObjectOwner.query.filter_by(
+        ownable_type="Control", ownable_id=control.id).one()
+
+    published = self._publish(control, (("object_owners", "person"),),
+                              lambda _: False)
+
+    expected = _stub(owner)
+    expected["person"] = _stub(person)
+    self.assertEqual(published["object_owners"], [expected])
+
+  def test_all_models(self):
+    """Cached publishers give the same JSON as newly compiled ones."""
+    # pylint: disable=protected-access
+    checked = 0
+    for model in all_models.all_models:
+      objects = model.query.limit(5).all()
+      if not objects:
+        continue
+      get_json_builder(model)._compiled_publishers.clear()
+      first = [self._publish(obj) for obj in objects]
+      second = [self._publish(obj) for obj in objects]
+      self.assertEqual(first, second, model.__name__)
+      for obj, published in zip(objects, first):
+        self.assertEqual(published["id"], obj.id, model.__name__)
+      checked += 1
+    self.assertGreater(checked, 5)
+
+  def test_compiled_once(self):
+    """Attributes are compiled once per class and inclusions."""
+    # pylint: disable=protected-access
+    controls = [factories.ControlFactory() for _ in range(3)]
+    builder = get_json_builder(all_models.Control)
+    with mock.patch.object(builder, "_compile_attrs",
+                           wraps=builder._compile_attrs) as compile_attrs:
+      builder._compiled_publishers.clear()
+      for control in controls:
+        publish(control)
+      self.assertEqual(compile_attrs.call_count, 1)
+
+  def test_unknown_fields(self):
+    """Unknown fields and inclusions do not create new compiled publishers."""
+    # pylint: disable=protected-access
+    control = factories.ControlFactory()
+    builder = get_json_builder(all_models.Control)
+    builder._compiled_publishers.clear()
+    for i in range(10):
+      builder.publish_fields(control, ["title", "unknown{}".format(i)],
+                             (("unknown{}".format(i),),), None)
+    self.assertEqual(len(builder._compiled_publishers), 1)
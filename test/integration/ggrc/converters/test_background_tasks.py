@@ -0,0 +1,122 @@
+# Copyright (C) 2017 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""Tests for imports and exports that run as background tasks."""
+
+import json
+from StringIO import StringIO
+
+from mock import patch
+
+from ggrc import db
+from ggrc.models import all_models
+from ggrc.models.background_task import BackgroundTaskData
+from integration.ggrc import TestCase
+from integration.ggrc.models import factories
+
+
+class TestBackgroundImportExport(TestCase):
+  """Tests for import and export background tasks."""
+
+  def setUp(self):
+    super(TestBackgroundImportExport, self).setUp()
+    self.client.get("/login")
+
+  def _get_task_result(self, task_id):
+    return self.client.get("/background_task/{}".format(task_id))
+
+  def test_import_task(self):
+    """Test import task progress and result."""
+    csv_content = (
+        "Object type,,,\n"
+        "Market,Code*,Title*,Admin*\n"
+        ",market-1,Market 1,user@example.com\n"
+        ",market-2,Market 2,user@example.com\n"
+    )
+    response = self.client.post(
+        "/_service/import_csv_task",
+        data={"file": (StringIO(csv_content), "markets.csv")},
+        headers={"X-test-only": "false", "X-requested-by": "GGRC"},
+    )
+    self.assert200(response)
+    self.assertEqual(response.json["status"], "Success")
+    self.assertEqual(response.json["progress"],
+                     {"parsed": 2, "validated": 2, "written": 2})
+
+    result = self._get_task_result(response.json["id"])
+    self.assert200(result)
+    self.assertEqual(json.loads(result.data)[0]["created"], 2)
+    self.assertEqual(all_models.Market.query.count(), 2)
+
+  def _export_controls(self):
+    return self.client.post(
+        "/_service/export_csv_task",
+        data=json.dumps([{
+            "object_name": "Control",
+            "filters": {"expression": {}},
+            "fields": ["slug", "title"],
+        }]),
+        headers={
+            "Content-Type": "application/json",
+            "X-Requested-By": "GGRC",
+            "X-export-view": "blocks",
+        },
+    )
+
+  def test_export_task(self):
+    """Test that export task result is the csv file."""
+    control = factories.ControlFactory()
+    response = self._export_controls()
+    self.assert200(response)
+    self.assertEqual(response.json["status"], "Success")
+    self.assertEqual(response.json["progress"]["written"], 1)
+
+    result = self._get_task_result(response.json["id"])
+    self.assert200(result)
+    self.assertIn("attachment", result.headers["Content-Disposition"])
+    self.assertIn(control.slug, result.data)
+
+  @patch("ggrc.settings.BACKGROUND_TASK_DATA_PART_SIZE", 64)
+  def test_export_task_parts(self):
+    """Test that export results are stored in parts."""
+    controls = [factories.ControlFactory() for _ in range(20)]
+    response = self._export_controls()
+    self.assertEqual(response.json["status"], "Success")
+
+    parts = BackgroundTaskData.query.filter_by(
+        background_task_id=response.json["id"], name="result").count()
+    self.assertGreater(parts, 1)
+    result = self._get_task_result(response.json["id"])
+    self.assert200(result)
+    for control in controls:
+      self.assertIn(control.slug, result.data)
+
+  def test_export_task_failure(self):
+    """Test that errors while the result is stored fail the task."""
+    def generate_csv_stream(rows, width):  # pylint: disable=unused-argument
+      yield "slug,title\r\n"
+      raise ValueError("export failed")
+
+    factories.ControlFactory()
+    with patch("ggrc.views.converters.generate_csv_stream",
+               generate_csv_stream):
+      response = self._export_controls()
+    self.assert200(response)
+    self.assertEqual(response.json["status"], "Failure")
+    result = self._get_task_result(response.json["id"])
+    self.assertIn("export failed", result.data)
+
+  def test_unknown_task(self):
+    """Test that an unknown task id is not found."""
+    self.assert404(self._get_task_result(0))
+
+  def test_other_user_task(self):
+    """Test that results of tasks of other users are forbidden."""
+    task = all_models.BackgroundTask(
+        name="export_csv",
+        modified_by_id=factories.PersonFactory().id,
+    )
+    task.result = {"content": "secret", "status_code": 200, "headers": []}
+    db.session.add(task)
+    db.session.commit()
+    self.assert403(self._get_task_result(task.id))
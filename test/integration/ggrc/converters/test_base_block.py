@@ -3,13 +3,23 @@
 
 """Tests for basic Block Converter."""
 
+import os
+import tempfile
+from collections import OrderedDict
 from collections import defaultdict
+from StringIO import StringIO
 
 import mock
 from ddt import data, ddt
+from sqlalchemy import exc
 
+from ggrc import db
 from ggrc import models
 from ggrc.converters import base_block
+from ggrc.converters import base_row
+from ggrc.converters import errors
+from ggrc.converters.handlers import custom_attribute
+from ggrc.converters.handlers import handlers
 from ggrc.utils import QueryCounter
 from integration.ggrc import TestCase
 from integration.ggrc.models import factories
@@ -94,3 +104,232 @@ class TestBaseBlock(TestCase):
     block.object_ids = [regulation.id]
     id_map = block._get_identifier_mappings(relationships)
     self.assertEqual(expected_id_map, id_map)
+
+  def test_create_relationships_cache(self):
+    """Test loading relationships of all block objects with one query."""
+    regulations = [factories.RegulationFactory() for _ in range(3)]
+    control = factories.ControlFactory()
+    for regulation in regulations[:2]:
+      factories.RelationshipFactory(source=regulation, destination=control)
+    factories.RelationshipFactory(source=control, destination=regulations[2])
+
+    block = base_block.BlockConverter(mock.MagicMock())
+    block.row_converters = [mock.MagicMock(obj=regulation)
+                            for regulation in regulations]
+
+    with QueryCounter() as counter:
+      cache = block._create_relationships_cache()
+      self.assertEqual(counter.get, 1)
+    control_stub = ("Control", control.id)
+    for regulation in regulations:
+      regulation_stub = ("Regulation", regulation.id)
+      self.assertIn((regulation_stub, control_stub), cache)
+      self.assertIn((control_stub, regulation_stub), cache)
+
+  def test_create_objects_cache(self):
+    """Test loading referenced objects with one query per model."""
+    with factories.single_commit():
+      market = factories.MarketFactory()
+      controls = [factories.ControlFactory() for _ in range(3)]
+      person = factories.PersonFactory()
+
+    block = base_block.BlockConverter(mock.MagicMock())
+    block.object_class = models.Market
+    block.headers = OrderedDict([
+        ("slug", {"handler": handlers.SlugColumnHandler}),
+        ("__mapping__:control", {"handler": handlers.MappingColumnHandler,
+                                 "attr_name": "control"}),
+        ("owners", {"handler": handlers.OwnerColumnHandler}),
+    ])
+    block.rows = [
+        [market.slug, controls[0].slug + "\n" + controls[1].slug,
+         person.email],
+        ["new-market", controls[2].slug.upper() + "\nmissing-control",
+         person.email.upper()],
+    ]
+
+    with QueryCounter() as counter:
+      cache = block._create_objects_cache()
+      self.assertEqual(counter.get, 3)
+    self.assertEqual(cache[models.Market],
+                     {market.slug.lower(): market, "new-market": None})
+    self.assertEqual(cache[models.Person], {person.email.lower(): person})
+    expected_controls = {control.slug.lower(): control
+                         for control in controls}
+    expected_controls["missing-control"] = None
+    self.assertEqual(cache[models.Control], expected_controls)
+
+    block._objects_cache = cache
+    with QueryCounter() as counter:
+      self.assertEqual(block.find_object(models.Control, controls[2].slug),
+                       controls[2])
+      self.assertIsNone(block.find_object(models.Control, "missing-control"))
+      self.assertEqual(counter.get, 0)
+
+  def test_person_attribute_objects_cache(self):
+    """Test prefetching people referenced in Map:Person attributes."""
+    with factories.single_commit():
+      factories.CustomAttributeDefinitionFactory(
+          title="ca person", definition_type="market",
+          attribute_type="Map:Person")
+      people = [factories.PersonFactory() for _ in range(2)]
+
+    block = base_block.BlockConverter(mock.MagicMock())
+    block.object_class = models.Market
+    block.table_singular = "market"
+    block.headers = OrderedDict([
+        ("slug", {"handler": handlers.SlugColumnHandler}),
+        ("__custom__:ca person", {
+            "handler": custom_attribute.CustomAttributeColumHandler,
+            "display_name": "ca person",
+        }),
+    ])
+    block.rows = [["market-{}".format(i), person.email]
+                  for i, person in enumerate(people)]
+    block.get_ca_definitions_cache()
+
+    with QueryCounter() as counter:
+      cache = block._create_objects_cache()
+      self.assertEqual(counter.get, 2)
+    self.assertEqual(cache[models.Person],
+                     {person.email.lower(): person for person in people})
+
+  def test_import_existing_mapping(self):
+    """Test that importing an existing mapping does not duplicate it."""
+    control = factories.ControlFactory()
+    control_slug = control.slug
+    import_data = OrderedDict([
+        ("object_type", "Market"),
+        ("code", "market-1"),
+        ("title", "Market title"),
+        ("Admin", "user@example.com"),
+        ("map:control", control_slug),
+    ])
+    self._check_csv_response(self.import_data(import_data), {})
+    self._check_csv_response(self.import_data(import_data), {})
+
+    market = models.Market.query.filter_by(slug="market-1").one()
+    control = models.Control.query.filter_by(slug=control_slug).one()
+    self.assertEqual(
+        models.Relationship.get_related_query(market, control).count(), 1)
+
+  def test_import_mappings(self):
+    """Test that imported mappings are inserted with revisions."""
+    with factories.single_commit():
+      control_slugs = [factories.ControlFactory().slug for _ in range(3)]
+    response = self.import_data(OrderedDict([
+        ("object_type", "Market"),
+        ("code", "market-1"),
+        ("title", "Market title"),
+        ("Admin", "user@example.com"),
+        ("map:control", "\n".join(control_slugs)),
+    ]))
+    self._check_csv_response(response, {})
+
+    market = models.Market.query.filter_by(slug="market-1").one()
+    relationships = models.Relationship.query.filter_by(
+        source_type="Market", source_id=market.id).all()
+    self.assertEqual(
+        sorted(models.Control.query.get(rel.destination_id).slug
+               for rel in relationships),
+        sorted(control_slugs))
+    revisions = models.Revision.query.filter(
+        models.Revision.resource_type == "Relationship",
+        models.Revision.resource_id.in_([rel.id for rel in relationships]),
+    )
+    self.assertEqual({revision.action for revision in revisions},
+                     {"created"})
+    self.assertEqual(revisions.count(), 3)
+
+  @mock.patch("ggrc.settings.IMPORT_CHUNK_SIZE", 2)
+  def test_import_chunk_failure(self):
+    """Test that a failed chunk does not affect other chunks of a block."""
+    self.client.get("/login")
+    slugs = [factories.MarketFactory(title="old-{}".format(i)).slug
+             for i in range(5)]
+    csv_content = "Object type,,\nMarket,Code*,Title*\n" + "".join(
+        ",{},new-{}\n".format(slug, i) for i, slug in enumerate(slugs))
+    insert_object = base_row.RowConverter.insert_object
+
+    def failing_insert(row_converter):
+      """Fail to insert the third row."""
+      if row_converter.obj.slug == slugs[2]:
+        raise exc.SQLAlchemyError("Insert failed")
+      insert_object(row_converter)
+
+    with mock.patch.object(base_row.RowConverter, "insert_object",
+                           autospec=True, side_effect=failing_insert):
+      response = self.client.post(
+          "/_service/import_csv_task",
+          data={"file": (StringIO(csv_content), "markets.csv")},
+          headers={"X-test-only": "false", "X-requested-by": "GGRC"},
+      )
+    self.assert200(response)
+    self.assertEqual(response.json["progress"],
+                     {"parsed": 5, "validated": 5, "written": 3})
+    titles = dict(models.Market.query.with_entities(
+        models.Market.slug, models.Market.title))
+    self.assertEqual([titles[slug] for slug in slugs],
+                     ["new-0", "new-1", "old-2", "old-3", "new-4"])
+
+  @mock.patch("ggrc.settings.IMPORT_CHUNK_SIZE", 2)
+  def test_import_commit_failure(self):
+    """Test that rows of a failed commit and later chunks are ignored."""
+    slugs = [factories.MarketFactory(title="old-{}".format(i)).slug
+             for i in range(5)]
+    save_import = base_block.BlockConverter.save_import
+    calls = []
+
+    def failing_save_import(block_converter):
+      """Fail to commit the second chunk."""
+      calls.append(block_converter)
+      if len(calls) == 2:
+        db.session.rollback()
+        block_converter.add_errors(errors.UNKNOWN_ERROR,
+                                   line=block_converter.offset + 2)
+        return None
+      return save_import(block_converter)
+
+    csv_content = "Object type,,\nMarket,Code*,Title*\n" + "".join(
+        ",{},new-{}\n".format(slug, i) for i, slug in enumerate(slugs))
+    with tempfile.NamedTemporaryFile(dir=self.CSV_DIR, suffix=".csv") as tmp:
+      tmp.write(csv_content)
+      tmp.flush()
+      with mock.patch.object(base_block.BlockConverter, "save_import",
+                             autospec=True, side_effect=failing_save_import):
+        response = self._import_file(os.path.basename(tmp.name))
+    block_info = response[0]
+    self.assertEqual(block_info["updated"], 2)
+    self.assertEqual(block_info["ignored"], 3)
+    self.assertEqual(len(block_info["row_errors"]), 3)
+    titles = dict(models.Market.query.with_entities(
+        models.Market.slug, models.Market.title))
+    self.assertEqual([titles[slug] for slug in slugs],
+                     ["new-0", "new-1", "old-2", "old-3", "old-4"])
+
+  def test_new_person_attribute(self):
+    """Test Map:Person attribute with a person created in the same import."""
+    factories.CustomAttributeDefinitionFactory(
+        title="ca person", definition_type="market",
+        attribute_type="Map:Person")
+    response = self.import_data(
+        OrderedDict([
+            ("object_type", "Person"),
+            ("email", "new-person@example.com"),
+            ("name", "New Person"),
+        ]),
+        OrderedDict([
+            ("object_type", "Market"),
+            ("code", "market-1"),
+            ("title", "Market title"),
+            ("Admin", "user@example.com"),
+            ("ca person", "new-person@example.com"),
+        ]),
+    )
+    self._check_csv_response(response, {})
+
+    market = models.Market.query.filter_by(slug="market-1").one()
+    self.assertEqual(
+        [cav.attribute_object.email
+         for cav in market.custom_attribute_values],
+        ["new-person@example.com"])
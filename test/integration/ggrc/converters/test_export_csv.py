@@ -1,8 +1,10 @@
 # Copyright (C) 2017 Google Inc.
 # Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
 
+import zlib
 from os.path import abspath, dirname, join
 from flask.json import dumps
+from mock import patch
 
 from ggrc.converters import get_importables
 from ggrc.models.reflection import AttributeInfo
@@ -506,3 +508,50 @@ class TestExportMultipleObjects(TestCase):
         self.assertIn(",Cheese ipsum ch {},".format(i), response.data)
       else:
         self.assertNotIn(",Cheese ipsum ch {},".format(i), response.data)
+
+
+class TestStreamedExport(TestCase):
+  """Tests for exports streamed in chunks of objects."""
+
+  def setUp(self):
+    super(TestStreamedExport, self).setUp()
+    self.client.get("/login")
+    self.headers = {
+        'Content-Type': 'application/json',
+        "X-Requested-By": "GGRC",
+        "X-export-view": "blocks",
+    }
+    with factories.single_commit():
+      self.controls = [factories.ControlFactory() for _ in range(5)]
+    self.data = [{
+        "object_name": "Control",
+        "filters": {"expression": {}},
+        "fields": ["slug", "title"],
+    }]
+
+  def export_csv(self, data, **headers):
+    headers.update(self.headers)
+    return self.client.post("/_service/export_csv", data=dumps(data),
+                            headers=headers)
+
+  def test_chunked_export(self):
+    """Test that all objects are exported when split into chunks."""
+    with patch("ggrc.settings.QUERY_CHUNK_SIZE", 2):
+      response = self.export_csv(self.data)
+      self.assert200(response)
+      lines = response.data.splitlines()
+    self.assertEqual(lines[0].split(",")[0], "Object type")
+    self.assertEqual(lines[1].split(",")[0], "Control")
+    exported_slugs = [line.split(",")[1] for line in lines[2:]
+                      if line.strip(",")]
+    self.assertEqual(exported_slugs, [c.slug for c in self.controls])
+    self.assertEqual(lines[-2:], [",,", ",,"])
+
+  def test_gzip_export(self):
+    """Test that the export is compressed if the client accepts gzip."""
+    plain = self.export_csv(self.data)
+    compressed = self.export_csv(self.data, **{"Accept-Encoding": "gzip"})
+    self.assert200(compressed)
+    self.assertEqual(compressed.headers["Content-Encoding"], "gzip")
+    self.assertEqual(
+        zlib.decompress(compressed.data, zlib.MAX_WBITS | 16), plain.data)
@@ -0,0 +1,65 @@
+# Copyright (C) 2017 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""Tests for index record updates of Indexed models."""
+
+from mock import patch
+from sqlalchemy import and_
+
+from ggrc import db
+from ggrc.fulltext.mysql import MysqlRecordProperty
+from ggrc.models import all_models
+from integration.ggrc import TestCase
+from integration.ggrc.models import factories
+
+
+class TestBulkRecordUpdate(TestCase):
+  """Tests for Indexed.bulk_record_update_for."""
+
+  def setUp(self):
+    super(TestBulkRecordUpdate, self).setUp()
+    with factories.single_commit():
+      control = factories.ControlFactory(title="control title")
+    self.control_id = control.id
+
+  def _get_records(self):
+    return {
+        (record.property, record.subproperty): record.content
+        for record in MysqlRecordProperty.query.filter(
+            MysqlRecordProperty.type == "Control",
+            MysqlRecordProperty.key == self.control_id,
+        )
+    }
+
+  def test_unchanged_records(self):
+    """Test that nothing is written when records did not change."""
+    records = self._get_records()
+    with patch.object(db.session, "execute") as execute:
+      all_models.Control.bulk_record_update_for([self.control_id])
+    execute.assert_not_called()
+    self.assertEqual(self._get_records(), records)
+
+  def test_changed_records(self):
+    """Test that changed, missing and obsolete rows are written."""
+    records = self._get_records()
+    table = MysqlRecordProperty.__table__
+    control_rows = and_(table.c.key == self.control_id,
+                        table.c.type == "Control")
+    db.session.execute(table.insert().values(
+        key=self.control_id,
+        type="Control",
+        property="obsolete",
+        subproperty="",
+        content="obsolete",
+    ))
+    db.session.execute(table.delete().where(
+        and_(control_rows, table.c.property == "slug")))
+    db.session.execute(table.update().where(
+        and_(control_rows, table.c.property == "title")
+    ).values(content="stale title"))
+    self.assertNotEqual(self._get_records(), records)
+
+    all_models.Control.bulk_record_update_for([self.control_id])
+    db.session.commit()
+
+    self.assertEqual(self._get_records(), records)
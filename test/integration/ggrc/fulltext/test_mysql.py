@@ -3,11 +3,14 @@
 
 """Integration tests for custom attribute definitions model."""
 
+import mock
 import sqlalchemy.exc
 
 from ggrc import db
+from ggrc import settings
 from ggrc import views
 from ggrc.fulltext import mysql
+from ggrc.migrations.utils import fulltext_index
 from integration.ggrc import TestCase
 from integration.ggrc.models import factories
 
@@ -73,3 +76,69 @@ class TestCAD(TestCase):
           property=u"\u5555" * 240 + u"2",
       ))
       db.session.commit()
+
+
+class TestMysqlFulltextIndexer(TestCase):
+  """Tests for search with the native FULLTEXT index."""
+
+  def setUp(self):
+    super(TestMysqlFulltextIndexer, self).setUp()
+    if not fulltext_index.is_supported(db.engine):
+      self.skipTest("The database has no InnoDB FULLTEXT indexes")
+    with mock.patch.object(settings, "FULLTEXT_NATIVE_SEARCH", True):
+      fulltext_index.create_index(db.engine)
+    self.addCleanup(fulltext_index.drop_index, db.engine)
+    self.indexer = mysql.MysqlFulltextIndexer(settings)
+    with factories.single_commit():
+      self.control_ids = [
+          factories.ControlFactory(title=title).id
+          for title in ("quarterly revenue review", "annual audit")
+      ]
+
+  def _search(self, terms):
+    """Get ids of controls whose records match the terms."""
+    query = db.session.query(mysql.MysqlRecordProperty.key).filter(
+        mysql.MysqlRecordProperty.type == "Control",
+        self.indexer._get_filter_query(terms),
+    ).distinct()
+    return {key for key, in query}
+
+  def test_match_prefixes(self):
+    """Test that every word of the terms is matched as a required prefix."""
+    self.assertEqual(self._search("quarter rev"), {self.control_ids[0]})
+    self.assertEqual(self._search("revenue annual"), set())
+
+  def test_short_words(self):
+    """Test that words too short for the index are still matched."""
+    self.assertEqual(self._search("annual au"), {self.control_ids[1]})
+    self.assertEqual(self._search("qu"), {self.control_ids[0]})
+
+  def test_stopwords(self):
+    """Test that stopwords are matched without the index."""
+    self.assertEqual(self._search("revenue review"), {self.control_ids[0]})
+    with mock.patch.object(settings, "FULLTEXT_STOPWORDS",
+                           frozenset(["review"])):
+      self.assertEqual(self._search("revenue review"), {self.control_ids[0]})
+      self.assertEqual(self._search("annual review"), set())
+
+  def test_fulltext_index_opt_in(self):
+    """Test that the FULLTEXT index is created only for the native search."""
+    fulltext_index.drop_index(db.engine)
+    with mock.patch.object(settings, "FULLTEXT_NATIVE_SEARCH", False):
+      self.assertFalse(fulltext_index.create_index(db.engine))
+    self.assertFalse(fulltext_index.has_index(db.engine))
+    with mock.patch.object(settings, "FULLTEXT_NATIVE_SEARCH", True):
+      self.assertTrue(fulltext_index.create_index(db.engine))
+    self.assertTrue(fulltext_index.has_index(db.engine))
+
+  def test_boolean_operators(self):
+    """Test that boolean operators in terms are not interpreted."""
+    self.assertEqual(self._search('-annual "audit'), {self.control_ids[1]})
+
+  def test_word_delimiters(self):
+    """Test that terms split by the parser match only with delimiters."""
+    with factories.single_commit():
+      email_id = factories.ControlFactory(title="contact test@example.com").id
+      factories.ControlFactory(title="example test")
+    self.assertEqual(self._search("test@example.com"), {email_id})
+    self.assertEqual(self._search("example.test"), set())
@@ -0,0 +1,102 @@
+# Copyright (C) 2017 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""Tests for asynchronous full text index updates through the outbox."""
+
+from mock import patch
+
+from ggrc import db
+from ggrc.fulltext import outbox
+from ggrc.fulltext.mysql import MysqlRecordProperty
+from ggrc.models import all_models
+from integration.ggrc import TestCase
+from integration.ggrc.api_helper import Api
+
+
+@patch("ggrc.settings.FULLTEXT_INDEX_OUTBOX", True)
+class TestIndexOutbox(TestCase):
+  """Tests for the fulltext index outbox."""
+
+  def setUp(self):
+    super(TestIndexOutbox, self).setUp()
+    self.api = Api()
+
+  @staticmethod
+  def _get_records(type_, key):
+    return MysqlRecordProperty.query.filter(
+        MysqlRecordProperty.type == type_,
+        MysqlRecordProperty.key == key,
+    ).all()
+
+  def _create_control(self, title):
+    response = self.api.post(all_models.Control, {
+        "control": {"title": title, "context": None},
+    })
+    self.assert201(response)
+    return all_models.Control.query.get(response.json["control"]["id"])
+
+  def test_post_queues_update(self):
+    """Test that objects are indexed only when the outbox is drained."""
+    control = self._create_control("queued control")
+    self.assertEqual(self._get_records("Control", control.id), [])
+    self.assertTrue(outbox.get_status()["pending"])
+
+    outbox.drain()
+
+    self.assertIn("queued control", {
+        record.content
+        for record in self._get_records("Control", control.id)
+    })
+    self.assertEqual(outbox.get_status()["pending"], 0)
+
+  def test_repeated_updates(self):
+    """Test that the last queued update of an object is applied."""
+    control = self._create_control("first title")
+    self.api.put(control, {"title": "second title"})
+
+    outbox.drain(batch_size=1)
+
+    contents = {record.content
+                for record in self._get_records("Control", control.id)}
+    self.assertIn("second title", contents)
+    self.assertNotIn("first title", contents)
+
+  def test_delete(self):
+    """Test that records of deleted objects are removed."""
+    control = self._create_control("deleted control")
+    outbox.drain()
+    control_id = control.id
+
+    self.api.delete(control)
+    self.assertNotEqual(self._get_records("Control", control_id), [])
+
+    outbox.drain()
+
+    self.assertEqual(self._get_records("Control", control_id), [])
+
+  def test_late_commit(self):
+    """Test that entries with lower ids committed during a drain are kept."""
+    control = self._create_control("late control")
+    outbox_table = outbox.IndexOutboxEntry.__table__
+    db.session.execute(outbox_table.delete())
+    db.session.execute(outbox_table.insert(), [{
+        "id": 100, "type": "Control", "key": control.id,
+        "operation": outbox.UPDATE, "created_at": control.created_at,
+    }])
+    db.session.commit()
+    # pylint: disable=protected-access
+    update_records = outbox._update_records
+
+    def update_and_enqueue(type_, keys):
+      db.session.execute(outbox_table.insert(), [{
+          "id": 50, "type": "Control", "key": control.id,
+          "operation": outbox.UPDATE, "created_at": control.created_at,
+      }])
+      update_records(type_, keys)
+
+    with patch("ggrc.fulltext.outbox._update_records",
+               side_effect=update_and_enqueue):
+      outbox.drain(max_batches=1)
+
+    self.assertEqual(
+        [entry.id for entry in outbox.IndexOutboxEntry.query], [50])
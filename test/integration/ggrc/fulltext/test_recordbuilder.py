@@ -0,0 +1,144 @@
+# Copyright (C) 2017 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""Tests for building full text index records."""
+
+from ggrc import db
+from ggrc.fulltext import get_indexer
+from ggrc.models import all_models
+from ggrc.utils import QueryCounter
+from integration.ggrc import TestCase
+from integration.ggrc.models import factories
+
+
+def _build_properties(builder, obj):
+  """Build record properties of obj from its ORM relationships."""
+  # pylint: disable=protected-access
+  acl_entries = [
+      (acl.ac_role.name, acl.person.id, acl.person.name, acl.person.email)
+      for acl in obj.access_control_list
+  ]
+  properties = builder._get_properties(obj, acl_entries)
+  for cav in obj.custom_attribute_values:
+    person = None
+    if cav.attribute_object_id:
+      attribute_object = cav.attribute_object
+      person = (attribute_object.id, attribute_object.name,
+                attribute_object.email)
+    properties.update(builder._build_custom_attribute_properties(
+        cav.custom_attribute.title,
+        cav.custom_attribute.attribute_type,
+        cav.attribute_value,
+        person,
+    ))
+  return properties
+
+
+def _count_table_queries(queries, table):
+  """Count queries selecting from the table."""
+  return len([query for query in queries
+              if "FROM {} ".format(table) in query])
+
+
+class TestRecordBuilder(TestCase):
+  """Tests for RecordBuilder.as_records."""
+
+  def setUp(self):
+    super(TestRecordBuilder, self).setUp()
+    person = factories.PersonFactory(name="Person Name",
+                                     email="person@example.com")
+    role = factories.AccessControlRoleFactory(object_type="Control")
+    text_cad = factories.CustomAttributeDefinitionFactory(
+        title="text ca", definition_type="control")
+    person_cad = factories.CustomAttributeDefinitionFactory(
+        title="person ca", definition_type="control",
+        attribute_type="Map:Person")
+    controls = [factories.ControlFactory() for _ in range(3)]
+    for control in controls:
+      factories.CustomAttributeValueFactory(
+          custom_attribute=text_cad,
+          attributable=control,
+          attribute_value="text value {}".format(control.title),
+      )
+      factories.CustomAttributeValueFactory(
+          custom_attribute=person_cad,
+          attributable=control,
+          attribute_value="Person",
+          attribute_object_id=person.id,
+      )
+      factories.AccessControlListFactory(
+          object=control,
+          ac_role_id=role.id,
+          person=person,
+      )
+    self.control_ids = [control.id for control in controls]
+    self.role_name = role.name
+
+  def _get_controls(self):
+    return all_models.Control.indexed_query().filter(
+        all_models.Control.id.in_(self.control_ids)
+    ).order_by(all_models.Control.id).all()
+
+  def test_same_as_single_records(self):
+    """Test that batched records match records built one by one."""
+    indexer = get_indexer()
+    builder = indexer.get_builder(all_models.Control)
+    controls = self._get_controls()
+    indexer.invalidate_cache()
+
+    records = builder.as_records(controls)
+
+    self.assertEqual([record.key for record in records], self.control_ids)
+    for control, record in zip(controls, records):
+      expected = _build_properties(builder, control)
+      self.assertEqual(record.properties, expected)
+      self.assertIn("person ca", record.properties)
+      self.assertIn(self.role_name, record.properties)
+
+  def test_bulk_loading(self):
+    """Test that related data is loaded once for all objects."""
+    indexer = get_indexer()
+    builder = indexer.get_builder(all_models.Control)
+    controls = self._get_controls()
+    indexer.invalidate_cache()
+    with QueryCounter() as counter:
+      builder.as_records(controls)
+
+    for table in ("custom_attribute_values", "access_control_list",
+                  "access_control_roles", "people"):
+      self.assertEqual(_count_table_queries(counter.queries, table), 1, table)
+
+  def test_single_record(self):
+    """Test that a single record loads related data with one query each."""
+    indexer = get_indexer()
+    control = self._get_controls()[0]
+    indexer.invalidate_cache()
+    with QueryCounter() as counter:
+      record = indexer.fts_record_for(control)
+
+    for table in ("custom_attribute_values", "access_control_list"):
+      self.assertEqual(_count_table_queries(counter.queries, table), 1, table)
+    self.assertEqual(
+        record.properties,
+        _build_properties(indexer.get_builder(all_models.Control), control))
+
+  def test_renamed_person(self):
+    """Test that records use the current name and email of people."""
+    indexer = get_indexer()
+    control = self._get_controls()[0]
+    indexer.fts_record_for(control)
+    person = all_models.Person.query.filter_by(
+        email="person@example.com").one()
+    person.name = "New Name"
+    person.email = "new@example.com"
+    db.session.commit()
+
+    record = indexer.fts_record_for(self._get_controls()[0])
+
+    for prop in ("person ca", self.role_name):
+      self.assertEqual(
+          record.properties[prop]["{}-name".format(person.id)], "New Name")
+      self.assertEqual(
+          record.properties[prop]["{}-email".format(person.id)],
+          "new@example.com")
+      self.assertEqual(record.properties[prop]["__sort__"], "new")
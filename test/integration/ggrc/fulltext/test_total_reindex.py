@@ -3,9 +3,11 @@
 
 """Test for total reindex procedure"""
 
+from ggrc import db
 from ggrc import fulltext
 
 from ggrc import views
+from ggrc.fulltext import reindex as fulltext_reindex
 from integration.ggrc import TestCase
 from integration.ggrc.models import factories as ggrc_factories
 from integration.ggrc_workflows.models import factories as wf_factories
@@ -54,3 +56,23 @@ class TestTotalTeindex(TestCase):
     count = indexer.record_type.query.count()
     views.do_reindex()
     self.assertEqual(count, indexer.record_type.query.count())
+
+  def test_resume_reindex(self):
+    """Test that an interrupted reindex continues with unfinished chunks."""
+    with ggrc_factories.single_commit():
+      control_ids = [ggrc_factories.ControlFactory().id for _ in range(3)]
+    indexer = fulltext.get_indexer()
+    control_records = indexer.record_type.query.filter(
+        indexer.record_type.type == "Control",
+        indexer.record_type.key.in_(control_ids),
+    )
+    count = control_records.count()
+    fulltext_reindex._plan_chunks()  # pylint: disable=protected-access
+    control_records.delete(synchronize_session=False)
+    db.session.commit()
+
+    stats = views.do_reindex()
+
+    self.assertEqual(control_records.count(), count)
+    self.assertGreaterEqual(stats["records"], len(control_ids))
+    self.assertEqual(fulltext_reindex.ReindexChunk.query.count(), 0)
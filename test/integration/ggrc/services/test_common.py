@@ -7,16 +7,22 @@ import json
 import time
 from urlparse import urlparse
 from wsgiref.handlers import format_date_time
+
+from mock import patch
 from sqlalchemy import and_
+from sqlalchemy import event
 
+from integration.ggrc.models import factories
+from integration.ggrc.services import ServicesTestMockModel
 from integration.ggrc.services import TestCase
 from integration.ggrc.api_helper import Api
 from integration.ggrc.generator import ObjectGenerator
 from ggrc.models import all_models
+from ggrc.utils import QueryCounter
 from ggrc import db
 
 
-COLLECTION_ALLOWED = ["HEAD", "GET", "POST", "OPTIONS"]
+COLLECTION_ALLOWED = ["HEAD", "GET", "POST", "PUT", "DELETE", "OPTIONS"]
 RESOURCE_ALLOWED = ["HEAD", "GET", "PUT", "DELETE", "OPTIONS"]
 
 
@@ -77,15 +83,153 @@ class TestServices(TestCase):
     response = self.client.get(self.mock_url("foo"), headers=self.headers())
     self.assert404(response)
 
+  def _bulk_item(self, mock, **kwargs):
+    """Build a bulk request item with the current version of mock."""
+    item = {
+        "id": mock.id,
+        "updated_at": self.mock_json(mock)["updated_at"],
+    }
+    item.update(kwargs)
+    return item
+
   def test_collection_put(self):
-    self.assert_allow(
-        self.client.put(self.mock_url(), headers=self.headers()),
-        COLLECTION_ALLOWED)
+    """Bulk PUT updates objects and reports a status for every item."""
+    mock1 = self.mock_model(foo="foo1")
+    mock2 = self.mock_model(foo="foo2")
+    stale = self._bulk_item(mock2, foo="stale", updated_at="2000-01-01")
+    body = [
+        {"test_model": self._bulk_item(mock1, foo="bar1", context=None)},
+        {"test_model": stale},
+        {"test_model": {"id": 0, "foo": "missing"}},
+    ]
+    events = all_models.Event.query.count()
+    response = self.client.put(
+        self.mock_url(),
+        data=json.dumps(body),
+        headers=self.headers(),
+        content_type="application/json",
+    )
+    self.assert200(response)
+    self.assertEqual([status for status, _ in response.json],
+                     [200, 409, 404])
+    self.assertEqual(response.json[0][1]["test_model"]["foo"], "bar1")
+    self.assertEqual(all_models.Event.query.count(), events + 1)
+
+  def test_collection_put_after_commit_error(self):
+    """Errors after the commit of a bulk PUT do not fail the saved items."""
+    mock = self.mock_model(foo="foo")
+    body = [{"test_model": self._bulk_item(mock, foo="bar", context=None)}]
+    with patch("ggrc.services.common.Resource._update_after_bulk_commit",
+               side_effect=ValueError("after commit")):
+      with self.assertRaises(ValueError):
+        self.client.put(
+            self.mock_url(),
+            data=json.dumps(body),
+            headers=self.headers(),
+            content_type="application/json",
+        )
+    response = self.client.get(self.mock_url(mock.id), headers=self.headers())
+    self.assertEqual(response.json["services_test_mock_model"]["foo"], "bar")
 
   def test_collection_delete(self):
-    self.assert_allow(
-        self.client.delete(self.mock_url(), headers=self.headers()),
-        COLLECTION_ALLOWED)
+    """Bulk DELETE removes all objects with a single event."""
+    mocks = [self.mock_model(foo="foo{}".format(i)) for i in range(2)]
+    ids = [mock.id for mock in mocks]
+    events = all_models.Event.query.count()
+    response = self.client.delete(
+        self.mock_url(),
+        data=json.dumps([self._bulk_item(mock) for mock in mocks]),
+        headers=self.headers(),
+        content_type="application/json",
+    )
+    self.assert200(response)
+    self.assertEqual([status for status, _ in response.json], [200, 200])
+    self.assertEqual(all_models.Event.query.count(), events + 1)
+    for id_ in ids:
+      self.assert404(self.client.get(self.mock_url(id_),
+                                     headers=self.headers()))
+
+  def test_bulk_put_errors(self):
+    """Bulk PUT without saved items fails with the first item status."""
+    mock = self.mock_model(foo="foo")
+    body = [
+        {"test_model": self._bulk_item(mock, foo="stale",
+                                       updated_at="2000-01-01")},
+        {"test_model": {"id": 0, "foo": "missing"}},
+    ]
+    response = self.client.put(
+        self.mock_url(),
+        data=json.dumps(body),
+        headers=self.headers(),
+        content_type="application/json",
+    )
+    self.assertStatus(response, 409)
+    self.assertEqual([status for status, _ in response.json], [409, 404])
+
+  @patch("ggrc.settings.BULK_PUT_MAX_ITEMS", 1)
+  def test_bulk_put_limit(self):
+    """Bulk PUT rejects lists longer than the limit."""
+    mocks = [self.mock_model(foo="foo{}".format(i)) for i in range(2)]
+    ids = [mock.id for mock in mocks]
+    response = self.client.put(
+        self.mock_url(),
+        data=json.dumps([{"test_model": self._bulk_item(mock, foo="bar")}
+                         for mock in mocks]),
+        headers=self.headers(),
+        content_type="application/json",
+    )
+    self.assert400(response)
+    for id_ in ids:
+      response = self.client.get(self.mock_url(id_), headers=self.headers())
+      self.assertNotEqual(response.json["services_test_mock_model"]["foo"],
+                          "bar")
+
+  @patch("ggrc.settings.BULK_DELETE_MAX_ITEMS", 1)
+  def test_bulk_delete_limit(self):
+    """Bulk DELETE rejects lists longer than the limit."""
+    mocks = [self.mock_model(foo="foo{}".format(i)) for i in range(2)]
+    ids = [mock.id for mock in mocks]
+    response = self.client.delete(
+        self.mock_url(),
+        data=json.dumps([self._bulk_item(mock) for mock in mocks]),
+        headers=self.headers(),
+        content_type="application/json",
+    )
+    self.assert400(response)
+    for id_ in ids:
+      self.assert200(self.client.get(self.mock_url(id_),
+                                     headers=self.headers()))
+
+  def test_collection_delete_revisions(self):
+    """Revisions of a bulk request are inserted with a single statement."""
+    mocks = [self.mock_model(foo="foo{}".format(i)) for i in range(3)]
+    body = json.dumps([self._bulk_item(mock) for mock in mocks])
+    ids = [mock.id for mock in mocks]
+    statements = []
+
+    def count_statement(conn, cursor, statement, *args):
+      # pylint: disable=unused-argument
+      statements.append(statement)
+
+    event.listen(db.engine, "before_cursor_execute", count_statement)
+    try:
+      response = self.client.delete(
+          self.mock_url(),
+          data=body,
+          headers=self.headers(),
+          content_type="application/json",
+      )
+    finally:
+      event.remove(db.engine, "before_cursor_execute", count_statement)
+    self.assert200(response)
+    self.assertEqual(
+        len([s for s in statements if s.startswith("INSERT INTO revisions")]),
+        1)
+    log_event = all_models.Event.query.order_by(
+        all_models.Event.id.desc()).first()
+    self.assertEqual(
+        sorted((r.action, r.resource_id) for r in log_event.revisions),
+        [("deleted", id_) for id_ in ids])
 
   def _prepare_model_for_put(self, foo_param="buzz"):
     """Common object initializing sequence."""
@@ -319,6 +463,134 @@ class TestServices(TestCase):
     self.assertStatus(response, 304)
     self.assertIn("Etag", response.headers)
 
+  def test_collection_get_if_none_match(self):
+    """Unchanged collection returns 304 without loading its objects."""
+    self.mock_model(foo="baz")
+    response = self.client.get(self.mock_url(), headers=self.headers())
+    self.assert200(response)
+    collection_etag = response.headers["Etag"]
+
+    get_matched_resources_path = \
+        "ggrc.services.common.Resource.get_matched_resources"
+    with patch(get_matched_resources_path) as get_matched_resources:
+      response = self.client.get(
+          self.mock_url(),
+          headers=self.headers(("If-None-Match", collection_etag)),
+      )
+    self.assertStatus(response, 304)
+    self.assertEqual(collection_etag, response.headers["Etag"])
+    get_matched_resources.assert_not_called()
+
+    self.mock_model(foo="bar")
+    response = self.client.get(
+        self.mock_url(),
+        headers=self.headers(("If-None-Match", collection_etag)),
+    )
+    self.assert200(response)
+    self.assertNotEqual(collection_etag, response.headers["Etag"])
+
+  def test_collection_get_etag_events(self):
+    """Collection etag changes with every logged event."""
+    self.mock_model(foo="baz")
+    response = self.client.get(self.mock_url(), headers=self.headers())
+    self.assert200(response)
+    collection_etag = response.headers["Etag"]
+
+    db.session.add(all_models.Event(action="PUT"))
+    db.session.commit()
+    response = self.client.get(
+        self.mock_url(),
+        headers=self.headers(("If-None-Match", collection_etag)),
+    )
+    self.assert200(response)
+    self.assertNotEqual(collection_etag, response.headers["Etag"])
+
+  def test_collection_get_fields(self):
+    """Collection GET with __fields publishes only requested fields."""
+    mock1 = self.mock_model(foo="baz", code="code-1")
+    with patch("ggrc.builder.json.publish") as publish:
+      response = self.client.get(
+          self.mock_url() + "?__fields=id,foo",
+          headers=self.headers(),
+      )
+    self.assert200(response)
+    publish.assert_not_called()
+    self.assertEqual(
+        response.json["test_model_collection"]["test_model"],
+        [{"id": mock1.id, "foo": "baz"}],
+    )
+
+  def test_collection_get_fields_relationships(self):
+    """Related __fields are loaded with the same number of queries."""
+    def add_owned_control():
+      control = factories.ControlFactory()
+      control.owners.append(factories.PersonFactory())
+      db.session.commit()
+
+    def get_query_count():
+      with QueryCounter() as counter:
+        response = self.client.get(
+            "/api/controls?__fields=id,owners,modified_by",
+            headers=self.headers(),
+        )
+        self.assert200(response)
+        return counter.get
+
+    add_owned_control()
+    get_query_count()
+    query_count = get_query_count()
+    for _ in range(3):
+      add_owned_control()
+    self.assertEqual(get_query_count(), query_count)
+
+  def test_collection_get_cursor(self):
+    """Cursor paging walks through the whole collection."""
+    ids = {self.mock_model(foo="foo{}".format(i)).id for i in range(5)}
+    url = self.mock_url() + "?__cursor=&__page_size=2&__total=1"
+    seen = []
+    while url:
+      response = self.client.get(url, headers=self.headers())
+      self.assert200(response)
+      collection = response.json["test_model_collection"]
+      self.assertEqual(collection["paging"]["total"], 5)
+      seen.extend(obj["id"] for obj in collection["test_model"])
+      next_url = collection["paging"].get("next")
+      url = None
+      if next_url:
+        parsed_url = urlparse(next_url)
+        url = parsed_url.path + "?" + parsed_url.query
+    self.assertEqual(len(seen), 5)
+    self.assertEqual(set(seen), ids)
+
+  def test_collection_get_cursor_null(self):
+    """Cursor paging walks through objects without a modification time."""
+    ids = [self.mock_model(foo="foo{}".format(i)).id for i in range(5)]
+    db.session.execute(
+        "ALTER TABLE test_model MODIFY updated_at DATETIME NULL")
+    table = ServicesTestMockModel.__table__
+    db.session.execute(table.update().where(
+        table.c.id.in_(ids[1:4])).values(updated_at=None))
+    db.session.commit()
+    url = self.mock_url() + "?__cursor=&__page_size=2"
+    seen = []
+    while url:
+      response = self.client.get(url, headers=self.headers())
+      self.assert200(response)
+      collection = response.json["test_model_collection"]
+      seen.extend(obj["id"] for obj in collection["test_model"])
+      next_url = collection["paging"].get("next")
+      url = None
+      if next_url:
+        parsed_url = urlparse(next_url)
+        url = parsed_url.path + "?" + parsed_url.query
+    self.assertEqual(sorted(seen), sorted(ids))
+
+  def test_collection_get_invalid_cursor(self):
+    """Malformed cursor results in a bad request."""
+    response = self.client.get(self.mock_url() + "?__cursor=invalid",
+                               headers=self.headers())
+    self.assert400(response)
+
 
 class TestFilteringByRequest(TestCase):
   """Test filter query by request"""
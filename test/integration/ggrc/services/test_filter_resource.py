@@ -0,0 +1,53 @@
+# Copyright (C) 2017 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""Tests for filtering serialized resources by read permissions."""
+
+import mock
+
+from ggrc.services.common import filter_resource
+from ggrc.utils import QueryCounter
+from integration.ggrc import TestCase
+from integration.ggrc.models import factories
+
+
+class TestFilterResource(TestCase):
+  """Tests for filter_resource."""
+
+  @mock.patch("ggrc.services.common._is_creator", return_value=False)
+  def test_context_checks(self, _):
+    """Test that permissions are checked once per type and context."""
+    resources = [{"type": "Control", "id": id_, "context_id": id_ % 2}
+                 for id_ in range(6)]
+    user_permissions = mock.MagicMock()
+    user_permissions.is_allowed_read.side_effect = (
+        lambda type_, id_, context_id: context_id == 0)
+    user_permissions.read_resources_for.return_value = [3]
+
+    filtered = filter_resource(resources, user_permissions=user_permissions)
+
+    self.assertEqual([resource["id"] for resource in filtered], [0, 2, 3, 4])
+    self.assertEqual(user_permissions.is_allowed_read.call_count, 2)
+    self.assertEqual(user_permissions.read_resources_for.call_count, 1)
+
+  @mock.patch("ggrc.services.common._is_creator", return_value=True)
+  def test_creator_revisions(self, _is_creator):
+    """Test that revision instances are loaded with one query per type."""
+    control_ids = [factories.ControlFactory().id for _ in range(3)]
+    resources = [{
+        "type": "Revision",
+        "id": id_,
+        "context_id": None,
+        "resource_type": "Control",
+        "resource_id": control_id,
+    } for id_, control_id in enumerate(control_ids)]
+    user_permissions = mock.MagicMock()
+    user_permissions.is_allowed_read_for.side_effect = (
+        lambda instance: instance.id != control_ids[0])
+
+    with QueryCounter() as counter:
+      filtered = filter_resource(resources, user_permissions=user_permissions)
+      self.assertEqual(counter.get, 1)
+
+    self.assertEqual([resource["resource_id"] for resource in filtered],
+                     control_ids[1:])
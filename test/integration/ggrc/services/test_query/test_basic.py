@@ -12,9 +12,11 @@ import unittest
 from datetime import datetime
 from operator import itemgetter
 from flask import json
+import mock
 
 from ggrc import app
 from ggrc import db
+from ggrc import settings
 from ggrc.models import CustomAttributeDefinition as CAD
 
 from integration.ggrc import TestCase
@@ -590,6 +592,59 @@ class TestAdvancedQueryAPI(BaseQueryAPITestCase):
 
     self.assertEqual(response_multiple_posts, response_single_post)
 
+    with mock.patch.object(settings, "QUERY_API_WORKERS", 4):
+      response_threaded = json.loads(self._post(data_list).data)
+    self.assertEqual(response_threaded, response_single_post)
+
+  def test_previous_query(self):
+    """Queries can filter by ids of any type of previous query."""
+    program = self._make_query_dict("Program",
+                                    expression=["title", "=", "Cat ipsum 1"])
+    program_ids = self._get_first_result_set(
+        dict(program, type="ids"), "Program", "ids")
+    relevant = {"object_name": "Program", "op": {"name": "relevant"},
+                "ids": program_ids}
+    previous = {"object_name": "__previous__", "op": {"name": "relevant"},
+                "ids": [0]}
+
+    response = json.loads(self._post([
+        program,
+        self._make_query_dict_base(
+            "Regulation", type_="ids", filters={"expression": previous}),
+    ]).data)
+
+    self.assertEqual(
+        response[1]["Regulation"]["ids"],
+        self._get_first_result_set(
+            self._make_query_dict_base(
+                "Regulation", type_="ids", filters={"expression": relevant}),
+            "Regulation", "ids"),
+    )
+
+  def test_invalid_previous_query(self):
+    """References to the same or following queries are rejected."""
+    previous = {"object_name": "__previous__", "op": {"name": "relevant"},
+                "ids": [0]}
+    response = self._post(self._make_query_dict_base(
+        "Program", filters={"expression": previous}))
+    self.assert400(response)
+
+  @mock.patch.object(settings, "REQUEST_TIMING", True)
+  def test_shared_query_debug(self):
+    """Identical queries are evaluated once and report their timings."""
+    response = json.loads(self._post([
+        self._make_query_dict("Program", type_="values",
+                              expression=["title", "~", "Cat ipsum"]),
+        self._make_query_dict("Program", type_="count",
+                              expression=["title", "~", "Cat ipsum"]),
+    ]).data)
+    first, second = [result["Program"]["debug"] for result in response]
+    self.assertIn("time", first)
+    self.assertIn("values_time", first)
+    self.assertEqual(second["same_as"], 0)
+    self.assertEqual(response[0]["Program"]["count"],
+                     response[1]["Program"]["count"])
+
   def test_is_empty_query_by_native_attrs(self):
     """Filter by navive object attrs with 'is empty' operator."""
     programs = self._get_first_result_set(
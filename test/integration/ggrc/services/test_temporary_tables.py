@@ -0,0 +1,80 @@
+# Copyright (C) 2017 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""Tests for filters by id lists joined from temporary tables."""
+
+import mock
+from sqlalchemy import exc
+
+from ggrc import db
+from ggrc import settings
+from ggrc.models import all_models
+from ggrc.utils import temporary_tables
+from integration.ggrc import TestCase
+from integration.ggrc.models import factories
+
+
+class TestTemporaryTables(TestCase):
+  """Compare temporary table filters with IN lists."""
+
+  def setUp(self):
+    super(TestTemporaryTables, self).setUp()
+    self.control_ids = [factories.ControlFactory().id for _ in range(5)]
+
+  def _get_ids(self, filter_expr):
+    return sorted(id_ for id_, in db.session.query(
+        all_models.Control.id).filter(filter_expr))
+
+  def test_short_list(self):
+    """Short lists are compared with IN literals."""
+    filter_expr = temporary_tables.in_ids(all_models.Control.id,
+                                          self.control_ids[:2])
+    self.assertNotIn("tmp_ids", str(filter_expr))
+    self.assertEqual(self._get_ids(filter_expr), sorted(self.control_ids[:2]))
+
+  @mock.patch.object(settings, "TEMPORARY_TABLE_MIN_IDS", 2, create=True)
+  def test_long_list(self):
+    """Long lists are joined from a temporary table with the same result."""
+    ids = self.control_ids[1:] + [0]
+    filter_expr = temporary_tables.in_ids(all_models.Control.id, ids)
+    self.assertIn("tmp_ids", str(filter_expr))
+    self.assertEqual(self._get_ids(filter_expr), sorted(self.control_ids[1:]))
+
+  @mock.patch.object(settings, "TEMPORARY_TABLE_MIN_IDS", 2, create=True)
+  def test_several_tables(self):
+    """Several long lists can be used in the same query."""
+    filter_expr = db.or_(
+        temporary_tables.in_ids(all_models.Control.id, self.control_ids[:2]),
+        temporary_tables.in_ids(all_models.Control.id, self.control_ids[2:]),
+    )
+    self.assertEqual(self._get_ids(filter_expr), sorted(self.control_ids))
+
+  @mock.patch.object(settings, "TEMPORARY_TABLE_MIN_IDS", 0, create=True)
+  def test_disabled(self):
+    """Long lists are compared with IN literals if tables are disabled."""
+    filter_expr = temporary_tables.in_ids(all_models.Control.id,
+                                          self.control_ids)
+    self.assertNotIn("tmp_ids", str(filter_expr))
+    self.assertEqual(self._get_ids(filter_expr), sorted(self.control_ids))
+
+  @mock.patch.object(settings, "TEMPORARY_TABLE_MIN_IDS", 2, create=True)
+  def test_create_error(self):
+    """Lists are compared with IN literals if a table can not be created."""
+    error = exc.OperationalError("CREATE TEMPORARY TABLE", {}, Exception())
+    with mock.patch.object(temporary_tables, "materialize_ids",
+                           side_effect=error):
+      filter_expr = temporary_tables.in_ids(all_models.Control.id,
+                                            self.control_ids)
+    self.assertNotIn("tmp_ids", str(filter_expr))
+    self.assertEqual(self._get_ids(filter_expr), sorted(self.control_ids))
+
+  @mock.patch.object(settings, "TEMPORARY_TABLE_MIN_IDS", 2, create=True)
+  def test_commit_before_query(self):
+    """Temporary tables are dropped if the session commits before the query.
+    """
+    filter_expr = temporary_tables.in_ids(all_models.Control.id,
+                                          self.control_ids)
+    db.session.commit()
+    with self.assertRaises(exc.DBAPIError):
+      self._get_ids(filter_expr)
+    db.session.rollback()
@@ -0,0 +1,127 @@
+# Copyright (C) 2017 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""Tests for scoped invalidation of cached permissions."""
+
+from ggrc import db
+from ggrc.models import all_models
+from ggrc.models.cache import Cache
+from ggrc.rbac import permissions_cache
+from ggrc_basic_permissions import load_permissions_for
+from integration.ggrc import TestCase
+from integration.ggrc.models import factories
+from appengine import base
+
+
+def _modified(new=(), dirty=(), deleted=()):
+  """Build a modified objects cache."""
+  cache = Cache()
+  cache.new = {obj: {} for obj in new}
+  cache.dirty = {obj: {} for obj in dirty}
+  cache.deleted = {obj: {} for obj in deleted}
+  return cache
+
+
+@base.with_memcache
+class TestPermissionsCache(TestCase):
+  """Tests for per user and stage permission cache invalidation."""
+
+  def setUp(self):
+    super(TestPermissionsCache, self).setUp()
+    self.person = factories.PersonFactory()
+    self.other = factories.PersonFactory()
+
+  def _cached_stages(self, person):
+    keys = permissions_cache.get_keys(self.memcache_client, person.id)
+    cached = self.memcache_client.get_multi(keys.values())
+    return sorted(stage for stage, key in keys.iteritems() if key in cached)
+
+  def test_person_changes(self):
+    """Owner changes only affect the owners stage of the owner."""
+    control = factories.ControlFactory()
+    owner = factories.OwnerFactory(ownable=control, person=self.person)
+    self.assertEqual(
+        permissions_cache.get_permission_changes(_modified(new=[owner])),
+        {permissions_cache.OWNERS: {self.person.id}})
+
+  def test_replaced_person(self):
+    """Changing the person of an owner affects the old and the new owner."""
+    control = factories.ControlFactory()
+    owner = factories.OwnerFactory(ownable=control, person=self.person)
+    owner.person_id = self.other.id
+    self.assertEqual(
+        permissions_cache.get_permission_changes(_modified(dirty=[owner])),
+        {permissions_cache.OWNERS: {self.person.id, self.other.id}})
+
+  def test_replaced_person_flushed(self):
+    """Replaced people are remembered when the change is already flushed."""
+    control = factories.ControlFactory()
+    owner = factories.OwnerFactory(ownable=control, person=self.person)
+    owner.person_id = self.other.id
+    db.session.flush()
+    self.assertEqual(
+        permissions_cache.get_permission_changes(_modified(dirty=[owner])),
+        {permissions_cache.OWNERS: {self.person.id, self.other.id}})
+
+  def test_global_changes(self):
+    """Role changes affect the roles stage of all users."""
+    role = all_models.Role.query.first()
+    self.assertEqual(
+        permissions_cache.get_permission_changes(_modified(dirty=[role])),
+        {permissions_cache.ROLES: None})
+
+  def test_unrelated_changes(self):
+    """Changes of objects without permissions do not affect any stage."""
+    control = factories.ControlFactory()
+    self.assertEqual(
+        permissions_cache.get_permission_changes(_modified(new=[control])),
+        {})
+
+  def test_clear_scoped(self):
+    """Only affected stages of affected users are reloaded."""
+    permissions = load_permissions_for(self.person)
+    load_permissions_for(self.other)
+    self.assertEqual(self._cached_stages(self.person),
+                     sorted(permissions_cache.STAGES))
+
+    permissions_cache.clear_permission_cache(
+        {permissions_cache.OWNERS: {self.person.id}})
+    self.assertNotIn(permissions_cache.OWNERS,
+                     self._cached_stages(self.person))
+    self.assertEqual(self._cached_stages(self.other),
+                     sorted(permissions_cache.STAGES))
+
+    self.assertEqual(load_permissions_for(self.person), permissions)
+    self.assertEqual(self._cached_stages(self.person),
+                     sorted(permissions_cache.STAGES))
+
+  def test_clear_all(self):
+    """Clearing without changes invalidates all stages of all users."""
+    load_permissions_for(self.person)
+    permissions_cache.clear_permission_cache()
+    self.assertEqual(self._cached_stages(self.person), [])
+
+  def test_stale_store(self):
+    """Permissions loaded before an invalidation are not used after it."""
+    keys = permissions_cache.get_keys(self.memcache_client, self.person.id)
+    permissions_cache.clear_permission_cache(
+        {permissions_cache.ACL: {self.person.id}})
+    self.memcache_client.set(keys[permissions_cache.ACL],
+                             permissions_cache.dumps({"stale": {}}))
+    self.assertNotIn("stale", load_permissions_for(self.person))
+
+  def test_dumps(self):
+    """Permissions survive compact serialization."""
+    permissions = load_permissions_for(self.person)
+    self.assertEqual(
+        permissions_cache.loads(permissions_cache.dumps(permissions)),
+        permissions)
+
+  def test_clear_global(self):
+    """Global stage changes drop the stage for all users."""
+    load_permissions_for(self.person)
+    load_permissions_for(self.other)
+    permissions_cache.clear_permission_cache({permissions_cache.ROLES: None})
+    for person in (self.person, self.other):
+      self.assertNotIn(permissions_cache.ROLES, self._cached_stages(person))
+      self.assertIn(permissions_cache.ACL, self._cached_stages(person))
@@ -60,3 +60,27 @@ class TestQueryHelper(unittest.TestCase):
 
     for expected_result, expression in expressions:
       self.assertEqual(expected_result, helper._expression_keys(expression))
+
+  def test_get_dependencies(self):
+    """Only references to previous queries are dependencies."""
+    # pylint: disable=protected-access
+    helper = query_helper.QueryHelper(mock.MagicMock())
+    expression = {
+        "left": {"object_name": "__previous__", "op": {"name": "relevant"},
+                 "ids": [0]},
+        "op": {"name": "AND"},
+        "right": {"object_name": "__previous__", "op": {"name": "relevant"},
+                  "ids": [1]},
+    }
+    self.assertEqual(helper._get_dependencies(2, expression), {0, 1})
+    with self.assertRaises(query_helper.BadQueryException):
+      helper._get_dependencies(1, expression)
+
+  def test_query_key(self):
+    """Queries differing only by result type share a key."""
+    # pylint: disable=protected-access
+    get_key = query_helper.QueryHelper._get_query_key
+    query = {"object_name": "Program", "filters": {"expression": {}}}
+    self.assertEqual(get_key(dict(query, type="values")),
+                     get_key(dict(query, type="count", permissions="read")))
+    self.assertNotEqual(get_key(query), get_key(dict(query, limit=[0, 5])))
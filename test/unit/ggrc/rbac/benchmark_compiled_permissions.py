@@ -0,0 +1,122 @@
+# Copyright (C) 2017 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""Microbenchmark of compiled permission checks.
+
+Random permission checks are run on random permissions dicts with long
+context and resource lists:
+
+* with DefaultUserPermissions, as in requests, with the permissions dict in
+  flask.g and the compiled permissions cached next to it, so the first check
+  of every dict compiles it,
+* with a CompiledPermissions object directly,
+* by walking the permissions dict as DefaultUserPermissions did before the
+  permissions were compiled.
+
+The timings are printed and the results of the three ways are only checked to
+be equal, so this is not run with the test suite. Run it from the test
+directory with the unit test settings:
+
+  python -m unit.ggrc.rbac.benchmark_compiled_permissions --ids 1000
+"""
+
+import argparse
+import random
+import time
+
+from flask import g
+
+from ggrc.app import app
+from ggrc.rbac.permissions_provider import CompiledPermissions
+from ggrc.rbac.permissions_provider import DefaultUserPermissions
+from ggrc.rbac.permissions_provider import Permission
+from unit.ggrc.rbac.test_compiled_permissions import ADMIN
+from unit.ggrc.rbac.test_compiled_permissions import _dict_is_allowed
+
+
+ACTIONS = ("read", "update", "delete")
+RESOURCE_TYPES = ("Control", "Market", "Program", "/admin")
+
+
+def _random_permissions(rand, ids):
+  """Generate a permissions dict with up to ids contexts and resources."""
+  permissions = {}
+  for action in ACTIONS:
+    for resource_type in RESOURCE_TYPES:
+      permissions.setdefault(action, {})[resource_type] = {
+          "contexts": rand.sample(xrange(1, ids * 2), ids),
+          "resources": rand.sample(xrange(1, ids * 2), ids),
+      }
+  permissions[ADMIN.action] = {ADMIN.resource_type: {
+      "contexts": rand.sample(xrange(ids * 2, ids * 3), rand.randint(0, 10)),
+  }}
+  return permissions
+
+
+def _random_checks(rand, ids, count):
+  """Generate permission checks that mostly miss the permission lists."""
+  return [
+      Permission(rand.choice(ACTIONS), rand.choice(RESOURCE_TYPES),
+                 rand.randint(1, ids * 4), rand.randint(1, ids * 4))
+      for _ in xrange(count)
+  ]
+
+
+def _time(func, checks):
+  """Run func on every check and return the elapsed time and results."""
+  start = time.time()
+  results = [func(check) for check in checks]
+  return time.time() - start, results
+
+
+def main():
+  """Print times of permission checks with and without compiling."""
+  parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+  parser.add_argument("--ids", type=int, default=1000,
+                      help="number of contexts and resources per entry")
+  parser.add_argument("--checks", type=int, default=20000,
+                      help="number of permission checks per dict")
+  parser.add_argument("--dicts", type=int, default=5,
+                      help="number of random permissions dicts")
+  parser.add_argument("--seed", type=int, default=42)
+  args = parser.parse_args()
+
+  rand = random.Random(args.seed)
+  user_permissions = DefaultUserPermissions()
+  totals = {"compile": 0, "default": 0, "compiled": 0, "dict": 0}
+  with app.test_request_context():
+    for _ in xrange(args.dicts):
+      permissions = _random_permissions(rand, args.ids)
+      checks = _random_checks(rand, args.ids, args.checks)
+
+      start = time.time()
+      compiled = CompiledPermissions(permissions)
+      totals["compile"] += time.time() - start
+
+      # pylint: disable=protected-access
+      g._request_permissions = permissions
+      default_time, default_results = _time(user_permissions._is_allowed,
+                                            checks)
+      compiled_time, compiled_results = _time(
+          lambda check: compiled.is_allowed(*check), checks)
+      dict_time, dict_results = _time(
+          lambda check: _dict_is_allowed(check, permissions), checks)
+      if not default_results == compiled_results == dict_results:
+        raise AssertionError("Compiled checks differ from the dict walk")
+      totals["default"] += default_time
+      totals["compiled"] += compiled_time
+      totals["dict"] += dict_time
+
+  checks = args.checks * args.dicts
+  print "{} checks on {} dicts with {} ids per entry".format(
+      checks, args.dicts, args.ids)
+  print "{:<25} {:.4f} s".format("compile:", totals["compile"])
+  for name, label in (("default", "DefaultUserPermissions"),
+                      ("compiled", "CompiledPermissions"),
+                      ("dict", "dict walk")):
+    print "{:<25} {:.4f} s {:>8.2f} us/check".format(
+        label + ":", totals[name], totals[name] / checks * 1e6)
+
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,186 @@
+# Copyright (C) 2017 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""Tests for compiled user permissions."""
+
+import itertools
+import random
+import unittest
+
+import mock
+
+import ggrc.app  # noqa pylint: disable=unused-import
+from ggrc.rbac.permissions_provider import _CONDITIONS_MAP
+from ggrc.rbac.permissions_provider import CompiledPermissions
+from ggrc.rbac.permissions_provider import Permission
+
+
+ADMIN = Permission('__GGRC_ADMIN__', '__GGRC_ALL__', None, 0)
+
+
+def _dict_match(permission, permissions):
+  """Match a permission by walking the permissions dict."""
+  entry = permissions.get(permission.action, {})
+  contexts = entry.get(permission.resource_type, {}).get('contexts', [])
+  if None in contexts:
+    return True
+  return (
+      permission.resource_id in entry.get(
+          permission.resource_type, {}).get('resources', []) or
+      permission.context_id in contexts or
+      permission.context_id in entry.get(ADMIN.resource_type, {}).get(
+          'contexts', [])
+  )
+
+
+def _dict_is_allowed(permission, permissions):
+  """Check a permission by walking the permissions dict."""
+  if (permission.resource_type != '/admin' and permission.context_id and
+          _dict_is_allowed(permission._replace(context_id=None),
+                           permissions)):
+    return True
+  return (_dict_match(permission, permissions) or
+          _dict_match(ADMIN, permissions) or
+          _dict_match(ADMIN._replace(context_id=permission.context_id),
+                      permissions))
+
+
+def _random_permissions(rand):
+  """Generate a random permissions dict."""
+  permissions = {}
+  for action in ("read", "update", ADMIN.action):
+    for resource_type in ("Control", "/admin", ADMIN.resource_type):
+      if rand.random() < 0.3:
+        continue
+      entry = permissions.setdefault(action, {}).setdefault(resource_type, {})
+      entry["contexts"] = rand.sample([None, 0, 1, 2, 3], rand.randint(0, 2))
+      entry["resources"] = rand.sample([1, 2, 3], rand.randint(0, 2))
+  return permissions
+
+
+def _dict_check_conditions(instance, action, conditions):
+  """Check conditions of the permissions dict."""
+  for condition in conditions:
+    func = _CONDITIONS_MAP[str(condition['condition'])]
+    if func(instance, _current_action=action, **condition.get('terms', {})):
+      return True
+  return False
+
+
+def _dict_is_allowed_for(instance, action, permissions):
+  """Check a permission on an instance by walking the permissions dict."""
+  if _dict_match(ADMIN, permissions):
+    conditions = permissions[ADMIN.action].get(
+        ADMIN.resource_type).get("conditions", {}).get(None, [])
+    if not conditions:
+      return True
+    return _dict_check_conditions(instance, action, conditions)
+  entry = permissions.get(action, {}).get(
+      instance._inflector.model_singular)  # pylint: disable=protected-access
+  if not entry:
+    return False
+  context_id = None
+  if hasattr(instance, 'context') and hasattr(instance.context, 'id'):
+    context_id = instance.context.id
+  if instance.id in entry.get('resources', []):
+    return True
+  conditions = (entry.get('conditions', {}).get(None, []) +
+                entry.get('conditions', {}).get(context_id, []))
+  contexts = entry.get('contexts', [])
+  if (None in contexts or context_id in contexts) and not conditions:
+    return True
+  return _dict_check_conditions(instance, action, conditions)
+
+
+_CONDITIONS = (
+    {"condition": "is",
+     "terms": {"property_name": "status", "value": "Draft"}},
+    {"condition": "in",
+     "terms": {"property_name": "status", "value": ["Final", "Draft"]}},
+    {"condition": "forbid",
+     "terms": {"blacklist": {"update": ["Control"]}}},
+)
+
+
+def _random_conditions(rand):
+  """Generate random conditions by context id."""
+  return {
+      context_id: rand.sample(_CONDITIONS, rand.randint(1, 2))
+      for context_id in rand.sample([None, 1, 2], rand.randint(0, 2))
+  }
+
+
+def _random_instance_permissions(rand):
+  """Generate a random permissions dict with conditions."""
+  permissions = _random_permissions(rand)
+  for resource_types in permissions.values():
+    for resource_type, entry in resource_types.items():
+      if resource_type != "/admin" and rand.random() < 0.5:
+        entry["conditions"] = _random_conditions(rand)
+  return permissions
+
+
+class TestCompiledPermissions(unittest.TestCase):
+  """Compare compiled permissions with walking the permissions dict."""
+
+  def test_same_as_dict(self):
+    """Compiled checks give the same results as the dict walk."""
+    rand = random.Random(42)
+    checks = list(itertools.product(
+        ("read", "update", "delete"),
+        ("Control", "/admin", "Market"),
+        (None, 1, 2, 4),
+        (None, 0, 1, 2, 3, 4),
+    ))
+    for _ in range(300):
+      permissions = _random_permissions(rand)
+      compiled = CompiledPermissions(permissions)
+      for check in checks:
+        permission = Permission(*check)
+        self.assertEqual(compiled.is_allowed(*permission),
+                         _dict_is_allowed(permission, permissions),
+                         (permission, permissions))
+
+  def test_admin(self):
+    """Admin permission in the 0 context allows everything."""
+    compiled = CompiledPermissions(
+        {ADMIN.action: {ADMIN.resource_type: {"contexts": [0]}}})
+    self.assertTrue(compiled.is_admin)
+    self.assertTrue(compiled.is_allowed("delete", "Control", 5, 7))
+
+  def test_same_as_dict_for_instances(self):
+    """Compiled instance checks give the same results as the dict walk."""
+    rand = random.Random(42)
+    instances = []
+    for id_, context_id, status in itertools.product(
+        (1, 4), (None, 1, 2), ("Draft", "Active")):
+      instance = mock.MagicMock(id=id_, status=status, type="Control")
+      instance._inflector.model_singular = "Control"
+      if context_id is None:
+        instance.context = None
+      else:
+        instance.context.id = context_id
+      instances.append(instance)
+    for _ in range(300):
+      permissions = _random_instance_permissions(rand)
+      compiled = CompiledPermissions(permissions)
+      for instance, action in itertools.product(
+          instances, ("read", "update", "delete")):
+        self.assertEqual(
+            compiled.is_allowed_for(instance, action),
+            _dict_is_allowed_for(instance, action, permissions),
+            (instance.id, instance.context, instance.status, action,
+             permissions))
+
+  def test_admin_conditions(self):
+    """Admin permission with conditions allows only matching instances."""
+    conditions = [_CONDITIONS[0]]
+    permissions = {ADMIN.action: {ADMIN.resource_type: {
+        "contexts": [0], "conditions": {None: conditions}}}}
+    compiled = CompiledPermissions(permissions)
+    for status in ("Draft", "Active"):
+      instance = mock.MagicMock(id=1, status=status)
+      self.assertEqual(compiled.is_allowed_for(instance, "update"),
+                       _dict_is_allowed_for(instance, "update", permissions))
+      self.assertEqual(compiled.is_allowed_for(instance, "update"),
+                       status == "Draft")
@@ -0,0 +1,59 @@
+# Copyright (C) 2017 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""Tests for rolling benchmark percentiles."""
+
+import unittest
+
+from ggrc.utils import benchmarks
+from ggrc.utils import request_timing
+from ggrc.utils.benchmark_stats import BenchmarkStats
+
+
+class TestBenchmarkStats(unittest.TestCase):
+  """Tests for BenchmarkStats."""
+
+  def test_percentiles(self):
+    """Percentiles are computed from the last durations in the window."""
+    stats = BenchmarkStats(window=100, max_labels=10)
+    stats.add(("old", 1000.0) for _ in range(100))
+    stats.add(("old", float(duration)) for duration in range(1, 101))
+    self.assertEqual(stats.get_summary()["old"], {
+        "count": 100,
+        "p50": 50.0,
+        "p95": 95.0,
+        "p99": 99.0,
+        "max": 100.0,
+    })
+
+  def test_labels(self):
+    """Numbers in labels are merged and the number of labels is bounded."""
+    stats = BenchmarkStats(window=10, max_labels=2)
+    stats.add([("loop: 1", 1.0), ("loop: 22", 2.0), ("other", 3.0),
+               ("ignored", 4.0)])
+    summary = stats.get_summary()
+    self.assertEqual(sorted(summary), ["loop: N", "other"])
+    self.assertEqual(summary["loop: N"]["count"], 2)
+
+  def test_add_request(self):
+    """Request duration and its benchmark tree are added."""
+    stats = BenchmarkStats(window=10, max_labels=10)
+    request_timing.start()
+    with benchmarks.BenchmarkContextManager("collection post"):
+      with benchmarks.BenchmarkContextManager("Flush posted objects"):
+        pass
+    stats.add_request(request_timing.stop(), "POST Control")
+    self.assertEqual(
+        sorted(stats.get_summary()),
+        ["POST Control", "collection post",
+         "collection post > Flush posted objects"])
+
+  def test_counters(self):
+    """Counters are reported with their totals."""
+    stats = BenchmarkStats(window=10, max_labels=1)
+    stats.increment("hit")
+    stats.increment("hit", 2)
+    stats.increment("ignored")
+    self.assertEqual(stats.get_summary(), {"hit": {"count": 3}})
+    stats.clear()
+    self.assertEqual(stats.get_summary(), {})
@@ -0,0 +1,76 @@
+# Copyright (C) 2017 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""Tests for running parts of a request in worker threads."""
+
+import threading
+import unittest
+
+import flask
+import mock
+
+from ggrc.utils import parallel
+
+
+class TestRunInThreads(unittest.TestCase):
+  """Tests for run_in_threads."""
+
+  def setUp(self):
+    self.app = flask.Flask(__name__)
+
+  def test_results_order(self):
+    """Results are returned in the order of functions."""
+    with self.app.test_request_context():
+      results = parallel.run_in_threads(
+          [lambda i=i: i * 2 for i in range(10)], 4)
+    self.assertEqual(results, [i * 2 for i in range(10)])
+
+  def test_worker_context(self):
+    """Workers run in other threads with a copy of the request context."""
+    main_thread = threading.current_thread()
+    with self.app.test_request_context("/query?a=1"):
+      # pylint: disable=protected-access
+      flask.g._request_permissions = {"read": {}}
+      flask.g.other = "not shared"
+      results = parallel.run_in_threads([
+          lambda: (threading.current_thread() is main_thread,
+                   flask.request.args.get("a"),
+                   getattr(flask.g, "_request_permissions", None),
+                   getattr(flask.g, "other", None)),
+      ] * 2, 2)
+    self.assertEqual(results, [(False, "1", {"read": {}}, None)] * 2)
+
+  def test_sequential(self):
+    """Functions run in the current thread without a request context."""
+    main_thread = threading.current_thread()
+    results = parallel.run_in_threads(
+        [lambda: threading.current_thread() is main_thread] * 3, 4)
+    self.assertEqual(results, [True] * 3)
+
+  def test_error(self):
+    """Errors of workers are raised in the calling thread."""
+    def fail():
+      raise ValueError("failed")
+    with self.app.test_request_context():
+      with self.assertRaises(ValueError):
+        parallel.run_in_threads([lambda: 1, fail], 2)
+
+  def test_no_free_connections(self):
+    """Functions run in the current thread without free connections."""
+    main_thread = threading.current_thread()
+    with self.app.test_request_context():
+      with mock.patch("ggrc.utils.parallel._get_free_connections",
+                      return_value=1):
+        results = parallel.run_in_threads(
+            [lambda: threading.current_thread() is main_thread] * 3, 4)
+    self.assertEqual(results, [True] * 3)
+
+  def test_push_error(self):
+    """Errors of pushing the worker context are raised."""
+    def fail():
+      raise RuntimeError("push failed")
+    with self.app.test_request_context():
+      with mock.patch("ggrc.utils.parallel._get_worker_context",
+                      return_value=fail):
+        with self.assertRaises(RuntimeError):
+          parallel.run_in_threads([lambda: 1, lambda: 2], 2)
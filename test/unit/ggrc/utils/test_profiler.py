@@ -0,0 +1,39 @@
+# Copyright (C) 2017 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""Tests for request profiling."""
+
+import cProfile
+import marshal
+import unittest
+import zlib
+
+import mock
+
+from ggrc.utils import profiler
+
+
+class TestProfiler(unittest.TestCase):
+  """Tests for profile data and profiling limits."""
+
+  def test_pstats_data(self):
+    """Stored data is a compressed pstats dump."""
+    request_profiler = cProfile.Profile()
+    request_profiler.enable()
+    sorted(range(10))
+    request_profiler.disable()
+    stats = marshal.loads(zlib.decompress(
+        profiler.get_pstats_data(request_profiler)))
+    self.assertIn("<sorted>", [function for _, _, function in stats])
+
+  @mock.patch("ggrc.utils.profiler.settings.PROFILE_MAX_PER_HOUR", 2,
+              create=True)
+  def test_rate_limit(self):
+    """Only a limited number of requests is profiled per hour."""
+    # pylint: disable=protected-access
+    rate_limit = profiler._RateLimit()
+    self.assertEqual([rate_limit.acquire() for _ in range(3)],
+                     [True, True, False])
+    with mock.patch("ggrc.utils.profiler.time.time",
+                    return_value=profiler.time.time() + 3601):
+      self.assertTrue(rate_limit.acquire())
@@ -0,0 +1,63 @@
+# Copyright (C) 2017 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""Tests for splitting queries into chunks."""
+
+import unittest
+
+import sqlalchemy as sa
+from sqlalchemy import orm
+from sqlalchemy.ext.declarative import declarative_base
+
+from ggrc import utils
+
+
+Base = declarative_base()  # pylint: disable=invalid-name
+
+
+class Item(Base):  # pylint: disable=too-few-public-methods
+  __tablename__ = "items"
+  id = sa.Column(sa.Integer, primary_key=True)
+  title = sa.Column(sa.String(50))
+
+
+class TestQueryChunks(unittest.TestCase):
+  """Tests for generate_query_chunks and generate_query_chunks_streamed."""
+
+  def setUp(self):
+    engine = sa.create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    # ids with gaps, inserted out of order
+    engine.execute(Item.__table__.insert(), [
+        {"id": id_, "title": "item {}".format(id_)}
+        for id_ in [17, 3, 8, 1, 42, 5, 23, 11, 2]
+    ])
+    self.session = orm.Session(bind=engine)
+
+  def tearDown(self):
+    self.session.close()
+
+  def test_keyset_chunks(self):
+    """Test that chunks cover all rows in id order."""
+    chunks = [[item.id for item in chunk] for chunk in
+              utils.generate_query_chunks(self.session.query(Item), 4)]
+    self.assertEqual(chunks, [[1, 2, 3, 5], [8, 11, 17, 23], [42]])
+
+  def test_keyset_chunks_filtered(self):
+    """Test that chunks respect query filters and column queries."""
+    query = self.session.query(Item.id).filter(Item.id > 4)
+    chunks = [[row.id for row in chunk] for chunk in
+              utils.generate_query_chunks(query, 2)]
+    self.assertEqual(chunks, [[5, 8], [11, 17], [23, 42]])
+
+  def test_keyset_chunks_empty(self):
+    """Test that an empty query yields no chunks."""
+    query = self.session.query(Item).filter(Item.id > 100)
+    self.assertEqual(list(utils.generate_query_chunks(query, 2)), [])
+
+  def test_streamed_chunks(self):
+    """Test reading a query in chunks through a dedicated cursor."""
+    query = self.session.query(Item.id).order_by(Item.id)
+    chunks = [[row[0] for row in chunk] for chunk in
+              utils.generate_query_chunks_streamed(query, 4)]
+    self.assertEqual(chunks, [[1, 2, 3, 5], [8, 11, 17, 23], [42]])
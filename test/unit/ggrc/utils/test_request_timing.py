@@ -0,0 +1,75 @@
+# Copyright (C) 2017 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""Tests for per-request query and benchmark timing."""
+
+import json
+import unittest
+
+import sqlalchemy as sa
+
+from ggrc.utils import benchmarks
+from ggrc.utils import request_timing
+
+
+class TestRequestTiming(unittest.TestCase):
+  """Tests for RequestTimer and its headers."""
+
+  def setUp(self):
+    self.engine = sa.create_engine("sqlite://")
+    sa.event.listen(self.engine, "before_cursor_execute",
+                    request_timing.before_cursor_execute)
+    sa.event.listen(self.engine, "after_cursor_execute",
+                    request_timing.after_cursor_execute)
+
+  def tearDown(self):
+    request_timing.stop()
+
+  def test_no_timer(self):
+    """Queries and benchmarks outside of timed requests are ignored."""
+    with benchmarks.BenchmarkContextManager("outside"):
+      self.engine.execute("SELECT 1")
+    self.assertIsNone(request_timing.get_current())
+
+  def test_headers(self):
+    """Queries and the benchmark tree are added to the headers."""
+    request_timing.start()
+    with benchmarks.BenchmarkContextManager("collection post"):
+      for _ in range(3):
+        with benchmarks.BenchmarkContextManager("loop"):
+          self.engine.execute("SELECT 1")
+          with benchmarks.BenchmarkContextManager("too deep"):
+            pass
+    with benchmarks.BenchmarkContextManager("commit"):
+      self.engine.execute("SELECT\n  2")
+    timer = request_timing.stop()
+
+    queries = json.loads(timer.get_queries())
+    self.assertEqual(queries["count"], 4)
+    self.assertEqual(len(queries["slowest"]), min(timer.slow_queries_limit, 4))
+    self.assertNotIn("\n", timer.get_queries())
+    queries = json.loads(timer.get_queries(with_statements=False))
+    self.assertEqual([query.keys() for query in queries["slowest"]],
+                     [["time"]] * len(queries["slowest"]))
+
+    server_timing = timer.get_server_timing(max_depth=2)
+    self.assertIn('sql;dur=', server_timing)
+    self.assertIn('desc="4 queries"', server_timing)
+    self.assertIn('b0;dur=', server_timing)
+    self.assertIn('desc="collection post"', server_timing)
+    self.assertIn('b1;dur=', server_timing)
+    self.assertIn('desc="collection post > loop (x3)"', server_timing)
+    self.assertIn('b2;dur=', server_timing)
+    self.assertIn('desc="commit"', server_timing)
+    self.assertNotIn("too deep", server_timing)
+
+  def test_budgets(self):
+    """Exceeded budgets are reported."""
+    request_timing.start()
+    self.engine.execute("SELECT 1")
+    self.engine.execute("SELECT 2")
+    timer = request_timing.stop()
+    self.assertEqual(timer.get_exceeded_budgets({"queries": 2}), [])
+    self.assertEqual(timer.get_exceeded_budgets({"queries": 0}), [])
+    self.assertEqual(timer.get_exceeded_budgets({"queries": 1}),
+                     ["2 queries > 1"])